@@ -0,0 +1,60 @@
+#bench_detector.py
+# 같은 프레임 N 장을 batch 1 로 N 번 추론할 때와 batch N 으로 한 번 추론할 때의 frames/sec 비교
+# (카메라 N 대를 프로세스 N 개로 돌리는 경우 vs rtsp_multi_detection.py 처럼 하나로 묶는 경우)
+#
+# 사용 예:
+#   python bench_detector.py                      # 검은 프레임 640x480, 카메라 4대
+#   python bench_detector.py --video sample.mov --cameras 8 --repeat 3
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from detector import DetrDetector
+
+def load_frames(video, n, size):
+    if not video:
+        return [np.zeros((size[1], size[0], 3), dtype=np.uint8) for _ in range(n)]
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < n:
+        ret, img = cap.read()
+        if not ret:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            continue
+        frames.append(img)
+    cap.release()
+    return frames
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--video', help='프레임을 가져올 영상 파일 (없으면 검은 프레임)')
+    parser.add_argument('--cameras', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    args = parser.parse_args()
+
+    detector = DetrDetector(warmup_size=(args.height, args.width))
+    print('detector :', detector.stats())
+    frames = load_frames(args.video, args.cameras, (args.width, args.height))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for img in frames:
+            detector.detect(img)
+    t_single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        detector.detect_batch(frames)
+    t_batch = time.perf_counter() - start
+
+    n = args.cameras * args.repeat
+    print(f'batch 1 x {args.cameras} : {n / t_single:.2f} frames/s')
+    print(f'batch {args.cameras}     : {n / t_batch:.2f} frames/s  x{t_single / t_batch:.2f}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#bench_zone_index.py
+# 탐지 박스를 주차 칸에 배정하는 두 방법 비교
+# - loop  : 박스마다 모든 칸에 is_point_in_rectangle 호출 (rtsp_detection.py 의 기존 방식)
+# - numpy : ZoneIndex.assign 으로 한 번에 (+ assign_iou 참고용)
+# 두 방법의 결과가 같은지 먼저 확인한 뒤 프레임당 시간을 출력
+#
+# 사용 예:
+#   python bench_zone_index.py                          # 칸 300 개, 차량 50 대
+#   python bench_zone_index.py --zones 50 --boxes 10 --grid grid.txt
+
+import argparse
+import ast
+import time
+
+import numpy as np
+
+from zone_index import ZoneIndex, NO_ZONE
+
+def is_point_in_rectangle(x, y, rect):
+    x_min, y_min, x_max, y_max = rect
+    return x_min <= x <= x_max and y_min <= y <= y_max
+
+def assign_loop(mid_points, rects):
+    indexes = []
+    for x, y in mid_points:
+        index = NO_ZONE
+        for ind, rec in enumerate(rects):
+            if is_point_in_rectangle(x, y, rec):
+                index = ind
+                break
+        indexes.append(index)
+    return indexes
+
+def make_zones(n, width, height):
+    # 화면을 격자로 나눈 주차 칸 (칸 사이에 약간의 틈)
+    cols = max(1, int(np.ceil(np.sqrt(n * width / height))))
+    rows = max(1, int(np.ceil(n / cols)))
+    w, h = width / cols, height / rows
+    return [(int(c * w) + 2, int(r * h) + 2, int((c + 1) * w) - 2, int((r + 1) * h) - 2)
+            for r in range(rows) for c in range(cols)][:n]
+
+def make_boxes(n, width, height, rng):
+    x1 = rng.uniform(0, width - 60, n)
+    y1 = rng.uniform(0, height - 40, n)
+    return [[round(a, 2), round(b, 2), round(a + rng.uniform(30, 60), 2), round(b + rng.uniform(20, 40), 2)]
+            for a, b in zip(x1, y1)]
+
+def timeit(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--zones', type=int, default=300)
+    parser.add_argument('--boxes', type=int, default=50)
+    parser.add_argument('--grid', help='실제 grid.txt (주면 --zones 대신 사용)')
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    if args.grid:
+        with open(args.grid, 'r') as f:
+            rects = ast.literal_eval(f.read())
+    else:
+        rects = make_zones(args.zones, args.width, args.height)
+    boxes = make_boxes(args.boxes, args.width, args.height, rng)
+    mid_points = [((b[0] + b[2]) / 2, (b[1] + b[3]) / 2) for b in boxes]
+
+    zones = ZoneIndex(rects)
+    expected = assign_loop(mid_points, rects)
+    got = zones.assign(mid_points).tolist()
+    assert got == expected, '결과가 다름'
+    print(f'{len(rects)} zones x {len(boxes)} boxes, '
+          f'{sum(i != NO_ZONE for i in expected)} boxes in a zone (loop == numpy)')
+
+    t_loop = timeit(lambda: assign_loop(mid_points, rects), args.repeat)
+    t_numpy = timeit(lambda: zones.assign(mid_points), args.repeat)
+    t_iou = timeit(lambda: zones.assign_iou(boxes), args.repeat)
+    print(f'loop        : {t_loop * 1000:.3f} ms/frame')
+    print(f'numpy       : {t_numpy * 1000:.3f} ms/frame  x{t_loop / t_numpy:.1f}')
+    print(f'numpy (iou) : {t_iou * 1000:.3f} ms/frame')
+
+if __name__ == '__main__':
+    main()
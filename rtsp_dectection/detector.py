@@ -0,0 +1,104 @@
+#detector.py
+# DETR 객체 탐지 서비스 객체 - 모델은 프로세스 시작 시 한 번만 올리고 스트림/네트워크 오류와 무관하게 계속 씀
+#
+# - DetrImageProcessor / DetrForObjectDetection 을 한 번 로드 → eval 모드 + torch.inference_mode() 로 추론
+# - 시작할 때 더미 프레임으로 warmup 추론 한 번 (첫 실제 프레임이 커널 초기화/메모리 할당 비용을 떠안지 않도록)
+# - 모델 로드 시간, warmup(첫 추론) 시간, 이후 추론 지연(평균/최근)을 stats() 로 확인
+#
+# 사용 예:
+#   detector = DetrDetector(labels=['person', 'car'])
+#   print(detector.stats())              # load_seconds, warmup_seconds
+#   for det in detector.detect(img):     # img: cv2 프레임 (H, W, 3)
+#       print(det['label'], det['score'], det['box'])
+#   per_camera = detector.detect_batch([img1, img2, img3])   # 여러 카메라를 한 batch 로
+
+import time
+
+import numpy as np
+import torch
+from transformers import DetrImageProcessor, DetrForObjectDetection
+
+MODEL_NAME = "facebook/detr-resnet-101"
+
+class DetrDetector:
+    def __init__(self, model_name=MODEL_NAME, revision="no_timm", device=None, threshold=0.3,
+                 labels=None, warmup_size=(480, 640)):
+        self.device = torch.device(device or ('cuda' if torch.cuda.is_available() else 'cpu'))
+        self.threshold = threshold
+        self.labels = set(labels) if labels else None  # None 이면 모든 라벨
+
+        start = time.perf_counter()
+        self.processor = DetrImageProcessor.from_pretrained(model_name, revision=revision)
+        self.model = DetrForObjectDetection.from_pretrained(model_name, revision=revision)
+        self.model.to(self.device)
+        self.model.eval()
+        self.id2label = self.model.config.id2label
+        self.load_seconds = time.perf_counter() - start
+
+        self.inferences = 0  # forward 횟수
+        self.frames = 0  # 처리한 프레임 수 (batch 면 forward 한 번에 여러 장)
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+        self.warmup_seconds = None
+        if warmup_size:
+            self.warmup_seconds = self.warmup(warmup_size)
+
+    def warmup(self, size):
+        # 카메라 해상도와 비슷한 검은 프레임으로 한 번 추론 (결과는 버림, 통계에는 넣지 않음)
+        start = time.perf_counter()
+        self._forward([np.zeros((size[0], size[1], 3), dtype=np.uint8)])
+        return time.perf_counter() - start
+
+    def _forward(self, images):
+        with torch.inference_mode():
+            inputs = self.processor(images=images, return_tensors="pt").to(self.device)
+            outputs = self.model(**inputs)
+            target_sizes = torch.tensor([img.shape[:2] for img in images])
+            return self.processor.post_process_object_detection(outputs, target_sizes=target_sizes, threshold=self.threshold)
+
+    def _to_detections(self, result):
+        detections = []
+        for score, label, box in zip(result["scores"], result["labels"], result["boxes"]):
+            name = self.id2label[label.item()]
+            if self.labels is None or name in self.labels:
+                detections.append({
+                    "label": name,
+                    "score": round(score.item(), 3),
+                    "box": [round(v, 2) for v in box.tolist()],
+                })
+        return detections
+
+    def detect(self, img):
+        # img 한 장 → [{"label", "score", "box": [x1, y1, x2, y2]}, ...]
+        start = time.perf_counter()
+        result = self._forward([img])[0]
+        self._record(time.perf_counter() - start)
+        return self._to_detections(result)
+
+    def detect_batch(self, images):
+        # 여러 카메라 프레임을 한 번의 forward 로 - processor 가 크기가 다른 프레임을 pad + pixel_mask 로 묶고,
+        # 결과는 target_sizes 로 프레임별 원래 크기에 맞춰 나눔 → 입력 순서대로 탐지 목록의 목록
+        if not images:
+            return []
+        start = time.perf_counter()
+        results = self._forward(images)
+        self._record(time.perf_counter() - start, len(images))
+        return [self._to_detections(r) for r in results]
+
+    def _record(self, seconds, frames=1):
+        self.inferences += 1
+        self.frames += frames
+        self.total_seconds += seconds
+        self.last_seconds = seconds
+
+    def stats(self):
+        return {
+            "device": str(self.device),
+            "load_seconds": round(self.load_seconds, 2),
+            "warmup_seconds": round(self.warmup_seconds, 3) if self.warmup_seconds is not None else None,
+            "inferences": self.inferences,
+            "frames": self.frames,
+            "avg_seconds": round(self.total_seconds / self.inferences, 3) if self.inferences else None,
+            "frames_per_second": round(self.frames / self.total_seconds, 2) if self.total_seconds else None,
+            "last_seconds": round(self.last_seconds, 3),
+        }
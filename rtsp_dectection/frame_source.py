@@ -0,0 +1,205 @@
+#frame_source.py
+# RTSP 스트림(또는 로컬 영상 파일)을 백그라운드 스레드에서 계속 읽어서 가장 최근 프레임만 들고 있는 프레임 소스
+#
+# - 스트림마다 VideoCapture 를 한 번만 열어 두고 계속 grab → 프레임마다 RTSP 연결/키프레임 대기를 하지 않음
+# - 추론이 느려도 디코딩이 밀리지 않도록 최신 프레임 하나만 보관, 읽히기 전에 덮어쓴 프레임은 dropped 로 셈
+# - 읽기 실패 / 연결 끊김이면 1, 2, 4 ... max_backoff 초 간격으로 다시 연결
+# - 로컬 파일은 영상 FPS 에 맞춰 읽고(realtime), loop=True 면 끝에서 처음으로 돌아감 → 카메라 없이 테스트 가능
+#
+# 사용 예:
+#   source = FrameSource('rtsp://...').start()
+#   seq, img = source.read(timeout=5)   # 지난번보다 새 프레임이 올 때까지 대기
+#   print(source.stats())
+#   source.stop()
+#
+#   python frame_source.py <RTSP URL 또는 영상 파일> [추론 시간(초)]   # grab FPS / dropped 확인
+
+import os
+import threading
+import time
+
+import cv2
+
+class FrameSource:
+    def __init__(self, url, name=None, max_backoff=30.0, realtime=None, loop=False):
+        self.url = url
+        self.name = name or url
+        self.max_backoff = max_backoff
+        self.is_file = os.path.isfile(str(url))
+        self.realtime = self.is_file if realtime is None else realtime  # 파일을 영상 속도대로 읽을지
+        self.loop = loop
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0  # 읽은 프레임 번호 (grab 할 때마다 +1)
+        self._frame_time = None
+        self._last_read_seq = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.connected = False
+        self.finished = False  # 파일 끝 (loop=False)
+        self.reconnects = 0  # 연결된 뒤 끊겨서 다시 연결한 횟수
+        self.connect_failures = 0  # 연결 시도 실패 횟수
+        self.dropped = 0
+        self.delivered = 0
+        self.last_error = None
+        self._fps = 0.0
+        self._fps_count = 0
+        self._fps_start = time.monotonic()
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=f"frame-source-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- 읽기 (추론 쪽) ----
+    def read(self, timeout=None):
+        # 마지막으로 읽은 것보다 새 프레임을 (seq, frame) 으로 반환, timeout 안에 없으면 (None, None)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._seq == self._last_read_seq or self._frame is None:
+                if self._stop.is_set() or self.finished:
+                    return None, None
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None, None
+                self._cond.wait(remaining)
+            self._last_read_seq = self._seq
+            self.delivered += 1
+            return self._seq, self._frame
+
+    def latest(self):
+        # 기다리지 않고 현재 들고 있는 프레임 (없으면 (0, None))
+        with self._cond:
+            return self._seq, self._frame
+
+    # ---- 백그라운드 grab 루프 ----
+    def _open(self):
+        cap = cv2.VideoCapture(self.url)
+        if not cap.isOpened():
+            cap.release()
+            raise IOError(f"스트림을 열 수 없습니다: {self.url}")
+        if not self.is_file:
+            # 드라이버 내부 버퍼를 줄여 오래된 프레임이 쌓이지 않게 (지원하지 않는 백엔드는 무시)
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                cap = self._open()
+            except Exception as e:
+                self.connect_failures += 1
+                self._fail(e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            self.connected = True
+            backoff = 1.0
+            try:
+                self._grab_loop(cap)
+            except Exception as e:
+                self._fail(e)
+            finally:
+                cap.release()
+                self.connected = False
+            if self.finished or self._stop.is_set():
+                break
+            self.reconnects += 1
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+        with self._cond:
+            self._cond.notify_all()
+
+    def _grab_loop(self, cap):
+        fps = cap.get(cv2.CAP_PROP_FPS) if self.realtime else 0
+        interval = 1.0 / fps if fps and fps > 0 else 0.0
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            ret, img = cap.read()
+            if not ret:
+                if self.is_file and self.loop:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if self.is_file:
+                    self.finished = True
+                    return
+                raise IOError("프레임을 읽지 못했습니다 (스트림 끊김)")
+            self._publish(img)
+            if interval:
+                next_at += interval
+                delay = next_at - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_at = time.monotonic()
+
+    def _publish(self, img):
+        now = time.monotonic()
+        with self._cond:
+            if self._frame is not None and self._seq != self._last_read_seq:
+                self.dropped += 1  # 읽히기 전에 새 프레임으로 덮어씀
+            self._frame = img
+            self._seq += 1
+            self._frame_time = now
+            self._cond.notify_all()
+        self._fps_count += 1
+        elapsed = now - self._fps_start
+        if elapsed >= 1.0:
+            self._fps = self._fps_count / elapsed
+            self._fps_count = 0
+            self._fps_start = now
+
+    def _fail(self, e):
+        self.last_error = str(e)
+        print(f'[{self.name}] frame source error : {e}')
+
+    def stats(self):
+        with self._cond:
+            age = time.monotonic() - self._frame_time if self._frame_time is not None else None
+            return {
+                "name": self.name,
+                "connected": self.connected,
+                "grab_fps": round(self._fps, 2),
+                "grabbed": self._seq,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+                "reconnects": self.reconnects,
+                "connect_failures": self.connect_failures,
+                "frame_age": round(age, 3) if age is not None else None,
+                "last_error": self.last_error,
+            }
+
+if __name__ == '__main__':
+    import sys
+
+    # 추론에 걸리는 시간만큼 쉬면서 읽어 보고 5초마다 상태 출력
+    work = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    with FrameSource(sys.argv[1]) as source:
+        shown = time.time()
+        while not source.finished:
+            seq, img = source.read(timeout=5)
+            if img is not None:
+                time.sleep(work)
+            if time.time() - shown >= 5:
+                print(source.stats())
+                shown = time.time()
+        print(source.stats())
@@ -0,0 +1,94 @@
+#motion_gate.py
+# 화면이 거의 바뀌지 않은 프레임은 DETR 추론을 건너뛰고 직전 탐지 결과를 다시 쓰기 위한 변화 감지기
+#
+# - 프레임을 작게 줄인 흑백 이미지로 바꿔서 "마지막으로 추론한 프레임" 과 차이를 봄 (직전 프레임이 아니라서
+#   천천히 들어오는 차도 변화가 누적되면 잡힘)
+# - 픽셀 차이가 pixel_threshold 를 넘는 비율이 min_changed 이상이면 추론
+# - zones(grid.txt 의 사각형) 를 주면 그 영역 안의 변화만 봄 (도로 / 나무 흔들림 무시)
+# - refresh_interval 초가 지나면 변화가 없어도 한 번 추론 (조명 변화, 놓친 움직임 보정)
+#
+# 사용 예:
+#   gate = MotionGate(zones=data)
+#   run, reason = gate.check(img)
+#   detections = detector.detect(img) if run else last_detections
+
+import time
+
+import cv2
+import numpy as np
+
+class MotionGate:
+    def __init__(self, zones=None, width=160, pixel_threshold=25, min_changed=0.01, refresh_interval=10.0):
+        self.zones = zones or []
+        self.width = width  # 비교용으로 줄일 가로 크기 (세로는 비율 유지)
+        self.pixel_threshold = pixel_threshold
+        self.min_changed = min_changed
+        self.refresh_interval = refresh_interval  # 0 이면 강제 추론 없음
+
+        self._reference = None  # 마지막으로 추론한 프레임 (축소 흑백)
+        self._reference_time = 0.0
+        self._mask = None
+        self._mask_shape = None
+
+        self.frames = 0
+        self.runs = 0
+        self.reasons = {"first": 0, "motion": 0, "refresh": 0}
+        self.last_changed = 0.0
+
+    def _small(self, img):
+        h, w = img.shape[:2]
+        height = max(1, round(h * self.width / w))
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+        small = cv2.resize(gray, (self.width, height), interpolation=cv2.INTER_AREA)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _zone_mask(self, full_shape, small_shape):
+        # 원본 좌표의 사각형을 축소 이미지 좌표로 옮긴 마스크 (프레임 크기가 바뀔 때만 다시 만듦)
+        if not self.zones:
+            return None
+        if self._mask_shape != (full_shape, small_shape):
+            sy = small_shape[0] / full_shape[0]
+            sx = small_shape[1] / full_shape[1]
+            mask = np.zeros(small_shape, dtype=bool)
+            for x1, y1, x2, y2 in self.zones:
+                x1, x2 = sorted((x1, x2))
+                y1, y2 = sorted((y1, y2))
+                mask[int(y1 * sy):int(np.ceil(y2 * sy)) + 1, int(x1 * sx):int(np.ceil(x2 * sx)) + 1] = True
+            self._mask = mask if mask.any() else None
+            self._mask_shape = (full_shape, small_shape)
+        return self._mask
+
+    def check(self, img):
+        # (추론할지, 이유) - 추론하기로 하면 이 프레임이 다음 비교 기준이 됨
+        self.frames += 1
+        small = self._small(img)
+        now = time.monotonic()
+        reason = None
+        if self._reference is None or self._reference.shape != small.shape:
+            reason = "first"
+        else:
+            changed = cv2.absdiff(small, self._reference) > self.pixel_threshold
+            mask = self._zone_mask(img.shape[:2], small.shape)
+            self.last_changed = float(changed[mask].mean() if mask is not None else changed.mean())
+            if self.last_changed >= self.min_changed:
+                reason = "motion"
+            elif self.refresh_interval and now - self._reference_time >= self.refresh_interval:
+                reason = "refresh"
+        if reason is None:
+            return False, "skip"
+        self._reference = small
+        self._reference_time = now
+        self.runs += 1
+        self.reasons[reason] += 1
+        return True, reason
+
+    def stats(self):
+        skipped = self.frames - self.runs
+        return {
+            "frames": self.frames,
+            "runs": self.runs,
+            "skipped": skipped,
+            "skip_ratio": round(skipped / self.frames, 3) if self.frames else 0.0,
+            "reasons": dict(self.reasons),
+            "last_changed": round(self.last_changed, 4),
+        }
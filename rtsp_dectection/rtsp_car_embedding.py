@@ -7,6 +7,7 @@ import ast
 from towhee import pipe, ops
 from transformers import DetrImageProcessor, DetrForObjectDetection
 from PIL import Image
+from zone_index import ZoneIndex
 
 device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 print(device)
@@ -15,11 +16,6 @@ print(device)
 save_mode = False
 rectangles = []
 
-def is_point_in_rectangle(x, y, rect):
-    x_min, y_min, x_max, y_max = rect
-    # 점이 사각형의 범위 안에 있는지 확인
-    return x_min <= x <= x_max and y_min <= y <= y_max
-
 # 절대 경로 설정
 base_dir = 'C:/Users/CoTLab/Downloads/detection'
 tmp_dir = os.path.join(base_dir, 'tmp')
@@ -61,6 +57,7 @@ def main():
             with open(os.path.join(base_dir, 'grid.txt'), 'r') as f:
                 data = ast.literal_eval(f.read())
                 print(f"Loaded {len(data)} rectangles.")
+            zones = ZoneIndex(data)  # 칸 사각형을 한 번만 배열로 올려 두고 프레임마다 박스 전체를 한 번에 배정
 
             processor = DetrImageProcessor.from_pretrained("facebook/detr-resnet-101", revision="no_timm")
             model = DetrForObjectDetection.from_pretrained("facebook/detr-resnet-101", revision="no_timm")
@@ -83,39 +80,38 @@ def main():
                         target_sizes = torch.tensor([img.shape[:2]])
                         results = processor.post_process_object_detection(outputs, target_sizes=target_sizes, threshold=0.3)[0]
                         send = {}
-                        n = 0
+                        boxes = []
                         for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
                             tmp_label = model.config.id2label[label.item()]
                             if tmp_label in label_set:
-                                n += 1
-                                box = [round(i, 2) for i in box.tolist()]
-                                mid_point = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
-                                for ind, rec in enumerate(data):
-                                    if is_point_in_rectangle(mid_point[0], mid_point[1], rec):
-                                        cropped_img = img[int(box[1]):int(box[3]), int(box[0]):int(box[2])]
-                                        car_img_path = os.path.join(tmp_dir, f'car_{ind}_{n}.jpg')
-                                        cv2.imwrite(car_img_path, cropped_img)
-                                        try:
-                                            result = p_embed(car_img_path).to_list()
-                                            if result:
-                                                img_path, vec = result[0]
-                                                vec_list = vec.tolist()
-                                                embedding_payload = json.dumps({'img_path': img_path, 'embedding': vec_list})
-                                                embedding_response = requests.post(milvusServerURL, headers=headers, data=embedding_payload)
-                                                print("Embedding POST request status code:", embedding_response.status_code)
-                                                print("Embedding POST request text:", embedding_response.text)
+                                boxes.append([round(i, 2) for i in box.tolist()])
+                        # 중심점이 들어가는 칸마다 한 번씩 (칸이 겹치면 칸마다, 칸 밖이면 임베딩하지 않음 - 기존 루프와 같은 동작)
+                        for n, (box, inds) in enumerate(zip(boxes, zones.containing_boxes(boxes)), start=1):
+                            for ind in inds:
+                                cropped_img = img[int(box[1]):int(box[3]), int(box[0]):int(box[2])]
+                                car_img_path = os.path.join(tmp_dir, f'car_{ind}_{n}.jpg')
+                                cv2.imwrite(car_img_path, cropped_img)
+                                try:
+                                    result = p_embed(car_img_path).to_list()
+                                    if result:
+                                        img_path, vec = result[0]
+                                        vec_list = vec.tolist()
+                                        embedding_payload = json.dumps({'img_path': img_path, 'embedding': vec_list})
+                                        embedding_response = requests.post(milvusServerURL, headers=headers, data=embedding_payload)
+                                        print("Embedding POST request status code:", embedding_response.status_code)
+                                        print("Embedding POST request text:", embedding_response.text)
                                                 
-                                                # search_result 값 추출
-                                                response_data = json.loads(embedding_response.text)
-                                                search_result = response_data.get('search_result', 'unknown')
+                                        # search_result 값 추출
+                                        response_data = json.loads(embedding_response.text)
+                                        search_result = response_data.get('search_result', 'unknown')
                                                 
-                                                # 이미지 결과 경로에 search_result 추가
-                                                car_img_result_path = os.path.join(result_dir, f'car_{ind}_{n}_{search_result}.jpg')
-                                                cv2.imwrite(car_img_result_path, cropped_img)
-                                                print("Image saved at: ", car_img_result_path)
-                                                print("\n")
-                                        except Exception as e:
-                                            print(f"Error embedding and sending car image: {e}")
+                                        # 이미지 결과 경로에 search_result 추가
+                                        car_img_result_path = os.path.join(result_dir, f'car_{ind}_{n}_{search_result}.jpg')
+                                        cv2.imwrite(car_img_result_path, cropped_img)
+                                        print("Image saved at: ", car_img_result_path)
+                                        print("\n")
+                                except Exception as e:
+                                    print(f"Error embedding and sending car image: {e}")
                         cv2.waitKey(5)
     except Exception as e:
         print('Error occurred:', e)
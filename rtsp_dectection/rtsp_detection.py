@@ -1,6 +1,5 @@
 #rtsp_detection.py
 
-from transformers import DetrImageProcessor, DetrForObjectDetection
 import torch
 from PIL import Image
 import requests
@@ -8,26 +7,26 @@ import cv2
 import copy
 import json
 import ast
+import time
+from frame_source import FrameSource
+from detector import DetrDetector
+from motion_gate import MotionGate
+from zone_index import ZoneIndex
 
 device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
 print(device)
 
 # 전역 변수 설정
 save_mode = False
+motion_gate = True  # 칸 영역에 변화가 없으면 추론을 건너뛰고 직전 결과를 다시 씀
+zone_assign = 'center'  # 칸 배정 방식 - 'center': 박스 중심점이 들어가는 칸, 'iou': 가장 많이 겹치는 칸
+zone_min_iou = 0.1  # 'iou' 방식에서 이보다 덜 겹치면 칸 없음(9999)
+process_fps = 2.0  # 초당 최대 처리(전송) 프레임 수 - 추론을 건너뛰어도 grab 속도로 전송하지 않도록
 drawing = False  # 마우스 드래그 상태 확인용
 rectangle_on = True
 ix, iy = -1, -1
 rectangles = []  
 
-def is_point_in_rectangle(x, y, rect):
-    x_min, y_min, x_max, y_max = rect
-
-    # 점이 사각형의 범위 안에 있는지 확인
-    if x_min <= x <= x_max and y_min <= y <= y_max:
-        return True
-    else:
-        return False
-
 # 마우스 이벤트 콜백 함수
 def draw_rectangle(event, x, y, flags, param):
     global ix, iy, drawing, rectangles
@@ -46,15 +45,15 @@ def draw_rectangle(event, x, y, flags, param):
         # 사각형에 해당하는 이미지를 잘라내어 리스트에 추가
 
 
-url = ''
+url = ''  # RTSP URL (로컬 영상 파일 경로도 가능)
 
 #cv2.namedWindow('zone mode')
 #cv2.setMouseCallback('zone mode', draw_rectangle)
 
-# you can specify the revision tag if you don't want the timm dependency
-while True:
-    try:
-        if save_mode == True:
+# 영상에서 주차 칸(사각형)을 그려서 grid.txt 로 저장하는 모드
+if save_mode == True:
+    while True:
+        try:
             cap = cv2.VideoCapture(url)
             ret,img = cap.read()
             #cv2.imshow('zone mode', img)
@@ -64,73 +63,94 @@ while True:
                 f.write(str(rectangles)) 
                 f.close()    
             cv2.waitKey(5)
+        except Exception as e:
+            print('error occur : ', e)
+    
+# 탐지 모드 - grid.txt 와 모델은 한 번만 읽고, 프레임/전송 오류는 그 프레임만 건너뜀
+f = open('grid.txt','r')
+data = f.read()
+data = ast.literal_eval(data)
+print(len(data))
+f.close()
+zones = ZoneIndex(data)  # 칸 사각형을 NumPy 배열로 한 번만 올려 두고 프레임마다 박스 전체를 한 번에 배정
 
-        elif save_mode == False:
-            f = open('grid.txt','r')
-            data = f.read()
-            data = ast.literal_eval(data)
-            print(len(data))
-            f.close()
-            processor = DetrImageProcessor.from_pretrained("facebook/detr-resnet-101", revision="no_timm")
-            model = DetrForObjectDetection.from_pretrained("facebook/detr-resnet-101", revision="no_timm")
-            model.to(device)
-            cap = cv2.VideoCapture(url)
-            color = (255, 0, 0)  # 파란색
-            thickness = 2  # 두께
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 0.7
-            font_color = (255, 255, 255)  # 흰색
-            font_thickness = 2
-            label_set = ['person','car']
-            mirrorlakeURL = 'h'
-            headers = {'Content-type': 'application/json', 'Accept':'text/json'}
-            if cap.isOpened():
-                while True:
-                    cap = cv2.VideoCapture(url)
-                    ret,img = cap.read()
-                    #print('hihihi',img.shape)
-                    if ret:
-                        
-                        inputs = processor(images=img, return_tensors="pt").to(device)
-                        
-                        outputs = model(**inputs)
-                        
-                        target_sizes = torch.tensor([img.shape[:2]])
-                        results = processor.post_process_object_detection(outputs, target_sizes=target_sizes, threshold=0.3)[0]
-                        send = {}
-                        n=0
-                        for score, label, box in zip(results["scores"], results["labels"], results["boxes"]):
-                            tmp_label = model.config.id2label[label.item()]
-                            if tmp_label in label_set:
-                                n+=1
-                                box = [round(i, 2) for i in box.tolist()]
-                                start_point1 = (int(box[0]),int(box[1]))  # 왼쪽 위 좌표 (x, y)
-                                end_point1 = (int(box[2]),int(box[3]))
-                                mid_point = ((box[0]+box[2])/2,(box[1]+box[3])/2)
-                                index = 9999
-                                for ind,rec in enumerate(data):
-                                    box_in = is_point_in_rectangle(mid_point[0],mid_point[1],rec)
-                                    if box_in == True:
-                                        cv2.rectangle(img,(rec[0],rec[1]),(rec[2],rec[3]),(0,255,0),2)
-                                        index=ind
-                                        break
-                                #print('here', start_point1, end_point1)
-                                cv2.rectangle(img, start_point1, end_point1, color, thickness)
-                                label_position1 = (start_point1[0], start_point1[1] - 10)
-                                cv2.putText(img, str(model.config.id2label[label.item()]), label_position1, font, font_scale, font_color, font_thickness, cv2.LINE_AA)
-                                print(
-                                        f"Detected {model.config.id2label[label.item()]} with confidence "
-                                        f"{round(score.item(), 3)} at location {box}"
-                                )
-                                tmp_input = {'box_data':box,'label_data':tmp_label,'score':round(score.item(), 3),'mid_point':mid_point,'grid_index':index}
-                                send['object'+str(n)]=tmp_input
-                        payload = json.dumps({'data':send})
-                        response = requests.request("post", mirrorlakeURL, headers=headers, data=payload)
-                        print("POST request status code:", response.status_code)
-                        print("POST request text:", response.text)
-                        print('\n')
-                        #response = requests.post(mirrorlakeURL, headers=headers, data=payload)
-                        cv2.imshow('video', img)
-                        cv2.waitKey(5)
+label_set = ['person','car']
+# you can specify the revision tag if you don't want the timm dependency (detector.py 에서 revision="no_timm")
+detector = DetrDetector(device=device, threshold=0.3, labels=label_set)
+print('detector ready :', detector.stats())  # 모델 로드 시간, warmup(첫 추론) 시간
+
+# 스트림은 한 번만 열어 두고 백그라운드 스레드에서 최신 프레임을 계속 받아 둠 (끊기면 알아서 재연결)
+source = FrameSource(url).start()
+gate = MotionGate(zones=data, refresh_interval=10.0)  # 10초마다는 변화가 없어도 추론
+detections = []
+
+color = (255, 0, 0)  # 파란색
+thickness = 2  # 두께
+font = cv2.FONT_HERSHEY_SIMPLEX
+font_scale = 0.7
+font_color = (255, 255, 255)  # 흰색
+font_thickness = 2
+mirrorlakeURL = 'h'
+headers = {'Content-type': 'application/json', 'Accept':'text/json'}
+stats_time = time.time()
+while True:
+    try:
+        seq, img = source.read(timeout=10)  # 지난번 이후 새 프레임 (추론 중에 지나간 프레임은 버려짐)
+        if time.time() - stats_time > 30:
+            print('frame source :', source.stats())
+            print('detector :', detector.stats())
+            print('motion gate :', gate.stats())  # skip_ratio = 추론을 건너뛴 프레임 비율
+            stats_time = time.time()
+        if img is None:
+            print('프레임 대기 중 :', source.stats())
+            continue
+        img = img.copy()  # 그리기용 (소스의 최신 프레임은 건드리지 않음)
+        next_due = time.time() + 1.0 / process_fps
+
+        send = {}
+        n=0
+        # 변화가 없는 프레임은 직전 탐지 결과를 그대로 그리고 전송 (서버 쪽 점유 판정은 프레임마다 계속 받음)
+        if not motion_gate or gate.check(img)[0]:
+            detections = detector.detect(img)
+        boxes = [det['box'] for det in detections]
+        if zone_assign == 'iou':
+            indexes = zones.assign_iou(boxes, min_iou=zone_min_iou)
+        else:
+            indexes = zones.assign_boxes(boxes)
+        for det, index in zip(detections, indexes.tolist()):
+            tmp_label = det['label']
+            box = det['box']
+            n+=1
+            start_point1 = (int(box[0]),int(box[1]))  # 왼쪽 위 좌표 (x, y)
+            end_point1 = (int(box[2]),int(box[3]))
+            mid_point = ((box[0]+box[2])/2,(box[1]+box[3])/2)
+            if index != 9999:
+                rec = data[index]
+                cv2.rectangle(img,(rec[0],rec[1]),(rec[2],rec[3]),(0,255,0),2)
+            #print('here', start_point1, end_point1)
+            cv2.rectangle(img, start_point1, end_point1, color, thickness)
+            label_position1 = (start_point1[0], start_point1[1] - 10)
+            cv2.putText(img, str(tmp_label), label_position1, font, font_scale, font_color, font_thickness, cv2.LINE_AA)
+            print(
+                    f"Detected {tmp_label} with confidence "
+                    f"{det['score']} at location {box}"
+            )
+            tmp_input = {'box_data':box,'label_data':tmp_label,'score':det['score'],'mid_point':mid_point,'grid_index':index}
+            send['object'+str(n)]=tmp_input
+        cv2.imshow('video', img)
+        cv2.waitKey(5)
+        payload = json.dumps({'data':send})
+        try:
+            response = requests.request("post", mirrorlakeURL, headers=headers, data=payload, timeout=5)
+            print("POST request status code:", response.status_code)
+            print("POST request text:", response.text)
+        except requests.RequestException as e:
+            # 서버가 잠시 안 돼도 스트림/모델은 그대로 두고 다음 프레임 진행
+            print('POST error : ', e)
+        print('\n')
+        #response = requests.post(mirrorlakeURL, headers=headers, data=payload)
+        if time.time() < next_due:
+            time.sleep(next_due - time.time())
     except Exception as e:    # 모든 예외의 에러 메시지를 출력할 때는 Exception을 사용
         print('error occur : ', e)
+        time.sleep(1)
@@ -0,0 +1,163 @@
+#rtsp_multi_detection.py
+# 카메라 N 대를 프로세스 하나, DETR 모델 하나로 처리하는 다중 스트림 모드
+#
+# - 카메라마다 FrameSource 가 최신 프레임을 받아 두고, 새 프레임이 있는 카메라들을 모아 한 batch 로 추론
+#   (카메라마다 프로세스를 띄우면 DETR-ResNet-101 이 카메라 수만큼 메모리에 올라가고 batch 1 추론만 함)
+# - post_process_object_detection 결과를 카메라별로 나눠서 각자의 grid 로 주차 칸 번호를 붙이고
+#   서버의 POST /rtsp-detections/rtsp-object 로 카메라(sensor_id) 별로 전송
+# - 카메라별 MotionGate 로 칸 영역에 변화가 없는 프레임은 batch 에서 빼고 직전 결과를 다시 전송
+#   (추론을 건너뛰어도 전송이 grab 속도로 늘지 않도록 카메라별 처리 간격은 --fps 로 제한)
+# - 30초마다 카메라별 grab FPS / dropped / skip_ratio, 전체 처리 frames/sec, 평균 batch 크기 출력
+#
+# 사용 예:
+#   python rtsp_multi_detection.py --url rtsp://cam1/... --url rtsp://cam2/... \
+#       --name rtsp-car-1 --name rtsp-car-2 --grid grid1.txt --grid grid2.txt --server http://localhost:8000
+#   python rtsp_multi_detection.py --url a.mp4 --url b.mp4 --no-post     # 카메라 없이 로컬 영상으로
+
+import argparse
+import ast
+import json
+import time
+
+import requests
+
+from frame_source import FrameSource
+from detector import DetrDetector
+from motion_gate import MotionGate
+from zone_index import ZoneIndex
+
+LABEL_SET = ['person', 'car']
+
+def load_grid(path):
+    with open(path, 'r') as f:
+        return ast.literal_eval(f.read())
+
+def to_objects(detections, zones, assign='center', min_iou=0.1):
+    # 탐지 목록 → 서버 ObjectFrameIn 의 data ({"object1": {...}, ...})
+    # 칸 번호는 ZoneIndex 로 프레임의 박스 전체를 한 번에 배정 (rtsp_detection.py 와 같은 규칙, 없으면 9999)
+    boxes = [det['box'] for det in detections]
+    if assign == 'iou':
+        indexes = zones.assign_iou(boxes, min_iou=min_iou)
+    else:
+        indexes = zones.assign_boxes(boxes)
+    send = {}
+    for n, (det, index) in enumerate(zip(detections, indexes.tolist()), start=1):
+        box = det['box']
+        mid_point = ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+        send['object' + str(n)] = {
+            'box_data': box,
+            'label_data': det['label'],
+            'score': det['score'],
+            'mid_point': mid_point,
+            'grid_index': index,
+        }
+    return send
+
+def collect_frames(sources, max_batch, wait, next_due=None):
+    # 새 프레임이 있는 카메라의 (index, frame) 목록 - 하나도 없으면 wait 초까지 기다려 봄
+    # next_due[i] 보다 이르면 그 카메라는 건너뜀 (카메라별 처리 간격)
+    deadline = time.monotonic() + wait
+    while True:
+        batch = []
+        now = time.monotonic()
+        for i, source in enumerate(sources):
+            if next_due is not None and now < next_due[i]:
+                continue
+            seq, img = source.read(timeout=0)
+            if img is not None:
+                batch.append((i, img))
+                if len(batch) >= max_batch:
+                    break
+        if batch or time.monotonic() >= deadline:
+            return batch
+        time.sleep(0.005)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--url', action='append', required=True, help='RTSP URL 또는 영상 파일 (카메라 수만큼 반복)')
+    parser.add_argument('--name', action='append', help='카메라별 sensor_id (기본 rtsp-car-<번호>)')
+    parser.add_argument('--grid', action='append', help='카메라별 grid 파일 (하나만 주면 모두 같은 파일)')
+    parser.add_argument('--server', default='http://localhost:8000')
+    parser.add_argument('--max-batch', type=int, default=8, help='한 번에 추론할 최대 프레임 수')
+    parser.add_argument('--threshold', type=float, default=0.3)
+    parser.add_argument('--no-post', action='store_true', help='서버로 보내지 않고 추론만')
+    parser.add_argument('--zone-assign', choices=['center', 'iou'], default='center',
+                        help='칸 배정 방식 - center: 박스 중심점이 들어가는 칸, iou: 가장 많이 겹치는 칸')
+    parser.add_argument('--zone-min-iou', type=float, default=0.1, help='iou 방식에서 이보다 덜 겹치면 칸 없음(9999)')
+    parser.add_argument('--fps', type=float, default=2.0, help='카메라별 최대 처리(전송) 횟수/초, 0 이면 제한 없음')
+    parser.add_argument('--no-motion-gate', action='store_true', help='변화가 없어도 모든 프레임 추론')
+    parser.add_argument('--motion-threshold', type=float, default=0.01, help='칸 영역에서 바뀐 픽셀 비율이 이 이상이면 추론')
+    parser.add_argument('--refresh-interval', type=float, default=10.0, help='변화가 없어도 이 간격(초)마다 추론')
+    args = parser.parse_args()
+
+    names = args.name or [f'rtsp-car-{i + 1}' for i in range(len(args.url))]
+    grid_paths = args.grid or ['grid.txt']
+    if len(grid_paths) == 1:
+        grid_paths = grid_paths * len(args.url)
+    if len(names) != len(args.url) or len(grid_paths) != len(args.url):
+        parser.error('--name / --grid 는 --url 과 개수가 같아야 합니다')
+    grids = [load_grid(p) for p in grid_paths]
+    zones = [ZoneIndex(grid) for grid in grids]
+
+    detector = DetrDetector(threshold=args.threshold, labels=LABEL_SET)
+    print('detector ready :', detector.stats())
+    sources = [FrameSource(url, name=name).start() for url, name in zip(args.url, names)]
+    gates = [MotionGate(zones=grid, min_changed=args.motion_threshold, refresh_interval=args.refresh_interval)
+             for grid in grids]
+    last_detections = [[] for _ in sources]
+    next_due = [0.0 for _ in sources]
+    interval = 1.0 / args.fps if args.fps > 0 else 0.0
+
+    post_url = args.server.rstrip('/') + '/rtsp-detections/rtsp-object'
+    headers = {'Content-type': 'application/json', 'Accept': 'text/json'}
+    session = requests.Session()
+
+    batches = 0
+    batch_frames = 0
+    window_start = time.time()
+    try:
+        while True:
+            try:
+                batch = collect_frames(sources, args.max_batch, wait=1.0, next_due=next_due)
+                if not batch:
+                    continue
+                now = time.monotonic()
+                for i, _ in batch:
+                    next_due[i] = now + interval
+                run = [(i, img) for i, img in batch if args.no_motion_gate or gates[i].check(img)[0]]
+                if run:
+                    for (i, _), detections in zip(run, detector.detect_batch([img for _, img in run])):
+                        last_detections[i] = detections
+                    batches += 1
+                    batch_frames += len(run)
+                for i, _ in batch:
+                    detections = last_detections[i]
+                    if args.no_post:
+                        continue
+                    payload = json.dumps({'sensor_id': names[i], 'data': to_objects(detections, zones[i], args.zone_assign, args.zone_min_iou)})
+                    try:
+                        response = session.post(post_url, headers=headers, data=payload, timeout=5)
+                        if response.status_code >= 300:
+                            print(f'[{names[i]}] POST {response.status_code} : {response.text}')
+                    except requests.RequestException as e:
+                        print(f'[{names[i]}] POST error : {e}')
+            except Exception as e:
+                print('error occur : ', e)
+                time.sleep(1)
+
+            elapsed = time.time() - window_start
+            if elapsed >= 30:
+                print(f'aggregate {batch_frames / elapsed:.2f} inferred frames/s, '
+                      f'avg batch {batch_frames / max(batches, 1):.2f}, detector {detector.stats()}')
+                for source, gate in zip(sources, gates):
+                    print('  ', source.stats(), 'motion gate :', gate.stats())
+                batches = batch_frames = 0
+                window_start = time.time()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for source in sources:
+            source.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# test_zone_index.py
+# ZoneIndex - 기존 is_point_in_rectangle 루프와 같은 결과인지, 경계 / 겹치는 칸 / 빈 입력 / IoU 배정
+#
+#   cd rtsp_dectection && python -m pytest -q
+
+import numpy as np
+import pytest
+
+from bench_zone_index import assign_loop, is_point_in_rectangle, make_boxes, make_zones
+from zone_index import NO_ZONE, ZoneIndex
+
+RECTS = [(0, 0, 10, 10), (5, 5, 20, 20), (30, 30, 40, 40)]
+
+def mid(box):
+    return ((box[0] + box[2]) / 2, (box[1] + box[3]) / 2)
+
+def test_assign_matches_loop_on_random_boxes():
+    rng = np.random.default_rng(0)
+    rects = make_zones(60, 640, 480) + [(100, 100, 300, 300)]  # 마지막 칸은 다른 칸들과 겹침
+    boxes = make_boxes(300, 640, 480, rng)
+    zones = ZoneIndex(rects)
+    assert zones.assign_boxes(boxes).tolist() == assign_loop([mid(b) for b in boxes], rects)
+
+def test_containing_matches_per_zone_loop():
+    rng = np.random.default_rng(1)
+    rects = make_zones(40, 640, 480) + [(100, 100, 300, 300)]
+    boxes = make_boxes(200, 640, 480, rng)
+    expected = [[i for i, r in enumerate(rects) if is_point_in_rectangle(*mid(b), r)] for b in boxes]
+    assert ZoneIndex(rects).containing_boxes(boxes) == expected
+    assert any(len(e) > 1 for e in expected)
+
+def test_boundary_is_inside_and_overlap_picks_first():
+    zones = ZoneIndex(RECTS)
+    assert zones.assign([(10, 10), (0, 0), (20, 20), (25, 25)]).tolist() == [0, 0, 1, NO_ZONE]
+    assert zones.containing([(7, 7), (25, 25)]) == [[0, 1], []]
+
+@pytest.mark.parametrize("rects", [[], RECTS])
+def test_empty_inputs(rects):
+    zones = ZoneIndex(rects)
+    assert zones.assign([]).tolist() == []
+    assert zones.assign_iou([]).tolist() == []
+    assert zones.containing_boxes([]) == []
+    assert zones.assign([(1, 1)]).tolist() == ([NO_ZONE] if not rects else [0])
+
+def test_assign_iou_best_overlap_and_min_iou():
+    zones = ZoneIndex([(0, 0, 10, 10), (12, 0, 22, 10)])
+    # 중심점(x=11.5)은 칸 사이 틈에 있지만 1번 칸과 더 많이 겹침
+    box = [3, 0, 20, 10]
+    assert zones.assign_boxes([box]).tolist() == [NO_ZONE]
+    assert zones.assign_iou([box]).tolist() == [1]
+    assert zones.iou([box])[0].tolist() == pytest.approx([70 / 200, 80 / 190])
+    assert zones.assign_iou([[9, 9, 30, 30]], min_iou=0.5).tolist() == [NO_ZONE]
+
+def test_inverted_rect_has_zero_area():
+    zones = ZoneIndex([(10, 10, 0, 0)])
+    assert zones.assign([(5, 5)]).tolist() == [NO_ZONE]
+    assert zones.iou([[0, 0, 10, 10]]).tolist() == [[0.0]]
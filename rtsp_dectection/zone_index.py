@@ -0,0 +1,86 @@
+#zone_index.py
+# grid.txt 의 주차 칸(사각형)을 NumPy 배열로 한 번만 올려 두고, 한 프레임의 탐지 박스 전체를 한 번에 칸에 배정하는 인덱스
+#
+# - 기존: 박스마다 모든 칸에 is_point_in_rectangle 을 파이썬 루프로 호출 (박스 수 x 칸 수)
+# - assign(points)   : 중심점 N 개 x 칸 Z 개 포함 여부를 broadcasting 으로 한 번에 계산 → 들어가는 첫 번째 칸 번호
+#                      (is_point_in_rectangle 루프와 같은 규칙: 경계 포함, 여러 칸이면 앞 번호, 없으면 NO_ZONE)
+# - containing(points): 들어가는 칸 번호 전부 (칸이 겹치면 여러 개, 없으면 빈 리스트) - 칸마다 따로 처리하는 루프용
+# - assign_iou(boxes): 박스와 칸의 IoU 행렬로 가장 많이 겹치는 칸 번호 (min_iou 미만이면 NO_ZONE)
+#                      중심점이 칸 경계에 걸치거나 카메라 각도 때문에 옆 칸으로 넘어가는 경우용
+#
+# 사용 예:
+#   zones = ZoneIndex(data)                         # data: grid.txt 의 [(x1, y1, x2, y2), ...]
+#   indexes = zones.assign(mid_points)              # [(x, y), ...] → array([3, 9999, 0, ...])
+#   indexes = zones.assign_iou(boxes, min_iou=0.1)  # [[x1, y1, x2, y2], ...]
+#
+#   python bench_zone_index.py      # 기존 루프와 결과 비교 + 속도 비교
+
+import numpy as np
+
+NO_ZONE = 9999  # 어느 칸에도 들어가지 않을 때 (서버/기존 코드와 같은 값)
+
+class ZoneIndex:
+    def __init__(self, rects):
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        self.rects = rects
+        # (1, Z) 모양으로 들고 있다가 점/박스 (N, 1) 과 broadcasting
+        self.x_min = rects[:, 0][None, :]
+        self.y_min = rects[:, 1][None, :]
+        self.x_max = rects[:, 2][None, :]
+        self.y_max = rects[:, 3][None, :]
+        # IoU 용 면적 (그린 방향이 반대인 사각형은 포함 판정처럼 넓이 0 으로 봄)
+        self.areas = (np.clip(rects[:, 2] - rects[:, 0], 0, None) * np.clip(rects[:, 3] - rects[:, 1], 0, None))[None, :]
+
+    def __len__(self):
+        return len(self.rects)
+
+    def contains(self, points):
+        # (N, Z) bool - 점 i 가 칸 j 안에 있는지 (경계 포함)
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        x = points[:, 0:1]
+        y = points[:, 1:2]
+        return (self.x_min <= x) & (x <= self.x_max) & (self.y_min <= y) & (y <= self.y_max)
+
+    def assign(self, points):
+        # 점마다 들어가는 첫 번째 칸 번호 (N,), 없으면 NO_ZONE
+        inside = self.contains(points)
+        if inside.shape[1] == 0:
+            return np.full(inside.shape[0], NO_ZONE, dtype=np.int64)
+        return np.where(inside.any(axis=1), inside.argmax(axis=1), NO_ZONE)
+
+    def assign_boxes(self, boxes):
+        # 박스 [x1, y1, x2, y2] 의 중심점으로 assign
+        return self.assign(self._mid_points(boxes))
+
+    @staticmethod
+    def _mid_points(boxes):
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        return np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+
+    def containing(self, points):
+        # 점마다 들어가는 칸 번호 전부 [[j, ...], ...] - 칸이 겹치는 grid.txt 에서 칸마다 처리할 때
+        return [np.flatnonzero(row).tolist() for row in self.contains(points)]
+
+    def containing_boxes(self, boxes):
+        # 박스 [x1, y1, x2, y2] 의 중심점으로 containing
+        return self.containing(self._mid_points(boxes))
+
+    def iou(self, boxes):
+        # (N, Z) 박스와 칸의 IoU
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        x1 = np.maximum(boxes[:, 0:1], self.x_min)
+        y1 = np.maximum(boxes[:, 1:2], self.y_min)
+        x2 = np.minimum(boxes[:, 2:3], self.x_max)
+        y2 = np.minimum(boxes[:, 3:4], self.y_max)
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        box_areas = np.clip(boxes[:, 2:3] - boxes[:, 0:1], 0, None) * np.clip(boxes[:, 3:4] - boxes[:, 1:2], 0, None)
+        union = box_areas + self.areas - inter
+        return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+    def assign_iou(self, boxes, min_iou=0.1):
+        # 박스마다 IoU 가 가장 큰 칸 번호 (N,), 최대 IoU 가 min_iou 미만이면 NO_ZONE
+        ious = self.iou(boxes)
+        if ious.shape[1] == 0:
+            return np.full(ious.shape[0], NO_ZONE, dtype=np.int64)
+        best = ious.argmax(axis=1)
+        return np.where(ious[np.arange(len(best)), best] >= min_iou, best, NO_ZONE)
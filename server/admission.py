@@ -0,0 +1,203 @@
+# admission.py
+# 저장 요청 admission control - DB 가 느려지거나 멈췄을 때 요청이 스레드풀/커넥션 풀 대기에 쌓이지 않도록 바로 거절
+#
+# - 라우트 그룹(sensor_ingest / rtsp_ingest / read)별 동시 처리 수 제한 → 넘으면 503 + Retry-After
+# - DB 지연 예산: 저장 요청이 낸 쿼리의 최근 지연(EWMA) 또는 아직 끝나지 않은 쿼리의 경과 시간이 budget 초를 넘으면
+#   저장 그룹 요청을 503 으로 거절 (probe_interval 초마다 한 건은 통과시켜 지연을 다시 잼)
+#   조회/집계/내보내기 같은 느린 읽기 쿼리는 재지 않음 → 대시보드 쿼리 때문에 저장이 거절되지 않음
+# - SSE / WebSocket 스트림과 export 는 연결이 오래 열려 있으므로 그룹에서 제외 (read 슬롯을 계속 잡지 않도록)
+# - 센서별 토큰 버킷 (TokenBuckets) → 넘으면 429 + Retry-After, 일괄 저장은 넘친 항목만 rate_limited
+# 거절은 본문을 읽기 전에 하므로 비용이 거의 없음
+
+import contextvars
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+
+# (그룹, 메서드, 경로 prefix) - 위에서부터 먼저 맞는 그룹
+ROUTE_GROUPS = (
+    ("sensor_ingest", "POST", "/sensor-data/"),
+    ("rtsp_ingest", "POST", "/rtsp-detections/"),
+    ("read", "GET", "/"),
+)
+DB_GROUPS = ("sensor_ingest", "rtsp_ingest")  # DB 지연 예산을 적용할 그룹
+EXEMPT_PATHS = ("/metrics",)  # 과부하 중에도 지표 수집은 되어야 함
+EXEMPT_PREFIXES = ("/stream/",)  # 구독자가 끊을 때까지 열려 있는 SSE / WebSocket
+EXEMPT_SUFFIXES = ("/export",)  # 스트리밍 내보내기 (/sensor-data/{id}/export, /rtsp-detections/{id}/export)
+
+# 지금 처리 중인 요청의 그룹 - 엔진 이벤트에서 저장 요청의 쿼리만 골라 재기 위함
+# (sync 라우트의 스레드풀 실행에도 contextvars 가 복사되어 따라감, write-behind flush 스레드는 직접 설정)
+current_group = contextvars.ContextVar("admission_group", default=None)
+
+def parse_limits(value):
+    # "sensor_ingest=16,rtsp_ingest=8" → {"sensor_ingest": 16, "rtsp_ingest": 8} (0 이면 제한 없음)
+    limits = {}
+    for part in value.split(","):
+        name, _, n = part.partition("=")
+        if name.strip() and n.strip():
+            limits[name.strip()] = int(n)
+    return limits
+
+def retry_after_header(seconds):
+    return str(max(1, min(int(math.ceil(seconds)), 60)))
+
+class TokenBuckets:
+    # 키(센서 id)별 토큰 버킷 - 초당 rate 개씩 차고 최대 burst 개까지 쌓임
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate  # 0 이면 제한 없음
+        self.burst = max(burst, 1)
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key → [토큰, 마지막 갱신 시각]
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def take(self, key, n=1):
+        # 통과면 0, 아니면 토큰이 찰 때까지 기다려야 하는 시간(초)
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= n:
+                bucket[0] -= n
+                return 0.0
+            self.limited += 1
+            return (n - bucket[0]) / self.rate
+
+    def stats(self):
+        return {"rate": self.rate, "burst": self.burst, "keys": len(self._buckets), "limited": self.limited}
+
+class DbLatency:
+    # 엔진 이벤트로 쿼리 지연을 잼 - 멈춘 DB 는 끝나지 않는 쿼리의 경과 시간으로 드러남
+    # groups 그룹 요청(저장) 안에서 실행된 쿼리만 셈 - 백그라운드 작업과 읽기 요청은 제외
+    def __init__(self, alpha=0.2, groups=DB_GROUPS):
+        self.alpha = alpha
+        self.groups = groups
+        self.ewma = 0.0
+        self._inflight = {}  # 연결 id → 시작 시각 (연결 하나는 한 번에 쿼리 하나)
+        self._lock = threading.Lock()
+
+    def instrument(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if current_group.get() in self.groups:
+            self._inflight[id(conn)] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        start = self._inflight.pop(id(conn), None)
+        if start is not None:
+            with self._lock:
+                self.ewma += self.alpha * ((time.perf_counter() - start) - self.ewma)
+
+    def _error(self, exception_context):
+        if exception_context.connection is not None:
+            self._inflight.pop(id(exception_context.connection), None)
+
+    def current(self):
+        now = time.perf_counter()
+        # 다른 스레드가 쿼리를 시작/종료하는 중일 수 있으므로 값만 복사해서 봄
+        oldest = min(list(self._inflight.values()), default=now)
+        return max(self.ewma, now - oldest)
+
+class AdmissionControl:
+    def __init__(self, limits, latency_budget=0.0, probe_interval=1.0):
+        self.limits = limits  # 그룹 → 동시 처리 수 (없거나 0 이면 제한 없음)
+        self.latency_budget = latency_budget  # 초, 0 이면 사용 안 함
+        self.probe_interval = probe_interval
+        self.db_latency = DbLatency()
+        self.inflight = {name: 0 for name, _, _ in ROUTE_GROUPS}
+        self.rejected = {}  # (그룹, 이유) → 횟수
+        self.rejected_counter = None  # server.py 에서 지표 Counter 연결 (group, reason)
+        self._last_probe = 0.0
+
+    def group_for(self, method, path):
+        if path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES) or path.endswith(EXEMPT_SUFFIXES):
+            return None
+        for name, group_method, prefix in ROUTE_GROUPS:
+            if method == group_method and path.startswith(prefix):
+                return name
+        return None
+
+    def record_rejection(self, group, reason, n=1):
+        self.rejected[(group, reason)] = self.rejected.get((group, reason), 0) + n
+        if self.rejected_counter is not None:
+            self.rejected_counter.inc((group, reason), n)
+
+    def _over_budget(self):
+        # 예산 초과면 대기 권장 시간(초), 아니면 None
+        if self.latency_budget <= 0:
+            return None
+        latency = self.db_latency.current()
+        if latency <= self.latency_budget:
+            return None
+        now = time.monotonic()
+        if now - self._last_probe >= self.probe_interval:
+            self._last_probe = now  # 이 요청은 통과시켜 DB 가 회복됐는지 확인
+            return None
+        return latency
+
+    def check(self, group):
+        # 거절이면 (status, 이유, Retry-After 초), 통과면 None
+        limit = self.limits.get(group, 0)
+        if limit and self.inflight[group] >= limit:
+            return 503, "concurrency", 1
+        if group in DB_GROUPS:
+            latency = self._over_budget()
+            if latency is not None:
+                return 503, "db_latency", latency
+        return None
+
+    def middleware(self, app):
+        admission = self
+
+        async def admission_app(scope, receive, send):
+            if scope["type"] != "http":
+                return await app(scope, receive, send)
+            group = admission.group_for(scope["method"], scope["path"])
+            if group is None:
+                return await app(scope, receive, send)
+            rejected = admission.check(group)
+            if rejected is not None:
+                status, reason, retry_after = rejected
+                admission.record_rejection(group, reason)
+                detail = "동시 처리 한도 초과" if reason == "concurrency" else "DB 응답 지연"
+                await send({"type": "http.response.start", "status": status, "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"retry-after", retry_after_header(retry_after).encode()),
+                ]})
+                body = ('{"detail":"%s - 잠시 후 다시 시도하세요","reason":"%s"}' % (detail, reason)).encode()
+                await send({"type": "http.response.body", "body": body})
+                return
+            # 미들웨어는 이벤트 루프 한 곳에서만 돌므로 락 없이 증감
+            admission.inflight[group] += 1
+            token = current_group.set(group)
+            try:
+                await app(scope, receive, send)
+            finally:
+                current_group.reset(token)
+                admission.inflight[group] -= 1
+
+        return admission_app
+
+    def stats(self):
+        return {
+            "limits": self.limits,
+            "inflight": dict(self.inflight),
+            "latency_budget": self.latency_budget,
+            "db_latency": round(self.db_latency.current(), 4),
+            "rejected": {f"{g}:{r}": n for (g, r), n in sorted(self.rejected.items())},
+        }
@@ -0,0 +1,133 @@
+# anomaly.py
+# 센서 측정값이 들어올 때마다 센서별 통계를 갱신하면서 이상값을 바로 찾는 스트리밍 이상 탐지
+#
+# - 값마다 EWMA 평균/분산 (지수 가중 이동 평균, alpha 가 클수록 최근 값 비중이 큼)
+#   갱신 전 평균과의 차이가 z_threshold 표준편차를 넘으면 "zscore" 이상
+# - 직전 값과의 변화율 (분당 변화량) 이 rate_thresholds 를 넘으면 "rate" 이상
+# - 센서당 상태는 값 종류별 (평균, 분산, 직전 값) + 개수/직전 시각뿐이라 측정값 하나당 O(1), DB 재조회 없음
+# - 서버 재시작 시 최근 행을 시간순으로 다시 넣어(restore) 상태를 복원
+# - 유한하지 않은 값(NaN, ±inf)은 통계에 넣지 않음
+
+import math
+import threading
+from datetime import timezone
+
+METRICS = ("temperature", "humidity")
+
+def _epoch(dt):
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+class SensorStats:
+    __slots__ = ("count", "last_at", "mean", "var", "last")
+
+    def __init__(self):
+        self.count = 0
+        self.last_at = None  # 직전 측정 시각 (epoch 초)
+        self.mean = [0.0] * len(METRICS)
+        self.var = [0.0] * len(METRICS)
+        self.last = [0.0] * len(METRICS)
+
+class AnomalyDetector:
+    def __init__(self, alpha=0.05, z_threshold=4.0, warmup=30, rate_thresholds=None, min_std=0.1):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup  # 이 개수만큼 들어오기 전에는 zscore 판정 안 함
+        self.rate_thresholds = rate_thresholds or {}  # metric → 분당 최대 변화량
+        self.min_std = min_std  # 값이 거의 일정한 센서에서 아주 작은 변화로 z 가 폭주하지 않도록
+        self._sensors = {}
+        self._lock = threading.Lock()
+
+        self.processed = 0
+        self.flagged = 0
+
+    def _update(self, st, row, detect):
+        # row: dict (temperature, humidity, created_at) / 반환: 이상 목록
+        events = []
+        at = _epoch(row["created_at"])
+        # 같은 시각(일괄 저장) 또는 더 오래된 값이면 변화율은 계산하지 않음
+        dt = at - st.last_at if st.last_at is not None else 0.0
+        a = self.alpha
+        for i, metric in enumerate(METRICS):
+            x = row[metric]
+            if x is None or not math.isfinite(x):
+                continue  # NaN / ±inf 가 평균에 들어가면 이 센서 통계가 영영 nan 이 되므로 건너뜀
+            if detect and st.count >= self.warmup:
+                std = max(math.sqrt(st.var[i]), self.min_std)
+                z = (x - st.mean[i]) / std
+                if abs(z) >= self.z_threshold:
+                    events.append((metric, "zscore", x, st.mean[i], z))
+            limit = self.rate_thresholds.get(metric)
+            if detect and limit and st.count and dt >= 1.0:
+                rate = (x - st.last[i]) / dt * 60
+                if abs(rate) >= limit:
+                    events.append((metric, "rate", x, st.last[i], rate))
+            if st.count == 0:
+                st.mean[i] = x
+            else:
+                diff = x - st.mean[i]
+                incr = a * diff
+                st.mean[i] += incr
+                st.var[i] = (1 - a) * (st.var[i] + diff * incr)
+            if dt >= 0:
+                st.last[i] = x
+        st.count += 1
+        if dt >= 0:
+            st.last_at = at
+        return events
+
+    def process(self, rows):
+        # rows: 저장할 측정값 dict 목록 (sensor_id, temperature, humidity, created_at)
+        # 반환: 이상 dict 목록 (SensorAnomaly 에 바로 INSERT 가능)
+        anomalies = []
+        with self._lock:
+            for row in sorted(rows, key=lambda r: _epoch(r["created_at"])) if len(rows) > 1 else rows:
+                st = self._sensors.get(row["sensor_id"])
+                if st is None:
+                    st = self._sensors[row["sensor_id"]] = SensorStats()
+                for metric, kind, value, expected, score in self._update(st, row, True):
+                    anomalies.append({
+                        "sensor_id": row["sensor_id"],
+                        "metric": metric,
+                        "kind": kind,
+                        "value": value,
+                        "expected": expected,
+                        "score": round(score, 4),
+                        "created_at": row["created_at"],
+                    })
+            self.processed += len(rows)
+            self.flagged += len(anomalies)
+        return anomalies
+
+    def restore(self, sensor_id, rows):
+        # 재시작 시 최근 행(시간순)으로 상태만 다시 만듦 - 이상 판정은 하지 않음
+        with self._lock:
+            st = self._sensors[sensor_id] = SensorStats()
+            for row in rows:
+                self._update(st, row, False)
+
+    def snapshot(self, sensor_id):
+        with self._lock:
+            st = self._sensors.get(sensor_id)
+            if st is None:
+                return None
+            return {
+                "count": st.count,
+                "warmed_up": st.count >= self.warmup,
+                "metrics": {
+                    metric: {"mean": st.mean[i], "std": math.sqrt(st.var[i]), "last": st.last[i]}
+                    for i, metric in enumerate(METRICS)
+                },
+            }
+
+    def stats(self):
+        return {
+            "sensors": len(self._sensors),
+            "processed": self.processed,
+            "flagged": self.flagged,
+            "alpha": self.alpha,
+            "z_threshold": self.z_threshold,
+            "warmup": self.warmup,
+            "rate_thresholds": self.rate_thresholds,
+        }
@@ -0,0 +1,75 @@
+# bench_async.py
+# 동기 서버(server.py) 와 비동기 서버(server_async.py) 를 동시 읽기/쓰기 부하에서 비교
+#
+# 사용 예:
+#   python bench_async.py --writers 50 --readers 50 --requests 20
+#   DB_URL=postgresql://user:pw@localhost/sensor_db python bench_async.py
+# (비동기 드라이버 필요: PostgreSQL → asyncpg, SQLite → aiosqlite)
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("DB_URL", "sqlite:///./bench_sensor.db")
+os.environ.setdefault("SENSOR_RATE_LIMIT", "0")  # 가상 센서가 실제 보드보다 훨씬 자주 보내므로 센서별 제한은 끔
+# 부하를 일부러 거는 벤치이므로 admission control(동시 처리 수 / DB 지연 예산)도 끔 - 켜면 503 거절만 재게 됨
+os.environ.setdefault("ADMISSION_LIMITS", "")
+os.environ.setdefault("ADMISSION_DB_LATENCY_BUDGET", "0")
+
+import httpx
+import server
+import server_async
+
+async def writer(client, n, latencies):
+    sensor_id = f"tphm-{random.randrange(100):03d}"
+    for _ in range(n):
+        body = {"data": {"temperature": random.uniform(15, 35), "humidity": random.uniform(30, 80)}}
+        start = time.perf_counter()
+        res = await client.post(f"/sensor-data/{sensor_id}", json=body)
+        latencies.append(time.perf_counter() - start)
+        res.raise_for_status()
+
+async def reader(client, n, latencies):
+    sensor_id = f"tphm-{random.randrange(100):03d}"
+    for _ in range(n):
+        start = time.perf_counter()
+        res = await client.get(f"/sensor-data/{sensor_id}/recent", params={"count": 20})
+        latencies.append(time.perf_counter() - start)
+        res.raise_for_status()
+
+def summary(name, latencies, elapsed):
+    ms = sorted(x * 1000 for x in latencies)
+    p95 = ms[int(len(ms) * 0.95) - 1]
+    return (f"  {name:6s} {len(ms) / elapsed:8.0f} req/s   "
+            f"p50 {statistics.median(ms):7.1f}ms   p95 {p95:7.1f}ms   max {ms[-1]:7.1f}ms")
+
+async def run(app, args):
+    write_lat, read_lat = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        tasks = [writer(client, args.requests, write_lat) for _ in range(args.writers)]
+        tasks += [reader(client, args.requests, read_lat) for _ in range(args.readers)]
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return write_lat, read_lat, elapsed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=50)
+    parser.add_argument("--readers", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="클라이언트당 요청 수")
+    args = parser.parse_args()
+
+    print(f"DB_URL: {os.environ['DB_URL']}  (writers={args.writers}, readers={args.readers})")
+    for name, app in (("sync", server.app), ("async", server_async.app)):
+        write_lat, read_lat, elapsed = asyncio.run(run(app, args))
+        print(f"[{name}] 총 {len(write_lat) + len(read_lat)} 요청 / {elapsed:.2f}s")
+        print(summary("write", write_lat, elapsed))
+        print(summary("read", read_lat, elapsed))
+
+if __name__ == "__main__":
+    main()
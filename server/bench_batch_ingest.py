@@ -0,0 +1,104 @@
+# bench_batch_ingest.py
+# POST /sensor-data/{sensor_id} (한 건씩) 과 POST /sensor-data/batch (일괄 JSON / gzip JSON / 일괄 바이너리) 의 rows/sec 비교
+#
+# 사용 예:
+#   python bench_batch_ingest.py                       # 로컬 SQLite 파일로 측정
+#   DB_URL=postgresql://user:pw@localhost/sensor_db python bench_batch_ingest.py --rows 20000
+
+import argparse
+import gzip
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("DB_URL", "sqlite:///./bench_sensor.db")
+os.environ.setdefault("SENSOR_RATE_LIMIT", "0")  # 가상 센서가 실제 보드보다 훨씬 자주 보내므로 센서별 제한은 끔
+# 부하를 일부러 거는 벤치이므로 admission control(동시 처리 수 / DB 지연 예산)도 끔 - 켜면 503 거절만 재게 됨
+os.environ.setdefault("ADMISSION_LIMITS", "")
+os.environ.setdefault("ADMISSION_DB_LATENCY_BUDGET", "0")
+
+from fastapi.testclient import TestClient
+from server import app
+import binary_ingest
+
+def make_reading(n_sensors):
+    return {
+        "sensor_id": f"tphm-{random.randrange(n_sensors):03d}",
+        "data": {
+            "temperature": round(random.uniform(15, 35), 2),
+            "humidity": round(random.uniform(30, 80), 2),
+        },
+    }
+
+def bench_single(client, readings):
+    start = time.perf_counter()
+    for r in readings:
+        res = client.post(f"/sensor-data/{r['sensor_id']}", json={"data": r["data"]})
+        res.raise_for_status()
+    return time.perf_counter() - start
+
+def bench_batch(client, readings, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(readings), batch_size):
+        res = client.post("/sensor-data/batch", json={"readings": readings[i:i + batch_size]})
+        res.raise_for_status()
+    return time.perf_counter() - start
+
+def bench_batch_gzip(client, readings, batch_size):
+    # 게이트웨이가 Content-Encoding: gzip 으로 보내는 경우 (압축 비용은 빼고 서버 해제 + 저장만)
+    bodies = [
+        gzip.compress(json.dumps({"readings": readings[i:i + batch_size]}).encode())
+        for i in range(0, len(readings), batch_size)
+    ]
+    headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    start = time.perf_counter()
+    for body in bodies:
+        res = client.post("/sensor-data/batch", content=body, headers=headers)
+        res.raise_for_status()
+    return time.perf_counter() - start, sum(len(b) for b in bodies)
+
+def bench_batch_struct(client, readings, batch_size):
+    # 보드 쪽 인코딩 비용은 빼고 서버 처리량만 보도록 본문을 미리 만들어 둠
+    bodies = [
+        binary_ingest.encode_struct(
+            (r["sensor_id"], 0, r["data"]["temperature"], r["data"]["humidity"])
+            for r in readings[i:i + batch_size]
+        )
+        for i in range(0, len(readings), batch_size)
+    ]
+    headers = {"Content-Type": binary_ingest.STRUCT_CONTENT_TYPE}
+    start = time.perf_counter()
+    for body in bodies:
+        res = client.post("/sensor-data/batch", content=body, headers=headers)
+        res.raise_for_status()
+    return time.perf_counter() - start, sum(len(b) for b in bodies)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--sensors", type=int, default=300)
+    args = parser.parse_args()
+
+    readings = [make_reading(args.sensors) for _ in range(args.rows)]
+    client = TestClient(app)
+
+    t_single = bench_single(client, readings)
+    t_batch = bench_batch(client, readings, args.batch_size)
+    t_gzip, gzip_bytes = bench_batch_gzip(client, readings, args.batch_size)
+    t_struct, struct_bytes = bench_batch_struct(client, readings, args.batch_size)
+    json_bytes = sum(len(json.dumps({"readings": readings[i:i + args.batch_size]}))
+                     for i in range(0, len(readings), args.batch_size))
+
+    print(f"DB_URL: {os.environ['DB_URL']}")
+    print(f"한 건씩 : {args.rows} rows / {t_single:.2f}s = {args.rows / t_single:,.0f} rows/sec")
+    print(f"일괄({args.batch_size}) : {args.rows} rows / {t_batch:.2f}s = {args.rows / t_batch:,.0f} rows/sec")
+    print(f"일괄 gzip({args.batch_size}) : {args.rows} rows / {t_gzip:.2f}s = {args.rows / t_gzip:,.0f} rows/sec")
+    print(f"일괄 바이너리({args.batch_size}) : {args.rows} rows / {t_struct:.2f}s = {args.rows / t_struct:,.0f} rows/sec")
+    print(f"속도 향상: x{t_single / t_batch:.1f} (바이너리 x{t_single / t_struct:.1f})")
+    print(f"전송량: JSON {json_bytes / args.rows:.1f} B/row, gzip JSON {gzip_bytes / args.rows:.1f} B/row, "
+          f"바이너리 {struct_bytes / args.rows:.1f} B/row")
+
+if __name__ == "__main__":
+    main()
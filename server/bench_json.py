@@ -0,0 +1,110 @@
+# bench_json.py
+# 측정값 목록 응답: 기존 경로(ORM 객체 → response_model=List[SensorDataOut] 검증/직렬화)와
+# fast_json 경로(컬럼 튜플 → orjson, rows / columns)의 처리 시간 비교
+#
+# 사용 예:
+#   python bench_json.py                          # 로컬 SQLite 파일로 측정
+#   python bench_json.py --rows 100000 --repeat 5
+
+import argparse
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+os.environ.setdefault("DB_URL", "sqlite:///./bench_sensor.db")
+
+from fastapi import Depends, Response
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select, func
+from sqlalchemy.orm import Session
+
+from server import (
+    app, get_db, engine, SessionLocal, SensorData, SensorDataOut,
+    apply_keyset, finish_page, sensor_out_stmt, SENSOR_OUT_COLUMNS, PAGE_LIMIT_MAX, BATCH_INSERT_CHUNK,
+)
+import fast_json
+
+SENSOR_ID = "bench-json"
+
+# 비교용 - 변경 전 read_sensor_data 와 같은 방식의 엔드포인트
+@app.get("/bench/legacy/sensor-data/{sensor_id}", response_model=List[SensorDataOut])
+def legacy_read_sensor_data(sensor_id: str, response: Response, limit: int = PAGE_LIMIT_MAX, db: Session = Depends(get_db)):
+    query = db.query(SensorData).filter(SensorData.sensor_id == sensor_id)
+    query = apply_keyset(query, SensorData, None, limit)
+    return finish_page(query.all(), limit, response)
+
+def ensure_rows(n):
+    with SessionLocal() as db:
+        have = db.execute(select(func.count()).where(SensorData.sensor_id == SENSOR_ID)).scalar()
+        start = datetime.utcnow() - timedelta(days=30)
+        rows = [
+            {
+                "sensor_id": SENSOR_ID,
+                "temperature": round(random.uniform(15, 35), 2),
+                "humidity": round(random.uniform(30, 80), 2),
+                "created_at": start + timedelta(seconds=i * 10),
+            }
+            for i in range(have, n)
+        ]
+        for i in range(0, len(rows), BATCH_INSERT_CHUNK):
+            db.execute(insert(SensorData).values(rows[i:i + BATCH_INSERT_CHUNK]))
+        db.commit()
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000, help="직렬화만 비교할 행 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ensure_rows(args.rows)
+    print(f"DB_URL: {os.environ['DB_URL']} / orjson: {'사용' if fast_json.orjson else '없음(표준 json)'}")
+
+    # 1) 조회 + 직렬화 (DB 읽기 포함) - 행 수
+    with SessionLocal() as db:
+        stmt = select(SensorData).where(SensorData.sensor_id == SENSOR_ID).limit(args.rows)
+        fast_stmt = sensor_out_stmt().where(SensorData.sensor_id == SENSOR_ID).limit(args.rows)
+        adapter = TypeAdapter(List[SensorDataOut])
+
+        def legacy():
+            objs = db.execute(stmt).scalars().all()
+            db.expunge_all()
+            return adapter.dump_json(adapter.validate_python(objs, from_attributes=True))
+
+        t_legacy, body_legacy = timed(legacy, args.repeat)
+        t_rows, body_rows = timed(lambda: fast_json.encode_rows(db.execute(fast_stmt).all(), SENSOR_OUT_COLUMNS), args.repeat)
+        t_cols, body_cols = timed(lambda: fast_json.encode_rows(db.execute(fast_stmt).all(), SENSOR_OUT_COLUMNS, "columns"), args.repeat)
+
+    print(f"\n[조회 + 직렬화 {args.rows:,} rows, 중앙값]")
+    print(f"ORM + Pydantic      : {t_legacy:8.1f} ms  {len(body_legacy) / 1024:8.0f} KiB")
+    print(f"튜플 + JSON(rows)   : {t_rows:8.1f} ms  {len(body_rows) / 1024:8.0f} KiB  x{t_legacy / t_rows:.1f}")
+    print(f"튜플 + JSON(columns): {t_cols:8.1f} ms  {len(body_cols) / 1024:8.0f} KiB  x{t_legacy / t_cols:.1f}")
+
+    # 2) 엔드포인트 전체 (페이지 최대 크기)
+    client = TestClient(app)
+    paths = {
+        "기존 엔드포인트": f"/bench/legacy/sensor-data/{SENSOR_ID}?limit={PAGE_LIMIT_MAX}",
+        "rows": f"/sensor-data/{SENSOR_ID}?limit={PAGE_LIMIT_MAX}",
+        "columns": f"/sensor-data/{SENSOR_ID}?limit={PAGE_LIMIT_MAX}&layout=columns",
+    }
+    print(f"\n[GET /sensor-data/{{sensor_id}}?limit={PAGE_LIMIT_MAX}, 중앙값]")
+    base = None
+    for name, path in paths.items():
+        client.get(path).raise_for_status()
+        t, _ = timed(lambda: client.get(path).raise_for_status(), args.repeat * 4)
+        base = base or t
+        print(f"{name:16s}: {t:6.1f} ms  x{base / t:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+# bench_load.py
+# 저장/조회 경로 부하 테스트 - 엔드포인트별 p50/p95/p99 지연과 req/s, rows/s 를 측정하고
+# 이전 결과(--baseline)와 비교해서 느려졌으면 종료 코드 1 (배포 전 회귀 확인용)
+#
+# - 시나리오마다 초당 요청 수(rate)를 정해 두고 일정 간격으로 보냄 (open-loop)
+#   지연은 "보내기로 예정된 시각"부터 재므로, 서버가 밀려서 늦게 보낸 시간도 지연에 포함됨
+# - 동시에 처리 중인 요청은 --concurrency 로 제한
+# - 대상: inprocess (httpx ASGITransport, 서버 없이 바로), spawn (uvicorn 을 띄워서 실제 HTTP), http://... (이미 떠 있는 서버)
+#
+# 사용 예:
+#   python bench_load.py --duration 20
+#   python bench_load.py --target spawn --app server_async:app --workers 2 --mix tphm_batch=20,read_recent=200
+#   DB_URL=postgresql://user:pw@localhost/sensor_bench python bench_load.py --target spawn --json result.json
+#   python bench_load.py --baseline result.json --tolerance 0.2
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("DB_URL", "sqlite:///./bench_sensor.db")
+os.environ.setdefault("SENSOR_RATE_LIMIT", "0")  # 가상 센서/카메라가 실제보다 훨씬 자주 보내므로 센서별 제한은 끔
+os.environ.setdefault("CAMERA_RATE_LIMIT", "0")
+# 부하를 일부러 거는 벤치이므로 admission control(동시 처리 수 / DB 지연 예산)도 끔 - 켜면 503 거절만 재게 됨
+os.environ.setdefault("ADMISSION_LIMITS", "")
+os.environ.setdefault("ADMISSION_DB_LATENCY_BUDGET", "0")
+
+import httpx
+
+LABELS = ["car", "truck", "bus", "person", "motorcycle"]
+
+def tphm_reading(args):
+    return {
+        "sensor_id": f"tphm-{random.randrange(args.sensors):03d}",
+        "data": {"temperature": round(random.uniform(15, 35), 2), "humidity": round(random.uniform(30, 80), 2)},
+    }
+
+def rtsp_sensor(args):
+    return f"rtsp-{random.randrange(args.cameras):02d}"
+
+# 시나리오: (method, path, body, 이번 요청으로 저장되는 행 수 / 조회는 최대 행 수) 를 돌려줌
+def req_tphm_single(args):
+    r = tphm_reading(args)
+    return "POST", f"/sensor-data/{r['sensor_id']}", {"data": r["data"]}, 1
+
+def req_tphm_batch(args):
+    return "POST", "/sensor-data/batch", {"readings": [tphm_reading(args) for _ in range(args.batch_size)]}, args.batch_size
+
+def req_rtsp_detections(args):
+    detections = []
+    for _ in range(args.objects):
+        x, y = random.randrange(1800), random.randrange(1000)
+        detections.append({"label": random.choice(LABELS), "confidence": round(random.uniform(0.5, 1), 3),
+                           "bbox": [x, y, x + random.randrange(40, 120), y + random.randrange(40, 80)]})
+    return "POST", "/rtsp-detections/", {"sensor_id": rtsp_sensor(args), "detections": detections}, args.objects
+
+def req_rtsp_object(args):
+    objects = {}
+    for i in range(args.objects):
+        x, y = random.uniform(0, 1800), random.uniform(0, 1000)
+        objects[f"object{i + 1}"] = {
+            "box_data": [x, y, x + 80, y + 60], "label_data": random.choice(LABELS), "score": round(random.uniform(0.5, 1), 3),
+            "mid_point": [x + 40, y + 30], "grid_index": random.choice([random.randrange(20), 9999]),
+        }
+    return "POST", "/rtsp-detections/rtsp-object", {"sensor_id": rtsp_sensor(args), "data": objects}, args.objects
+
+def req_read_recent(args):
+    return "GET", f"/sensor-data/tphm-{random.randrange(args.sensors):03d}/recent?count=20", None, 20
+
+def req_read_page(args):
+    return "GET", f"/sensor-data/tphm-{random.randrange(args.sensors):03d}?limit=100", None, 100
+
+def req_read_range(args):
+    end = datetime.utcnow()
+    start = end - timedelta(hours=1)
+    path = (f"/sensor-data/tphm-{random.randrange(args.sensors):03d}/range"
+            f"?start_time={start:%Y-%m-%dT%H:%M:%S}&end_time={end:%Y-%m-%dT%H:%M:%S}&limit=500")
+    return "GET", path, None, 500
+
+def req_read_rtsp(args):
+    return "GET", f"/rtsp-detections/{rtsp_sensor(args)}?count=20", None, 20
+
+SCENARIOS = {
+    "tphm_single": req_tphm_single,
+    "tphm_batch": req_tphm_batch,
+    "rtsp_detections": req_rtsp_detections,
+    "rtsp_object": req_rtsp_object,
+    "read_recent": req_read_recent,
+    "read_page": req_read_page,
+    "read_range": req_read_range,
+    "read_rtsp": req_read_rtsp,
+}
+DEFAULT_MIX = "tphm_single=100,tphm_batch=5,rtsp_detections=30,rtsp_object=10,read_recent=100,read_page=20,read_range=5,read_rtsp=20"
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.rows = 0
+        self.errors = 0
+        self.statuses = {}
+
+    def add(self, latency, status, rows):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if 200 <= status < 300:
+            self.rows += rows
+        else:
+            self.errors += 1
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+def summarize(stats, elapsed):
+    ms = sorted(x * 1000 for x in stats.latencies)
+    return {
+        "requests": len(ms),
+        "errors": stats.errors,
+        "statuses": {str(k): v for k, v in sorted(stats.statuses.items())},
+        "req_per_sec": round(len(ms) / elapsed, 1),
+        "rows_per_sec": round(stats.rows / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(ms[-1], 2) if ms else 0.0,
+    }
+
+async def send(client, name, make, args, sem, scheduled, stats):
+    method, path, body, rows = make(args)
+    try:
+        async with sem:
+            res = await client.request(method, path, json=body)
+        status = res.status_code
+        if method == "GET" and status == 200:
+            # 조회는 실제로 돌려받은 행 수로 계산
+            data = res.json()
+            rows = len(data) if isinstance(data, list) else rows
+    except httpx.HTTPError:
+        status = 599
+    stats[name].add(time.perf_counter() - scheduled, status, rows)
+
+async def drive(client, name, rate, args, sem, stats, deadline):
+    # rate req/s 로 예정 시각을 잡고, 예정 시각이 되면 요청을 띄움 (응답을 기다리지 않음)
+    make = SCENARIOS[name]
+    interval = 1.0 / rate
+    next_at = time.perf_counter() + random.uniform(0, interval)
+    tasks = set()
+    while next_at < deadline:
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        task = asyncio.create_task(send(client, name, make, args, sem, next_at, stats))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        next_at += interval
+    if tasks:
+        await asyncio.gather(*tasks)
+
+async def seed(client, args):
+    # 조회 시나리오가 빈 결과만 읽지 않도록 센서마다 몇 건씩 미리 저장
+    for i in range(0, args.sensors, 50):
+        readings = [
+            {"sensor_id": f"tphm-{s:03d}", "data": {"temperature": 20.0, "humidity": 50.0}}
+            for s in range(i, min(i + 50, args.sensors)) for _ in range(5)
+        ]
+        (await client.post("/sensor-data/batch", json={"readings": readings})).raise_for_status()
+
+async def run(client, mix, args):
+    stats = {name: Stats() for name in mix}
+    sem = asyncio.Semaphore(args.concurrency)
+    await seed(client, args)
+    if args.warmup > 0:
+        warm_deadline = time.perf_counter() + args.warmup
+        warm_stats = {name: Stats() for name in mix}
+        await asyncio.gather(*(drive(client, n, r, args, sem, warm_stats, warm_deadline) for n, r in mix.items()))
+    start = time.perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(drive(client, n, r, args, sem, stats, deadline) for n, r in mix.items()))
+    elapsed = time.perf_counter() - start
+    return {name: summarize(s, elapsed) for name, s in stats.items()}, elapsed
+
+async def run_inprocess(mix, args):
+    module_name, app_name = args.app.split(":")
+    app = getattr(__import__(module_name), app_name)
+    # ASGITransport 는 lifespan 을 실행하지 않으므로 startup/shutdown(버퍼 스레드 등)을 직접 실행
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            return await run(client, mix, args)
+
+async def run_http(base_url, mix, args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        return await run(client, mix, args)
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def spawn_server(args):
+    port = free_port()
+    cmd = [sys.executable, "-m", "uvicorn", args.app, "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(args.workers), "--log-level", "warning"]
+    proc = subprocess.Popen(cmd, cwd=os.path.dirname(os.path.abspath(__file__)), env=os.environ.copy())
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        if proc.poll() is not None:
+            sys.exit(f"서버 실행 실패: {' '.join(cmd)}")
+        try:
+            httpx.get(base_url + "/stream/stats", timeout=1.0)
+            return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    proc.terminate()
+    sys.exit("서버가 20초 안에 응답하지 않습니다")
+
+def compare(result, baseline, tolerance):
+    # p95 가 (1 + tolerance) 배 넘게 늘었거나 rows/s 가 (1 - tolerance) 배 아래로 떨어진 시나리오
+    regressions = []
+    for name, cur in result.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if old["p95_ms"] > 0 and cur["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['p95_ms']}ms → {cur['p95_ms']}ms")
+        if old["rows_per_sec"] > 0 and cur["rows_per_sec"] < old["rows_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: rows/s {old['rows_per_sec']} → {cur['rows_per_sec']}")
+        if cur["errors"] > old["errors"] + tolerance * max(cur["requests"], 1):
+            regressions.append(f"{name}: errors {old['errors']} → {cur['errors']}")
+    return regressions
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, rate = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            sys.exit(f"알 수 없는 시나리오: {name} (가능: {', '.join(SCENARIOS)})")
+        if float(rate) > 0:
+            mix[name] = float(rate)
+    return mix
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", default="inprocess", help="inprocess | spawn | http://host:port")
+    parser.add_argument("--app", default="server:app", help="inprocess / spawn 에서 띄울 앱 (server_async:app 등)")
+    parser.add_argument("--workers", type=int, default=1, help="spawn 일 때 uvicorn 워커 수")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="시나리오=초당 요청 수, 쉼표로 구분")
+    parser.add_argument("--duration", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--sensors", type=int, default=200)
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--objects", type=int, default=8, help="프레임당 탐지 객체 수")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON 파일")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    mix = parse_mix(args.mix)
+
+    proc = None
+    if args.target == "inprocess":
+        result, elapsed = asyncio.run(run_inprocess(mix, args))
+    else:
+        base_url = args.target
+        if args.target == "spawn":
+            proc, base_url = spawn_server(args)
+        try:
+            result, elapsed = asyncio.run(run_http(base_url, mix, args))
+        finally:
+            if proc is not None:
+                proc.terminate()
+                proc.wait(10)
+
+    print(f"DB_URL: {os.environ['DB_URL']}  target={args.target}  app={args.app}  "
+          f"duration={elapsed:.1f}s  concurrency={args.concurrency}")
+    print(f"{'scenario':16s} {'rate':>6s} {'req/s':>8s} {'rows/s':>9s} {'p50':>8s} {'p95':>8s} {'p99':>8s} {'max':>8s}  errors")
+    for name, r in result.items():
+        print(f"{name:16s} {mix[name]:6.0f} {r['req_per_sec']:8.1f} {r['rows_per_sec']:9.1f} "
+              f"{r['p50_ms']:7.1f}ms {r['p95_ms']:7.1f}ms {r['p99_ms']:7.1f}ms {r['max_ms']:7.1f}ms  "
+              f"{r['errors']} {r['statuses'] if r['errors'] else ''}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": vars(args), "result": result}, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["result"]
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print("\n회귀 발견:")
+            for line in regressions:
+                print("  " + line)
+            sys.exit(1)
+        print(f"\n기준 결과 대비 회귀 없음 (허용 {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# bench_partitions.py
+# sensor_data 파티션 테이블에서 범위 조회가 해당 기간 파티션만 읽는지(partition pruning) 확인하고,
+# 보관 기간 정리가 DELETE 없이 파티션 DROP 으로 끝나는지,
+# DEFAULT 파티션에 들어가 있던 행이 나중에 그 기간 파티션을 만들 때 옮겨지는지 보여주는 로컬 PostgreSQL 확인 스크립트
+#
+# 사용 예 (빈 테스트 DB 에서 실행 - sensor_data 에 행이 있으면 중단):
+#   createdb sensor_partition_test
+#   DB_URL=postgresql://user:pw@localhost/sensor_partition_test python bench_partitions.py --days 14 --rows-per-day 20000
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("PARTITION_INTERVAL", "day")
+
+from sqlalchemy import insert, select, func, text
+from server import engine, SensorData, partition_manager, BATCH_INSERT_CHUNK
+import partitions
+
+def scanned_relations(plan):
+    # EXPLAIN JSON 에서 실제로 읽은 테이블(파티션) 이름
+    names = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if "Relation Name" in node and node.get("Actual Loops", 1) > 0:
+            names.add(node["Relation Name"])
+        stack.extend(node.get("Plans", []))
+    return names
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--rows-per-day", type=int, default=5000)
+    parser.add_argument("--sensors", type=int, default=50)
+    parser.add_argument("--retention-days", type=int, default=7)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql" or partition_manager is None:
+        sys.exit("PostgreSQL DB_URL 과 PARTITION_INTERVAL 이 필요합니다")
+
+    now = datetime.now(timezone.utc)
+    first_day = partitions.period_start(now - timedelta(days=args.days - 1), "day")
+
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(SensorData)).scalar():
+            sys.exit("sensor_data 가 비어 있지 않습니다 - 빈 테스트 DB 에서 실행하세요")
+        # 과거 기간 파티션도 미리 생성
+        partitions.ensure_partitions(conn, "sensor_data", "day", args.days, now=first_day)
+
+    print(f"{args.days}일 x {args.rows_per_day} rows 저장 중...")
+    for d in range(args.days):
+        day = first_day + timedelta(days=d)
+        rows = [
+            {
+                "sensor_id": f"tphm-{random.randrange(args.sensors):03d}",
+                "temperature": round(random.uniform(15, 35), 2),
+                "humidity": round(random.uniform(30, 80), 2),
+                "created_at": day + timedelta(seconds=random.randrange(86400)),
+            }
+            for _ in range(args.rows_per_day)
+        ]
+        with engine.begin() as conn:
+            for i in range(0, len(rows), BATCH_INSERT_CHUNK):
+                conn.execute(insert(SensorData).values(rows[i:i + BATCH_INSERT_CHUNK]))
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE sensor_data"))
+
+    # /sensor-data/{sensor_id}/range 와 같은 형태의 조회 - 마지막 이틀
+    start = first_day + timedelta(days=args.days - 2)
+    end = start + timedelta(days=2)
+    stmt = (
+        select(SensorData.id, SensorData.created_at)
+        .where(SensorData.sensor_id == "tphm-001", SensorData.created_at >= start, SensorData.created_at <= end)
+        .order_by(SensorData.created_at, SensorData.id)
+        .limit(1000)
+    )
+    compiled = stmt.compile(engine)
+    with engine.connect() as conn:
+        plan = conn.exec_driver_sql("EXPLAIN (ANALYZE, FORMAT JSON) " + str(compiled), compiled.params).scalar()
+        plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]
+        t0 = time.perf_counter()
+        n = len(conn.execute(stmt).all())
+        elapsed = (time.perf_counter() - t0) * 1000
+        all_partitions = [p for p, _ in partitions.list_partitions(conn, "sensor_data")]
+
+    scanned = scanned_relations(plan["Plan"])
+    expected = {partitions.partition_name("sensor_data", start + timedelta(days=i)) for i in range(3)}
+    print(f"전체 파티션 {len(all_partitions)}개 중 읽은 파티션: {sorted(scanned)}")
+    print(f"범위 조회 {n} rows / {elapsed:.1f} ms (planning {plan['Planning Time']:.1f} ms, execution {plan['Execution Time']:.1f} ms)")
+    # DEFAULT 파티션은 비어 있으므로 플랜에 남아 있어도 무시
+    allowed = expected | {"sensor_data", "sensor_data_default"}
+    assert scanned <= allowed, f"범위 밖 파티션을 읽음: {sorted(scanned - allowed)}"
+    print("OK - 범위 밖 파티션은 읽지 않음")
+
+    # 보관 기간 정리 - DELETE 없이 파티션 DROP
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        dropped = partitions.drop_expired_partitions(
+            conn, "sensor_data", "day", timedelta(days=args.retention_days), now=now)
+        remaining = conn.execute(select(func.min(SensorData.created_at))).scalar()
+    print(f"보관 기간 {args.retention_days}일: 파티션 {len(dropped)}개 DROP, {(time.perf_counter() - t0) * 1000:.1f} ms")
+    print(f"남은 가장 오래된 행: {remaining}")
+
+    # 관리 스레드가 멈춰 있던 동안 파티션 없는 기간(미리 만든 범위 밖)으로 들어온 행 → DEFAULT
+    # 그 기간 파티션을 만들면 DETACH / CREATE / INSERT / DELETE / ATTACH 로 새 파티션에 옮겨져야 함
+    future = partitions.period_start(now + timedelta(days=partition_manager.premake + 3), "day")
+    name = partitions.partition_name("sensor_data", future)
+    late = [
+        {"sensor_id": "tphm-late", "temperature": 20.0, "humidity": 50.0, "created_at": future + timedelta(minutes=i)}
+        for i in range(100)
+    ]
+    outside = {"sensor_id": "tphm-late", "temperature": 20.0, "humidity": 50.0, "created_at": future + timedelta(days=1, minutes=1)}
+    with engine.begin() as conn:
+        conn.execute(insert(SensorData).values(late + [outside]))
+        in_default = conn.execute(text('SELECT count(*) FROM "sensor_data_default"')).scalar()
+    assert in_default == len(late) + 1, f"DEFAULT 파티션 행 수가 다름: {in_default}"
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        created = partitions.ensure_partitions(conn, "sensor_data", "day", 0, now=future)
+    elapsed = (time.perf_counter() - t0) * 1000
+    with engine.connect() as conn:
+        moved = conn.execute(text(f'SELECT count(*) FROM "{name}"')).scalar()
+        left = conn.execute(text('SELECT count(*) FROM "sensor_data_default"')).scalar()
+        total = conn.execute(select(func.count()).select_from(SensorData).where(SensorData.sensor_id == "tphm-late")).scalar()
+        attached = conn.execute(text(
+            "SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c WHERE c.relname = 'sensor_data_default'"
+        )).scalar()
+    print(f"DEFAULT → {created}: {moved} rows 이동, DEFAULT 에 {left} rows 남음, {elapsed:.1f} ms")
+    assert created == [name], created
+    assert moved == len(late) and left == 1 and total == len(late) + 1, (moved, left, total)
+    assert attached == "DEFAULT", f"DEFAULT 파티션이 다시 붙지 않음: {attached}"
+    print("OK - DEFAULT 의 해당 기간 행만 새 파티션으로 옮겨지고 DEFAULT 는 다시 붙음")
+
+if __name__ == "__main__":
+    main()
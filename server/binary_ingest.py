@@ -0,0 +1,104 @@
+# binary_ingest.py
+# 통신량을 줄여야 하는 센서 보드(셀룰러 모뎀 등)용 압축 바이너리 측정값 포맷
+#
+# Content-Type 으로 구분
+# - application/x-tphm-struct : 고정 길이 레코드를 N번 이어 붙인 본문 (리틀 엔디언, 레코드당 28바이트)
+#     char[16] sensor_id (ASCII, 남는 자리는 0) / uint32 측정 시각 (epoch 초, 0 이면 서버 수신 시각)
+#     float32 temperature / float32 humidity
+# - application/msgpack (application/x-msgpack) : [[sensor_id, epoch 초 또는 nil, temperature, humidity], ...]
+# 필드를 이름이 아니라 위치로 읽으므로 JSON 처럼 키 문자열을 보내거나 dict 를 조회할 필요가 없음
+
+import math
+import struct
+from datetime import datetime, timedelta
+
+try:
+    import msgpack
+except ImportError:  # 선택 의존성 - 없으면 struct 포맷만 지원
+    msgpack = None
+
+STRUCT_CONTENT_TYPE = "application/x-tphm-struct"
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack")
+CONTENT_TYPES = (STRUCT_CONTENT_TYPE,) + MSGPACK_CONTENT_TYPES
+
+RECORD = struct.Struct("<16sIff")
+
+_EPOCH = datetime(1970, 1, 1)
+_MAX_TS = (datetime(9999, 12, 31) - _EPOCH).total_seconds()  # datetime 으로 바꿀 수 있는 최대 epoch 초
+
+class UnsupportedFormat(Exception):
+    pass
+
+def media_type(content_type):
+    # "application/x-tphm-struct; charset=..." → "application/x-tphm-struct"
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+def is_binary(content_type):
+    return media_type(content_type) in CONTENT_TYPES
+
+def encode_struct(records):
+    # records: [(sensor_id, epoch 초 또는 0, temperature, humidity), ...] - 벤치마크 / 테스트 송신용
+    return b"".join(RECORD.pack(sid.encode("ascii"), int(ts or 0), t, h) for sid, ts, t, h in records)
+
+def _created_at(ts, now):
+    # ts 가 0 이면 수신 시각, 그 외에는 epoch 초 - 범위 밖(음수, 9999년 이후, NaN/inf)은 형식 오류
+    if not ts:
+        return now
+    if not (math.isfinite(ts) and 0 < ts <= _MAX_TS):
+        raise ValueError(f"ts 가 범위를 벗어났습니다: {ts}")
+    return _EPOCH + timedelta(seconds=ts)
+
+def _to_rows(records, now, sensor_id_override):
+    # 서버의 build_sensor_rows 와 같은 (rows, row_positions, results) 형태로 변환
+    rows = []
+    row_positions = []
+    results = []
+    for i, (sensor_id, ts, temperature, humidity) in enumerate(records):
+        sensor_id = sensor_id_override or sensor_id
+        if not sensor_id:
+            results.append({"index": i, "status": "error", "detail": "sensor_id 가 비어 있습니다"})
+            continue
+        if not (math.isfinite(temperature) and math.isfinite(humidity)):
+            results.append({"index": i, "status": "error", "detail": "잘못된 측정값: NaN/inf"})
+            continue
+        rows.append({
+            "sensor_id": sensor_id,
+            "temperature": temperature,
+            "humidity": humidity,
+            "created_at": _created_at(ts, now),
+        })
+        row_positions.append(i)
+        results.append(None)
+    return rows, row_positions, results
+
+def _struct_records(body):
+    if len(body) % RECORD.size:
+        raise ValueError(f"본문 길이({len(body)})가 레코드 크기({RECORD.size})의 배수가 아닙니다")
+    for raw_id, ts, temperature, humidity in RECORD.iter_unpack(body):
+        yield raw_id.rstrip(b"\0").decode("ascii", "replace"), ts, temperature, humidity
+
+def _msgpack_records(body):
+    if msgpack is None:
+        raise UnsupportedFormat("msgpack 패키지가 설치되어 있지 않습니다 (pip install msgpack)")
+    try:
+        items = msgpack.unpackb(body, use_list=False, raw=False)
+    except Exception as e:
+        raise ValueError(f"MessagePack 디코딩 실패: {e}")
+    if not isinstance(items, (list, tuple)):
+        raise ValueError("MessagePack 본문은 [[sensor_id, ts, temperature, humidity], ...] 배열이어야 합니다")
+    for item in items:
+        try:
+            sensor_id, ts, temperature, humidity = item
+            yield str(sensor_id or ""), float(ts or 0), float(temperature), float(humidity)
+        except (TypeError, ValueError):
+            raise ValueError(f"잘못된 레코드: {item!r}")
+
+def decode(content_type, body, now, sensor_id=None):
+    # 반환: (rows, row_positions, results) - 형식 오류는 ValueError, 지원하지 않는 형식은 UnsupportedFormat
+    # sensor_id 를 주면 (경로에 센서 id 가 있는 단건 저장) 레코드의 sensor_id 대신 사용
+    kind = media_type(content_type)
+    if kind == STRUCT_CONTENT_TYPE:
+        return _to_rows(_struct_records(body), now, sensor_id)
+    if kind in MSGPACK_CONTENT_TYPES:
+        return _to_rows(_msgpack_records(body), now, sensor_id)
+    raise UnsupportedFormat(f"지원하지 않는 Content-Type: {kind}")
@@ -0,0 +1,205 @@
+# compression.py
+# 요청 본문 gzip/deflate 해제 + 응답 압축 (ASGI 미들웨어)
+#
+# - 요청: Content-Encoding: gzip / deflate 이면 받는 대로 조각 단위로 풀어서 앱에 넘김 (전체를 모아 두지 않음)
+#   풀린 크기가 max_request_size 를 넘으면 413, 깨진 데이터는 400, 그 외 인코딩은 415
+# - 응답: Accept-Encoding 에 gzip(우선) / deflate 가 있고 압축할 만한 Content-Type 일 때만
+#   본문이 min_size 보다 작으면 그대로 보냄 (작은 응답은 압축 비용이 더 큼)
+#   StreamingResponse(내보내기) 는 조각마다 압축 후 Z_SYNC_FLUSH 로 바로 보내므로 메모리는 조각 하나 분량
+# - SSE(text/event-stream) 는 이벤트가 압축 버퍼에 묶이지 않도록 압축하지 않음
+
+import zlib
+
+from fastapi import HTTPException
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv", "text/plain")
+
+# wbits - gzip: 헤더/CRC 포함, deflate: HTTP 의 deflate 는 zlib 형식 (RFC 9110)
+WBITS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+def parse_accept_encoding(value):
+    # "gzip;q=0.8, deflate, br" → {"gzip": 0.8, "deflate": 1.0, "br": 1.0}
+    prefs = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        prefs[name] = q
+    return prefs
+
+def choose_encoding(accept_encoding):
+    prefs = parse_accept_encoding(accept_encoding)
+    wildcard = prefs.get("*", 0.0)
+    best, best_q = None, 0.0
+    for name in ("gzip", "deflate"):
+        q = prefs.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+def _header(headers, name):
+    for key, value in headers:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+class Compression:
+    def __init__(self, min_size=1024, level=6, max_request_size=64 * 1024 * 1024):
+        self.min_size = min_size  # 0 이면 크기와 무관하게 압축
+        self.level = level  # 1(빠름) ~ 9(작음), 0 이면 응답 압축 안 함
+        self.max_request_size = max_request_size
+        self.bytes_counter = None  # server.py 에서 지표 Counter 연결 (direction, encoding, form)
+
+    def _count(self, direction, encoding, raw, compressed):
+        if self.bytes_counter is not None:
+            self.bytes_counter.inc((direction, encoding, "identity"), raw)
+            self.bytes_counter.inc((direction, encoding, "compressed"), compressed)
+
+    # ---- 요청 본문 해제 ----
+    def _decompressing_receive(self, receive, encoding):
+        d = zlib.decompressobj(WBITS[encoding])
+        state = {"total": 0, "wire": 0, "done": False}
+        limit = self.max_request_size
+
+        async def wrapped():
+            if state["done"]:
+                return await receive()
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            chunk = message.get("body", b"")
+            state["wire"] += len(chunk)
+            try:
+                # 한 번에 풀 수 있는 양을 남은 한도 + 1 로 제한 (압축 폭탄이 메모리를 다 쓰지 않도록)
+                out = d.decompress(chunk, limit - state["total"] + 1)
+                more = message.get("more_body", False)
+                if not more and len(out) <= limit - state["total"]:
+                    out += d.flush()
+            except zlib.error:
+                raise HTTPException(status_code=400, detail=f"{encoding} 본문을 풀 수 없습니다")
+            state["total"] += len(out)
+            if state["total"] > limit or d.unconsumed_tail:
+                raise HTTPException(status_code=413, detail=f"풀린 본문이 {limit} bytes 를 넘습니다")
+            if not more:
+                if not d.eof:
+                    raise HTTPException(status_code=400, detail=f"{encoding} 본문이 잘렸습니다")
+                state["done"] = True
+                self._count("request", encoding, state["total"], state["wire"])
+            return {"type": "http.request", "body": out, "more_body": more}
+
+        return wrapped
+
+    # ---- 응답 압축 ----
+    def _compressing_send(self, send, encoding):
+        level, min_size = self.level, self.min_size
+        state = {"start": None, "active": None, "buffer": [], "size": 0, "raw": 0, "wire": 0}
+        c = zlib.compressobj(level, zlib.DEFLATED, WBITS[encoding])
+
+        async def start_compressed(content_length=None):
+            start = state["start"]
+            headers = [(k, v) for k, v in start["headers"] if k != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+            if content_length is not None:
+                headers.append((b"content-length", str(content_length).encode()))
+            await send(dict(start, headers=headers))
+
+        async def start_plain():
+            start = state["start"]
+            headers = list(start["headers"])
+            headers.append((b"vary", b"Accept-Encoding"))
+            await send(dict(start, headers=headers))
+
+        async def send_compressed(body, more):
+            out = c.compress(body) + c.flush(zlib.Z_SYNC_FLUSH if more else zlib.Z_FINISH)
+            state["raw"] += len(body)
+            state["wire"] += len(out)
+            await send({"type": "http.response.body", "body": out, "more_body": more})
+            if not more:
+                self._count("response", encoding, state["raw"], state["wire"])
+
+        async def wrapped(message):
+            kind = message["type"]
+            if kind == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = (_header(headers, b"content-type") or "").split(";")[0].strip()
+                eligible = (
+                    _header(headers, b"content-encoding") is None
+                    and content_type in COMPRESSIBLE_TYPES
+                    and message.get("status", 200) not in (204, 304)
+                )
+                if eligible:
+                    state["start"] = message
+                else:
+                    state["active"] = False
+                    await send(message)
+                return
+            if kind != "http.response.body" or state["active"] is False:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if state["active"]:
+                return await send_compressed(body, more)
+
+            # 아직 압축 여부를 정하지 않음 - min_size 까지 모으거나 응답이 끝나면 결정
+            state["buffer"].append(body)
+            state["size"] += len(body)
+            if state["size"] < min_size and more:
+                return
+            pending = b"".join(state["buffer"])
+            state["buffer"] = []
+            if state["size"] < min_size:
+                state["active"] = False
+                await start_plain()
+                return await send({"type": "http.response.body", "body": pending, "more_body": False})
+            state["active"] = True
+            if not more:
+                # 한 번에 끝나는 응답은 압축 후 Content-Length 를 다시 붙임
+                out = c.compress(pending) + c.flush()
+                await start_compressed(len(out))
+                self._count("response", encoding, len(pending), len(out))
+                return await send({"type": "http.response.body", "body": out, "more_body": False})
+            await start_compressed()
+            await send_compressed(pending, True)
+
+        return wrapped
+
+    def middleware(self, app):
+        compression = self
+
+        async def compression_app(scope, receive, send):
+            if scope["type"] != "http":
+                return await app(scope, receive, send)
+            headers = scope["headers"]
+
+            content_encoding = (_header(headers, b"content-encoding") or "identity").strip().lower()
+            if content_encoding != "identity":
+                if content_encoding not in WBITS:
+                    await send({"type": "http.response.start", "status": 415,
+                                "headers": [(b"content-type", b"application/json")]})
+                    await send({"type": "http.response.body",
+                                "body": b'{"detail":"Content-Encoding must be gzip, deflate or identity"}'})
+                    return
+                # 앱에는 풀린 본문만 보이도록 (Content-Length 는 압축된 크기라 제거)
+                scope["headers"] = [(k, v) for k, v in headers
+                                    if k not in (b"content-encoding", b"content-length")]
+                receive = compression._decompressing_receive(receive, content_encoding)
+
+            accept = _header(headers, b"accept-encoding")
+            encoding = None
+            if accept and compression.level > 0 and scope["method"] != "HEAD":
+                encoding = choose_encoding(accept)
+            if encoding is not None:
+                send = compression._compressing_send(send, encoding)
+            await app(scope, receive, send)
+
+        return compression_app
@@ -0,0 +1,61 @@
+# export.py
+# 큰 기간의 센서 / 탐지 데이터를 NDJSON 또는 CSV 로 스트리밍 내보내기
+#
+# - 서버 측 커서(yield_per)로 chunk 단위만 메모리에 올리고, chunk 마다 바로 응답으로 흘려보냄
+# - ORM 객체 / pydantic 변환 없이 필요한 컬럼만 튜플로 읽어서 문자열로 변환
+# - 스트리밍 도중에도 세션이 살아 있어야 하므로 요청 의존성(get_db) 대신 제너레이터 안에서 세션을 직접 엶
+
+import csv
+import io
+import json
+from datetime import datetime
+
+EXPORT_CHUNK = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _jsonable(v):
+    return v.isoformat() if isinstance(v, datetime) else v
+
+def format_header(columns, fmt):
+    if fmt != "csv":
+        return ""
+    buf = io.StringIO()
+    csv.writer(buf).writerow(columns)
+    return buf.getvalue()
+
+def format_chunk(rows, columns, fmt):
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerows([_jsonable(v) for v in row] for row in rows)
+        return buf.getvalue()
+    return "".join(
+        json.dumps({c: _jsonable(v) for c, v in zip(columns, row)}, ensure_ascii=False) + "\n"
+        for row in rows
+    )
+
+def iter_export(session_factory, stmt, columns, fmt, chunk=EXPORT_CHUNK):
+    # 동기 서버용 - StreamingResponse 가 스레드풀에서 순회
+    yield format_header(columns, fmt)
+    db = session_factory()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=chunk))
+        for rows in result.partitions():
+            yield format_chunk(rows, columns, fmt)
+    finally:
+        db.close()
+
+async def aiter_export(session_factory, stmt, columns, fmt, chunk=EXPORT_CHUNK):
+    # 비동기 서버용 - AsyncSession.stream() 으로 서버 측 커서 사용
+    yield format_header(columns, fmt)
+    async with session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=chunk))
+        async for rows in result.partitions():
+            yield format_chunk(rows, columns, fmt)
+
+def content_disposition(name, fmt):
+    return {"Content-Disposition": f'attachment; filename="{name}.{fmt}"'}
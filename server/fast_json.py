@@ -0,0 +1,38 @@
+# fast_json.py
+# 큰 목록 응답을 ORM 객체 / Pydantic 검증 없이 바로 JSON bytes 로 만드는 경로
+#
+# - DB 에서 필요한 컬럼만 튜플(Row)로 읽고 orjson 으로 직렬화 (설치되어 있지 않으면 표준 json)
+# - layout="columns" 이면 {"created_at": [...], "temperature": [...]} 형태
+#   (행마다 키를 반복하지 않아 응답이 작고, 차트 라이브러리에 그대로 넘길 수 있음)
+# - 행 튜플 뒤쪽에 columns 보다 많은 값(예: 커서용 id)이 있어도 columns 개수만큼만 사용
+
+import json
+from datetime import datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+LAYOUTS = ("rows", "columns")
+
+def _default(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    raise TypeError(f"JSON 으로 변환할 수 없는 값: {v!r}")
+
+def dumps(obj):
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=_default).encode()
+
+def encode_rows(rows, columns, layout="rows"):
+    if layout == "columns":
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        return dumps({c: list(v) for c, v in zip(columns, values)})
+    return dumps([dict(zip(columns, row)) for row in rows])
+
+def json_response(rows, columns, layout="rows", headers=None):
+    return Response(encode_rows(rows, columns, layout), media_type="application/json", headers=headers)
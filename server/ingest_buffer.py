@@ -0,0 +1,142 @@
+# ingest_buffer.py
+# 요청 스레드에서는 큐에 넣기만 하고, 백그라운드 스레드가 모아서 한 번에 DB에 쓰는 write-behind 버퍼
+#
+# - 큐 크기가 batch_size 이상이 되거나 flush_interval(초)이 지나면 flush
+# - 큐는 max_size 로 제한되며, 가득 차면 put_many() 가 False 를 돌려줌 (서버에서 429 응답)
+# - flush 가 실패하면(DB 일시 장애 등) 그 batch 를 큐 맨 앞에 두고 retry_backoff 초부터 두 배씩(최대 max_backoff)
+#   기다렸다가 다시 저장, max_retries 번 넘게 실패하면 그때 버리고 failed_rows 로 셈
+#   (이미 202 로 응답한 항목이므로 바로 버리지 않음, 재시도 중인 batch 도 max_size 에 포함 → 오래가면 429 로 밀어냄)
+# - stop() 을 호출하면 남은 항목을 모두 flush 한 뒤 스레드 종료
+
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger("ingest_buffer")
+
+class WriteBehindBuffer:
+    def __init__(self, flush_fn, max_size=10000, batch_size=500, flush_interval=0.5, name="buffer",
+                 max_retries=8, retry_backoff=0.5, max_backoff=10.0):
+        self.flush_fn = flush_fn  # flush_fn(list_of_rows) : 한 트랜잭션으로 저장
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+
+        self._items = deque()
+        self._retry = None  # 실패해서 다시 저장할 (batch, 실패 횟수) - 새 항목보다 먼저 저장
+        self._retry_at = 0.0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+        # 통계용 카운터
+        self.enqueued = 0
+        self.rejected = 0
+        self.flushed_rows = 0
+        self.failed_rows = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.retried_batches = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def put_many(self, rows):
+        # 전부 넣거나 전부 거절 (한 프레임의 탐지 결과가 쪼개지지 않도록)
+        with self._cond:
+            if self.depth() + len(rows) > self.max_size:
+                self.rejected += len(rows)
+                return False
+            self._items.extend(rows)
+            self.enqueued += len(rows)
+            if len(self._items) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def depth(self):
+        return len(self._items) + (len(self._retry[0]) if self._retry else 0)
+
+    def _take_batch(self):
+        n = min(self.batch_size, len(self._items))
+        return [self._items.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._retry is not None:
+                    # 종료 중이면 기다리지 않고 바로 다시 시도 (실패 횟수 제한은 그대로)
+                    delay = self._retry_at - time.monotonic()
+                    if delay > 0 and not self._stopping:
+                        self._cond.wait(delay)
+                        continue
+                    batch, failures = self._retry
+                    self._retry = None
+                else:
+                    if not self._stopping and len(self._items) < self.batch_size:
+                        self._cond.wait(self.flush_interval)
+                    if self._stopping and not self._items:
+                        return
+                    batch, failures = self._take_batch(), 0
+            if batch:
+                self._flush(batch, failures)
+
+    def _flush(self, batch, failures=0):
+        start = time.perf_counter()
+        try:
+            self.flush_fn(batch)
+            self.flushed_rows += len(batch)
+        except Exception as e:
+            self.flush_errors += 1
+            failures += 1
+            if failures <= self.max_retries:
+                backoff = min(self.retry_backoff * 2 ** (failures - 1), self.max_backoff)
+                with self._cond:
+                    self._retry = (batch, failures)
+                    self._retry_at = time.monotonic() + backoff
+                self.retried_batches += 1
+                log.warning("[%s] flush 실패 (%d건, %d번째) - %.1f초 뒤 다시 시도: %s",
+                            self.name, len(batch), failures, backoff, e)
+            else:
+                self.failed_rows += len(batch)
+                log.error("[%s] flush 가 %d번 실패해서 %d건을 버립니다: %s", self.name, failures, len(batch), e)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.flush_count += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+
+    def stats(self):
+        return {
+            "queue_depth": self.depth(),
+            "max_size": self.max_size,
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "flushed_rows": self.flushed_rows,
+            "failed_rows": self.failed_rows,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "retried_batches": self.retried_batches,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flush_count, 3) if self.flush_count else 0.0,
+        }
@@ -0,0 +1,204 @@
+# metrics.py
+# /metrics (Prometheus text format) 용 지표 수집
+#
+# - 라우트별 요청 지연 / 요청·응답 크기 히스토그램 : ASGI 미들웨어 (BaseHTTPMiddleware 보다 오버헤드가 적음)
+# - 테이블별 INSERT 행 수 : SQLAlchemy after_cursor_execute 이벤트
+# - 커밋 시간 (flush + COMMIT) : Session before_commit / after_commit 이벤트
+# - 커넥션 풀 사용/overflow, 버퍼·캐시 상태 : /metrics 요청 시점에 값을 읽는 gauge
+# 외부 의존성 없이 카운터/히스토그램만 직접 구현 (관측 1회 = bisect + 덧셈)
+
+import bisect
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def _escape(v):
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, v in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, labels)} {v}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels → [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(labels)
+            if s is None:
+                s = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            s[i] += 1
+            s[-2] += value
+            s[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for labels, s in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + ("+Inf",), s):
+                    cumulative += n
+                    lines.append(f"{self.name}_bucket{_label_str(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_str(self.labelnames, labels)} {s[-2]}")
+                lines.append(f"{self.name}_count{_label_str(self.labelnames, labels)} {s[-1]}")
+        return lines
+
+class CallbackGauge:
+    # /metrics 요청 시점에 callback() 을 불러 [(labels, value), ...] 를 얻음
+    def __init__(self, name, help, labelnames, callback):
+        self.name, self.help, self.labelnames, self.callback = name, help, labelnames, callback
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, v in self.callback():
+            lines.append(f"{self.name}{_label_str(self.labelnames, labels)} {v}")
+        return lines
+
+class Metrics:
+    def __init__(self):
+        self.request_latency = Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route",
+            LATENCY_BUCKETS, ("method", "route", "status"))
+        self.request_size = Histogram(
+            "http_request_size_bytes", "HTTP request body size by route",
+            SIZE_BUCKETS, ("method", "route"))
+        self.response_size = Histogram(
+            "http_response_size_bytes", "HTTP response body size by route",
+            SIZE_BUCKETS, ("method", "route"))
+        self.rows_inserted = Counter(
+            "db_rows_inserted_total", "Rows inserted per table", ("engine", "table"))
+        self.commit_duration = Histogram(
+            "db_commit_duration_seconds", "Session commit duration (flush + COMMIT)",
+            LATENCY_BUCKETS)
+        self._metrics = [self.request_latency, self.request_size, self.response_size,
+                         self.rows_inserted, self.commit_duration]
+        self._engines = []
+        self._metrics.append(CallbackGauge(
+            "db_pool_connections", "Connection pool state (checked_out / checked_in / overflow / size)",
+            ("engine", "state"), self._pool_values))
+        self._sessions_instrumented = False
+
+    def add_gauge(self, name, help, labelnames, callback):
+        self._metrics.append(CallbackGauge(name, help, labelnames, callback))
+
+    def add_counter(self, name, help, labelnames=()):
+        counter = Counter(name, help, labelnames)
+        self._metrics.append(counter)
+        return counter
+
+    def render(self):
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+    # ---- SQLAlchemy ----
+    def instrument_engine(self, engine, name):
+        # 비동기 엔진은 engine.sync_engine 을 넘김
+        self._engines.append((name, engine))
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is None or not context.isinsert:
+                return
+            stmt = context.compiled.statement
+            rows = cursor.rowcount
+            if rows is None or rows <= 0:
+                # sqlite3 는 RETURNING 이 있으면 결과를 읽기 전까지 rowcount 가 0/-1
+                multi_values = getattr(stmt, "_multi_values", ())
+                if multi_values:
+                    rows = len(multi_values[0])
+                else:
+                    rows = len(parameters) if executemany else 1
+            table = stmt.table.name
+            self.rows_inserted.inc((name, table), rows)
+
+        if not self._sessions_instrumented:
+            self._sessions_instrumented = True
+            event.listen(Session, "before_commit", self._before_commit)
+            event.listen(Session, "after_commit", self._after_commit)
+
+    def _before_commit(self, session):
+        session.info["commit_started"] = time.perf_counter()
+
+    def _after_commit(self, session):
+        started = session.info.pop("commit_started", None)
+        if started is not None:
+            self.commit_duration.observe(time.perf_counter() - started)
+
+    def _pool_values(self):
+        values = []
+        for name, engine in self._engines:
+            pool = engine.pool
+            for state, fn in (("checked_out", "checkedout"), ("checked_in", "checkedin"),
+                              ("overflow", "overflow"), ("size", "size")):
+                if hasattr(pool, fn):
+                    # QueuePool.overflow() 는 풀이 다 차기 전에는 음수
+                    values.append(((name, state), max(getattr(pool, fn)(), 0)))
+        return values
+
+    # ---- ASGI 미들웨어 ----
+    def middleware(self, app):
+        metrics = self
+
+        async def metrics_app(scope, receive, send):
+            if scope["type"] != "http":
+                return await app(scope, receive, send)
+            start = time.perf_counter()
+            status = [500]
+            sent = [0]
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status[0] = message["status"]
+                elif message["type"] == "http.response.body":
+                    sent[0] += len(message.get("body", b""))
+                await send(message)
+
+            # 요청 크기는 안쪽 미들웨어(압축 해제)가 헤더를 바꾸기 전에 읽어 둠 (전송된 크기 기준)
+            request_size = None
+            for key, value in scope["headers"]:
+                if key == b"content-length":
+                    request_size = int(value)
+                    break
+            try:
+                await app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                route = getattr(route, "path", None) or "unmatched"
+                method = scope["method"]
+                metrics.request_latency.observe(time.perf_counter() - start, (method, route, str(status[0])))
+                if request_size is not None:
+                    metrics.request_size.observe(request_size, (method, route))
+                metrics.response_size.observe(sent[0], (method, route))
+
+        return metrics_app
@@ -0,0 +1,98 @@
+# occupancy.py
+# 프레임 단위 객체 탐지 결과로 주차 칸 점유 상태를 갱신하는 상태 머신
+#
+# - (sensor_id, grid_index) 마다 점유 여부 / 점유 시작 시각 / 연속 감지·미감지 프레임 수를 메모리에 유지
+# - 연속 enter_frames 프레임 감지되면 입차, 연속 leave_frames 프레임 미감지면 출차 (한두 프레임 오탐 무시)
+# - 프레임 하나당 O(해당 카메라 칸 수), 상태가 바뀐 칸만 이벤트로 돌려주므로 DB 쓰기는 입/출차 때만 발생
+# - process_frame 은 복사본에서 계산만 하고, DB 커밋이 성공한 뒤 apply 로 반영 (커밋 실패 시 메모리 상태가 DB 와 어긋나지 않게)
+
+import threading
+
+NO_SLOT = 9999  # rtsp_detection.py 에서 어느 칸에도 속하지 않은 객체
+
+class SlotState:
+    __slots__ = ("occupied", "since", "present_streak", "absent_streak", "first_present_at", "first_absent_at", "last_seen_at")
+
+    def __init__(self, occupied=False, since=None):
+        self.occupied = occupied
+        self.since = since  # 현재 상태(점유/비어 있음)가 시작된 시각
+        self.present_streak = 0
+        self.absent_streak = 0
+        self.first_present_at = None
+        self.first_absent_at = None
+        self.last_seen_at = None
+
+    def copy(self):
+        st = SlotState(self.occupied, self.since)
+        st.present_streak = self.present_streak
+        st.absent_streak = self.absent_streak
+        st.first_present_at = self.first_present_at
+        st.first_absent_at = self.first_absent_at
+        st.last_seen_at = self.last_seen_at
+        return st
+
+class OccupancyTracker:
+    def __init__(self, enter_frames=3, leave_frames=5):
+        self.enter_frames = enter_frames
+        self.leave_frames = leave_frames
+        self._slots = {}  # sensor_id → {grid_index: SlotState}
+        self._lock = threading.Lock()
+
+    def restore(self, sensor_id, grid_index, occupied, since):
+        # 서버 재시작 시 DB 에 저장된 상태로 복원
+        with self._lock:
+            self._slots.setdefault(sensor_id, {})[grid_index] = SlotState(occupied, since)
+
+    def process_frame(self, sensor_id, grid_indexes, frame_time):
+        # grid_indexes: 이 프레임에서 차량이 감지된 칸 번호들
+        # 반환: (events, update)
+        #   events: [("enter", sensor_id, grid_index, entered_at)] / [("leave", sensor_id, grid_index, entered_at, left_at)]
+        #   update: 커밋 성공 후 apply(update) 에 넘길 새 상태 (이 호출만으로는 메모리 상태가 바뀌지 않음)
+        present = {g for g in grid_indexes if g != NO_SLOT}
+        events = []
+        with self._lock:
+            slots = {g: st.copy() for g, st in self._slots.get(sensor_id, {}).items()}
+            for g in present:
+                if g not in slots:
+                    slots[g] = SlotState()
+            for g, st in slots.items():
+                if g in present:
+                    if st.present_streak == 0:
+                        st.first_present_at = frame_time
+                    st.present_streak += 1
+                    st.absent_streak = 0
+                    st.last_seen_at = frame_time
+                    if not st.occupied and st.present_streak >= self.enter_frames:
+                        st.occupied = True
+                        st.since = st.first_present_at
+                        events.append(("enter", sensor_id, g, st.since))
+                else:
+                    if st.absent_streak == 0:
+                        st.first_absent_at = frame_time
+                    st.absent_streak += 1
+                    st.present_streak = 0
+                    if st.occupied and st.absent_streak >= self.leave_frames:
+                        entered_at = st.since
+                        st.occupied = False
+                        st.since = st.first_absent_at
+                        events.append(("leave", sensor_id, g, entered_at, st.since))
+        return events, (sensor_id, slots)
+
+    def apply(self, update):
+        # process_frame 결과를 메모리 상태에 반영 - 이벤트를 DB 에 커밋한 뒤에만 호출
+        # 한 카메라는 프레임을 순서대로 보내므로 같은 카메라의 프레임이 겹치면 나중에 반영된 쪽이 남음
+        sensor_id, slots = update
+        with self._lock:
+            self._slots[sensor_id] = slots
+
+    def snapshot(self, sensor_id):
+        with self._lock:
+            return [
+                {
+                    "grid_index": g,
+                    "occupied": st.occupied,
+                    "since": st.since,
+                    "last_seen_at": st.last_seen_at,
+                }
+                for g, st in sorted(self._slots.get(sensor_id, {}).items())
+            ]
@@ -0,0 +1,204 @@
+# partitions.py
+# PostgreSQL 에서 sensor_data / rtsp_detections 를 created_at 기준 범위 파티션 테이블로 운영
+#
+# - 테이블이 아직 없으면 create_all 보다 먼저 PARTITION BY RANGE (created_at) 로 만듦
+#   (파티션 테이블의 PK 에는 파티션 키가 들어가야 하므로 DB 의 PK 는 (id, created_at), ORM 은 그대로 id 사용)
+# - 일/주 단위 파티션을 미리 premake 개 만들어 두고, 범위 밖 시각(보드 시계 오류 등)은 DEFAULT 파티션으로
+#   (관리 스레드가 멈춰 있던 동안 DEFAULT 에 들어간 행은 파티션을 만들 때 새 파티션으로 옮김)
+# - 보관 기간이 지난 파티션은 DELETE 대신 DROP TABLE (vacuum / 인덱스 bloat 없음)
+# - created_at 에는 BRIN 인덱스 (시간순으로 쌓이는 데이터라 B-tree 보다 훨씬 작음)
+# - 이미 일반 테이블로 만들어진 경우 자동 변환하지 않고 경고만 남김 (README 의 이전 방법 참고)
+
+import logging
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, text
+
+log = logging.getLogger("partitions")
+
+INTERVALS = {"day": timedelta(days=1), "week": timedelta(weeks=1)}
+
+def period_start(dt, interval):
+    # 파티션 경계 (UTC 자정, 주 단위는 월요일)
+    day = datetime(dt.year, dt.month, dt.day, tzinfo=timezone.utc)
+    if interval == "week":
+        day -= timedelta(days=day.weekday())
+    return day
+
+def partition_name(table_name, start):
+    return f"{table_name}_p{start:%Y%m%d}"
+
+def _name_pattern(table_name):
+    return re.compile(rf"^{re.escape(table_name)}_p(\d{{8}})$")
+
+def is_partitioned(conn, table_name):
+    # None: 테이블 없음 / True: 파티션 테이블 / False: 일반 테이블
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE relname = :name AND relnamespace = 'public'::regnamespace"),
+        {"name": table_name},
+    ).scalar()
+    if relkind is None:
+        return None
+    return relkind == "p"
+
+def create_partitioned_table(conn, table):
+    # ORM 테이블 정의를 복사해서 PK 와 PARTITION BY 만 바꿔 생성 (인덱스는 부모에 만들면 파티션마다 자동 생성)
+    t = table.to_metadata(MetaData())
+    t.append_constraint(PrimaryKeyConstraint(t.c.id, t.c.created_at))
+    t.c.id.autoincrement = True
+    t.c.created_at.nullable = False
+    t.dialect_options["postgresql"]["partition_by"] = "RANGE (created_at)"
+    t.create(conn)
+
+def ensure_brin_index(conn, table_name):
+    conn.execute(text(f'CREATE INDEX IF NOT EXISTS "ix_{table_name}_created_at_brin" ON "{table_name}" USING brin (created_at)'))
+
+def create_partition(conn, table_name, name, start, end):
+    # DEFAULT 에 이미 이 범위의 행이 있으면 CREATE ... PARTITION OF 가 실패하므로
+    # DEFAULT 를 떼어 내고 → 파티션 생성 → 해당 행을 옮긴 뒤 → 다시 DEFAULT 로 붙임 (한 트랜잭션 안)
+    default = f"{table_name}_default"
+    bounds = {"start": start, "end": end}  # created_at 은 timestamptz, 경계는 UTC aware
+    moving = False
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": default}).scalar() is not None:
+        moving = conn.execute(
+            text(f'SELECT EXISTS (SELECT 1 FROM "{default}" WHERE created_at >= :start AND created_at < :end)'), bounds
+        ).scalar()
+    if moving:
+        conn.execute(text(f'ALTER TABLE "{table_name}" DETACH PARTITION "{default}"'))
+    conn.execute(text(
+        f'CREATE TABLE "{name}" PARTITION OF "{table_name}" '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    if moving:
+        where = "WHERE created_at >= :start AND created_at < :end"
+        moved = conn.execute(text(f'INSERT INTO "{name}" SELECT * FROM "{default}" {where}'), bounds).rowcount
+        conn.execute(text(f'DELETE FROM "{default}" {where}'), bounds)
+        conn.execute(text(f'ALTER TABLE "{table_name}" ATTACH PARTITION "{default}" DEFAULT'))
+        log.info("%s 의 DEFAULT 파티션에 있던 %d 행을 %s 로 옮김", table_name, moved, name)
+
+def ensure_partitions(conn, table_name, interval, premake, now=None):
+    # 현재 기간부터 premake 개 앞까지 + DEFAULT 파티션
+    now = now or datetime.now(timezone.utc)
+    step = INTERVALS[interval]
+    start = period_start(now, interval)
+    created = []
+    for _ in range(premake + 1):
+        end = start + step
+        name = partition_name(table_name, start)
+        exists = conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists is None:
+            create_partition(conn, table_name, name, start, end)
+            created.append(name)
+        start = end
+    conn.execute(text(f'CREATE TABLE IF NOT EXISTS "{table_name}_default" PARTITION OF "{table_name}" DEFAULT'))
+    return created
+
+def list_partitions(conn, table_name):
+    # [(파티션 이름, 시작 시각)] - 이 모듈의 이름 규칙(<table>_pYYYYMMDD)을 따르는 것만
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :name ORDER BY c.relname"
+    ), {"name": table_name}).scalars().all()
+    pattern = _name_pattern(table_name)
+    result = []
+    for name in names:
+        m = pattern.match(name)
+        if m:
+            result.append((name, datetime.strptime(m.group(1), "%Y%m%d").replace(tzinfo=timezone.utc)))
+    return result
+
+def drop_expired_partitions(conn, table_name, interval, retention, now=None):
+    # 파티션 끝 시각이 보관 기간보다 오래된 파티션만 DROP (일부라도 보관 기간 안이면 유지)
+    if not retention:
+        return []
+    now = now or datetime.now(timezone.utc)
+    cutoff = now - retention
+    dropped = []
+    for name, start in list_partitions(conn, table_name):
+        if start + INTERVALS[interval] <= cutoff:
+            conn.execute(text(f'DROP TABLE "{name}"'))
+            dropped.append(name)
+    return dropped
+
+class PartitionManager:
+    # 시작 시 한 번 setup(), 이후 백그라운드 스레드가 check_interval 초마다 파티션 생성 / 보관 기간 정리
+    def __init__(self, engine, tables, interval="day", premake=7, retention_days=0, check_interval=3600):
+        if interval not in INTERVALS:
+            raise ValueError(f"PARTITION_INTERVAL 은 {list(INTERVALS)} 중 하나여야 합니다: {interval}")
+        self.engine = engine
+        self.tables = tables
+        self.interval = interval
+        self.premake = premake
+        self.retention = timedelta(days=retention_days) if retention_days > 0 else None
+        self.check_interval = check_interval
+
+        self._active = []  # 실제로 파티션 테이블인 것만
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.created = []
+        self.dropped = []
+        self.last_run = None
+        self.errors = 0
+
+    def setup(self):
+        # Base.metadata.create_all 보다 먼저 불러야 함
+        with self.engine.begin() as conn:
+            for table in self.tables:
+                state = is_partitioned(conn, table.name)
+                if state is None:
+                    create_partitioned_table(conn, table)
+                    state = True
+                if state:
+                    ensure_brin_index(conn, table.name)
+                    self._active.append(table.name)
+                else:
+                    log.warning("%s 는 일반 테이블이라 파티션 관리를 건너뜁니다 (README 의 이전 방법 참고)", table.name)
+        self.run_once()
+
+    def run_once(self, now=None):
+        # 테이블마다 따로 트랜잭션 - 한 테이블이 실패해도 나머지는 계속 관리
+        for name in self._active:
+            try:
+                with self.engine.begin() as conn:
+                    self.created += ensure_partitions(conn, name, self.interval, self.premake, now)
+                    self.dropped += drop_expired_partitions(conn, name, self.interval, self.retention, now)
+            except Exception:
+                self.errors += 1
+                log.exception("%s 파티션 관리 실패", name)
+        self.last_run = datetime.now(timezone.utc)
+
+    def start(self):
+        if self._thread is not None or not self._active:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="partition-manager", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            self.run_once()
+
+    def stats(self):
+        with self.engine.connect() as conn:
+            partitions = {name: [p for p, _ in list_partitions(conn, name)] for name in self._active}
+        return {
+            "interval": self.interval,
+            "premake": self.premake,
+            "retention_days": self.retention.days if self.retention else None,
+            "partitions": partitions,
+            "created": self.created[-50:],
+            "dropped": self.dropped[-50:],
+            "last_run": self.last_run,
+            "errors": self.errors,
+        }
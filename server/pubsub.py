@@ -0,0 +1,92 @@
+# pubsub.py
+# 저장 경로에서 들어온 새 측정값/탐지 결과를 WebSocket / SSE 구독자에게 바로 밀어주는 프로세스 내 pub/sub
+#
+# - 구독자마다 크기가 정해진 asyncio.Queue 를 가짐
+# - 큐가 가득 찬(따라오지 못하는) 구독자는 끊어서 다른 구독자와 저장 경로가 느려지지 않게 함
+# - publish() 는 스레드풀(동기 라우트)이나 flush 스레드에서 불러도 되도록 call_soon_threadsafe 로 전달
+
+import asyncio
+import threading
+
+class Subscription:
+    def __init__(self, loop, sensor_ids, kinds, maxsize):
+        self.loop = loop
+        self.sensor_ids = set(sensor_ids) if sensor_ids else None  # None 이면 전체 센서
+        self.kinds = set(kinds) if kinds else None  # None 이면 전체 종류
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def wants(self, kind, sensor_id):
+        return (self.kinds is None or kind in self.kinds) and \
+               (self.sensor_ids is None or sensor_id in self.sensor_ids)
+
+    def _offer(self, message):
+        # 이벤트 루프 스레드에서 실행됨
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 느린 구독자 - 큐를 비우고 종료 신호(None)만 남김
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self):
+        # 다음 (kind, message), 끊긴 구독이면 None
+        return await self.queue.get()
+
+class Broker:
+    def __init__(self, queue_size=256):
+        self.queue_size = queue_size
+        self._subs = set()
+        self._lock = threading.Lock()
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, sensor_ids=None, kinds=None):
+        sub = Subscription(asyncio.get_running_loop(), sensor_ids, kinds, self.queue_size)
+        with self._lock:
+            self._subs.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+        if sub.dropped:
+            self.dropped_subscribers += 1
+
+    def has_subscribers(self):
+        return bool(self._subs)
+
+    def publish(self, kind, sensor_id, message):
+        if not self._subs:
+            return
+        self.published += 1
+        with self._lock:
+            targets = [s for s in self._subs if not s.dropped and s.wants(kind, sensor_id)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, (kind, message))
+                self.delivered += 1
+            except RuntimeError:
+                # 이벤트 루프가 이미 닫힌 구독자
+                pass
+
+    def publish_many(self, kind, rows, key_field="sensor_id"):
+        if not self._subs:
+            return
+        for row in rows:
+            self.publish(kind, row[key_field], row)
+
+    def stats(self):
+        return {
+            "subscribers": len(self._subs),
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
@@ -0,0 +1,151 @@
+# recent_cache.py
+# 센서별 최근 N개 측정값/탐지 결과를 메모리에 들고 있는 캐시 ("recent" 조회를 DB 없이 응답)
+#
+# - 센서 항목은 DB 에서 읽은 최근 행으로만 만듦(fill: 서버 시작 시 warm, 조회 miss 후)
+#   저장 경로의 add() 는 이미 있는 항목에만 넣음 - 항목이 없을 때 넣으면 보드가 보낸 과거 시각(created_at)의 행이
+#   캐시의 시작점이 되어, 그 사이 DB 행을 건너뛴 "최근" 목록을 돌려주게 됨
+# - miss 후 DB 를 읽는 동안 저장된 행은 pending 에 모아 두었다가 fill 때 합침 (id 로 중복 제거)
+# - 센서당 capacity 개, 센서 수는 max_keys 개로 제한 → 전체 메모리 상한 = max_keys * capacity 행
+#   (센서 수를 넘으면 가장 오래 안 쓰인 센서부터 제거)
+# - complete=True 인 센서는 DB 에 있는 행 전체가 캐시에 있다는 뜻 (행이 capacity 개 미만)
+# - 프로세스 단위 캐시이므로 uvicorn 워커를 여러 개 띄우면 다른 워커의 저장은 보이지 않음
+
+import bisect
+import threading
+from collections import OrderedDict
+from datetime import timezone
+from types import SimpleNamespace
+
+def _sort_key(row):
+    # DB 에서 읽은 값(tz 있음)과 저장 직전 값(utcnow, tz 없음)이 섞여도 비교되도록 epoch 로 변환
+    dt = row.created_at
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt.timestamp(), row.id if row.id is not None else 0)
+
+class _Entry:
+    __slots__ = ("rows", "keys", "complete")
+
+    def __init__(self):
+        self.rows = []  # (created_at, id) 오름차순
+        self.keys = []
+        self.complete = False
+
+class RecentCache:
+    def __init__(self, capacity=100, max_keys=1000, name="recent"):
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.name = name
+        self._entries = OrderedDict()
+        self._pending = OrderedDict()  # miss 후 fill 을 기다리는 센서 → 그동안 add 된 행
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._entries.move_to_end(key)
+        return entry
+
+    def _insert(self, entry, row):
+        sort_key = _sort_key(row)
+        if not entry.complete and entry.keys and sort_key < entry.keys[0]:
+            # 캐시 범위보다 오래된 행 - 그 사이 DB 행을 모르므로 넣지 않음
+            return
+        pos = bisect.bisect_right(entry.keys, sort_key)
+        entry.keys.insert(pos, sort_key)
+        entry.rows.insert(pos, row)
+        if len(entry.rows) > self.capacity:
+            # 가장 오래된 행을 버리면 더 이상 DB 전체를 들고 있는 것이 아님
+            del entry.keys[0]
+            del entry.rows[0]
+            entry.complete = False
+
+    def _add(self, key, row):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self._insert(entry, row)
+            return
+        pending = self._pending.get(key)
+        if pending is not None:
+            pending.append(row)
+            if len(pending) > self.capacity:
+                del pending[0]
+
+    def add(self, key, row):
+        # row: dict (id, created_at 포함) - 캐시에 없는 센서는 무시 (다음 조회 miss 때 DB 에서 채움)
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            self._add(key, SimpleNamespace(**row))
+
+    def add_many(self, rows, key_field="sensor_id"):
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            for row in rows:
+                self._add(row[key_field], SimpleNamespace(**row))
+
+    def fill(self, key, rows, complete):
+        # DB 에서 읽은 최신순 행으로 센서 캐시를 다시 채움 (warm / miss 후 채우기)
+        # 기존 항목 / pending 에 있던 행 중 DB 조회 결과에 없는 것(조회 이후 저장된 행)은 합침
+        if self.capacity <= 0:
+            return
+        with self._lock:
+            extra = self._pending.pop(key, [])
+            old = self._entries.get(key)
+            if old is not None:
+                extra = old.rows + extra
+            entry = self._entry(key)
+            entry.rows, entry.keys = [], []
+            entry.complete = True
+            for row in reversed(rows[:self.capacity]):
+                self._insert(entry, SimpleNamespace(**row))
+            # 여기부터는 실제 완전성 기준 - 불완전하면 캐시 범위보다 오래된 행은 _insert 에서 버려짐
+            entry.complete = complete and len(rows) <= self.capacity
+            seen = {r.id for r in entry.rows}
+            for row in extra:
+                if row.id not in seen:
+                    seen.add(row.id)
+                    self._insert(entry, row)
+
+    def get(self, key, count):
+        # 최신순 최대 count 개, 캐시만으로 답할 수 없으면 None
+        if self.capacity <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and count <= self.capacity and (count <= len(entry.rows) or entry.complete):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.rows[::-1][:count]
+            self.misses += 1
+            if entry is None and count <= self.capacity and key not in self._pending:
+                # 호출한 쪽이 DB 를 읽어 fill 할 예정 - 그 사이 저장되는 행을 모아 둠
+                self._pending[key] = []
+                if len(self._pending) > self.max_keys:
+                    self._pending.popitem(last=False)
+            return None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "sensors": len(self._entries),
+                "rows": sum(len(e.rows) for e in self._entries.values()),
+                "capacity_per_sensor": self.capacity,
+                "max_sensors": self.max_keys,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,68 @@
+# registry_cache.py
+# 센서 메타데이터(sensor_info) 조회 결과 캐시 - 대시보드가 열릴 때마다 읽는 목록을 DB 없이 응답
+#
+# - 키는 조회 조건 (tag 목록, owner), 값은 응답용 dict 목록
+# - 센서 등록(register_sensor) 이 커밋되면 invalidate() 로 전체 삭제
+# - 다른 워커/프로세스에서 등록한 센서는 invalidate 가 전달되지 않으므로 ttl 초가 지나면 다시 읽음
+# - ttl <= 0 이면 캐시 사용 안 함
+
+import threading
+import time
+from collections import OrderedDict
+
+class RegistryCache:
+    def __init__(self, ttl=30.0, max_keys=256):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries = OrderedDict()  # key → (저장 시각, 값)
+        self._lock = threading.Lock()
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def generation(self):
+        # 조회 시작 전에 받아 두었다가 put() 에 넘김 - 조회 중에 등록이 끼어들면 오래된 결과를 저장하지 않도록
+        return self._generation
+
+    def get(self, key):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, generation):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "keys": len(self._entries),
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+            }
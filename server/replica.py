@@ -0,0 +1,125 @@
+# replica.py
+# 읽기 요청(GET/HEAD) 을 읽기 전용 복제본(read replica) 으로 보내는 라우팅 상태
+#
+# - 복제본이 있으면 GET/HEAD 세션은 복제본에서, 나머지(저장) 는 primary 에서 엶
+# - check_interval 초마다 복제본에 복제 지연을 조회 → 연결 실패 / 지연이 max_lag 초를 넘으면 primary 로 보냄
+# - 요청 중 복제본 연결이 실패하면 mark_down() → 다음 점검이 성공할 때까지 복제본을 쓰지 않음
+# - 복제 지연은 PostgreSQL 스트리밍 복제에서만 측정 (다른 DB 는 SELECT 0, 지연 없음으로 간주)
+
+import asyncio
+import logging
+import threading
+import time
+
+log = logging.getLogger("replica")
+
+READ_METHODS = ("GET", "HEAD")
+
+# primary 이거나 받은 WAL 을 모두 재생했으면 0, 재생 중이면 마지막 재생 트랜잭션 이후 경과 시간(초)
+LAG_SQL = {
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+def lag_sql(dialect_name):
+    return LAG_SQL.get(dialect_name, "SELECT 0")
+
+class ReplicaRouter:
+    def __init__(self, enabled, max_lag=5.0, check_interval=5.0):
+        self.enabled = enabled  # 복제본 URL 이 설정되어 있는지
+        self.max_lag = max_lag  # 0 이면 지연은 보지 않음
+        self.check_interval = check_interval
+        self.healthy = enabled
+        self.lag = None  # 마지막으로 잰 복제 지연(초), 모르면 None
+        self.last_check = None
+        self.last_error = None
+        self.checks = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def route(self, method):
+        # "replica" 면 복제본 사용, 그 외 값은 primary 로 보내는 이유
+        if method not in READ_METHODS:
+            return "write"
+        if not self.enabled:
+            return "no_replica"
+        if not self.healthy:
+            return "down"
+        if self.max_lag > 0 and self.lag is not None and self.lag > self.max_lag:
+            return "lag"
+        return "replica"
+
+    def mark_down(self, error):
+        self.healthy = False
+        self.failures += 1
+        self.last_error = str(error).splitlines()[0][:200] if str(error) else type(error).__name__
+        log.warning("읽기 복제본 사용 중지: %s", self.last_error)
+
+    def _record(self, lag):
+        if not self.healthy:
+            log.info("읽기 복제본 복구 (지연 %s 초)", lag)
+        self.healthy = True
+        self.lag = float(lag) if lag is not None else None
+        self.last_check = time.time()
+        self.checks += 1
+
+    # ---- 동기 엔진 점검 (server.py, 백그라운드 스레드) ----
+    def check(self, engine):
+        try:
+            with engine.connect() as conn:
+                lag = conn.exec_driver_sql(lag_sql(engine.dialect.name)).scalar()
+        except Exception as e:
+            self.mark_down(e)
+            return
+        self._record(lag)
+
+    def start(self, engine):
+        if not self.enabled or self._thread is not None:
+            return
+        self.check(engine)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(engine,), name="replica-check", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def _run(self, engine):
+        while not self._stop.wait(self.check_interval):
+            self.check(engine)
+
+    # ---- 비동기 엔진 점검 (server_async.py, asyncio 태스크) ----
+    async def acheck(self, async_engine):
+        try:
+            async with async_engine.connect() as conn:
+                lag = (await conn.exec_driver_sql(lag_sql(async_engine.dialect.name))).scalar()
+        except Exception as e:
+            self.mark_down(e)
+            return
+        self._record(lag)
+
+    async def arun(self, async_engine):
+        # 시작 시 한 번 점검 후 check_interval 마다 반복 (종료 시 태스크 cancel)
+        while True:
+            await self.acheck(async_engine)
+            await asyncio.sleep(self.check_interval)
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "healthy": self.healthy,
+            "lag": self.lag,
+            "max_lag": self.max_lag,
+            "check_interval": self.check_interval,
+            "last_check": self.last_check,
+            "last_error": self.last_error,
+            "checks": self.checks,
+            "failures": self.failures,
+        }
@@ -0,0 +1,207 @@
+# rollups.py
+# 온도/습도 시간 버킷 집계 (min/max/avg/count) 와 1m/1h/1d 롤업 테이블 유지용 함수 모음
+#
+# - 롤업 테이블에는 버킷별 count / sum / min / max 를 저장 → 여러 버킷을 다시 합쳐도 값이 정확함
+# - 저장 시점에 같은 트랜잭션 안에서 upsert (ON CONFLICT DO UPDATE) 로 누적
+# - 집계 조회 시 요청 버킷 크기로 나누어 떨어지는 가장 큰 롤업을 사용, 없으면 원본 sensor_data 를 GROUP BY
+
+import calendar
+import re
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, insert, delete, cast, Integer, Float
+from sqlalchemy.dialects import postgresql, sqlite
+
+# 롤업 단위 (이름 → 초), 큰 단위부터 확인
+ROLLUP_SIZES = {"1d": 86400, "1h": 3600, "1m": 60}
+
+BUCKET_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+def parse_bucket(bucket):
+    # "30s", "5m", "1h", "1d" → 초
+    m = re.fullmatch(r"(\d+)([smhd])", bucket or "")
+    if not m or int(m.group(1)) == 0:
+        raise HTTPException(status_code=422, detail="bucket 은 30s, 5m, 1h, 1d 같은 형식이어야 합니다")
+    return int(m.group(1)) * BUCKET_UNITS[m.group(2)]
+
+def to_epoch(dt):
+    # naive datetime 은 UTC 로 간주 (저장 시 datetime.utcnow 사용)
+    return calendar.timegm(dt.utctimetuple())
+
+def floor_time(dt, seconds):
+    epoch = to_epoch(dt)
+    return datetime.utcfromtimestamp(epoch - epoch % seconds)
+
+def bucket_expr(dialect_name, column, seconds):
+    # 시각 컬럼을 버킷 시작 시각(epoch 초)으로 내림
+    if dialect_name == "sqlite":
+        epoch = cast(func.strftime("%s", column), Integer)
+        return (epoch // seconds) * seconds
+    epoch = func.extract("epoch", column)
+    return cast(func.floor(epoch / seconds) * seconds, Integer)
+
+def pick_rollup(bucket_seconds):
+    for name, size in ROLLUP_SIZES.items():
+        if bucket_seconds % size == 0:
+            return name, size
+    return None, None
+
+def rollup_values(rows):
+    # 저장할 원본 행들을 롤업 단위/센서/버킷별로 미리 합침
+    # (한 INSERT 안에 같은 키가 두 번 나오면 PostgreSQL ON CONFLICT 가 실패하므로)
+    acc = {}
+    for r in rows:
+        t, h = r["temperature"], r["humidity"]
+        epoch = to_epoch(r["created_at"])
+        for name, size in ROLLUP_SIZES.items():
+            key = (name, r["sensor_id"], epoch - epoch % size)
+            v = acc.get(key)
+            if v is None:
+                acc[key] = [1, t, t, t, h, h, h]
+            else:
+                v[0] += 1
+                v[1] += t
+                v[2] = min(v[2], t)
+                v[3] = max(v[3], t)
+                v[4] += h
+                v[5] = min(v[5], h)
+                v[6] = max(v[6], h)
+    return [
+        {
+            "bucket_size": name,
+            "sensor_id": sensor_id,
+            "bucket_start": datetime.utcfromtimestamp(start),
+            "count": v[0],
+            "sum_temperature": v[1],
+            "min_temperature": v[2],
+            "max_temperature": v[3],
+            "sum_humidity": v[4],
+            "min_humidity": v[5],
+            "max_humidity": v[6],
+        }
+        for (name, sensor_id, start), v in acc.items()
+    ]
+
+def rollup_upserts(dialect_name, rollup_model, rows, chunk_size=1000):
+    # 롤업 테이블 누적 upsert 문 목록 (rows 가 비어 있으면 빈 목록)
+    # 롤업 행 하나에 bind 파라미터 10개 - 큰 배치도 한 문장이 Postgres/asyncpg 한도(32767) 를 넘지 않도록 chunk_size 행씩 나눔
+    values = rollup_values(rows)
+    return [_upsert(dialect_name, rollup_model, values[start:start + chunk_size])
+            for start in range(0, len(values), chunk_size)]
+
+def _upsert(dialect_name, rollup_model, values):
+    if dialect_name == "sqlite":
+        stmt = sqlite.insert(rollup_model).values(values)
+        least, greatest = func.min, func.max  # SQLite 는 인자 2개 min/max 가 스칼라 함수
+    else:
+        stmt = postgresql.insert(rollup_model).values(values)
+        least, greatest = func.least, func.greatest
+    t = rollup_model.__table__.c
+    ex = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=["bucket_size", "sensor_id", "bucket_start"],
+        set_={
+            "count": t.count + ex.count,
+            "sum_temperature": t.sum_temperature + ex.sum_temperature,
+            "min_temperature": least(t.min_temperature, ex.min_temperature),
+            "max_temperature": greatest(t.max_temperature, ex.max_temperature),
+            "sum_humidity": t.sum_humidity + ex.sum_humidity,
+            "min_humidity": least(t.min_humidity, ex.min_humidity),
+            "max_humidity": greatest(t.max_humidity, ex.max_humidity),
+        },
+    )
+
+def raw_aggregate_query(dialect_name, data_model, sensor_id, bucket_seconds, start_time, end_time):
+    bucket = bucket_expr(dialect_name, data_model.created_at, bucket_seconds).label("bucket")
+    return (
+        select(
+            bucket,
+            func.count().label("count"),
+            func.min(data_model.temperature), func.max(data_model.temperature), func.avg(data_model.temperature),
+            func.min(data_model.humidity), func.max(data_model.humidity), func.avg(data_model.humidity),
+        )
+        .where(data_model.sensor_id == sensor_id)
+        .where(data_model.created_at >= start_time)
+        .where(data_model.created_at < end_time)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+
+def rollup_aggregate_query(dialect_name, rollup_model, rollup_name, sensor_id, bucket_seconds, start_time, end_time):
+    m = rollup_model
+    bucket = bucket_expr(dialect_name, m.bucket_start, bucket_seconds).label("bucket")
+    total = func.sum(m.count)
+    return (
+        select(
+            bucket,
+            total.label("count"),
+            func.min(m.min_temperature), func.max(m.max_temperature), cast(func.sum(m.sum_temperature), Float) / total,
+            func.min(m.min_humidity), func.max(m.max_humidity), cast(func.sum(m.sum_humidity), Float) / total,
+        )
+        .where(m.bucket_size == rollup_name)
+        .where(m.sensor_id == sensor_id)
+        # 롤업은 버킷 단위로만 합칠 수 있으므로 from 을 롤업 버킷 경계로 내림
+        .where(m.bucket_start >= floor_time(start_time, ROLLUP_SIZES[rollup_name]))
+        .where(m.bucket_start < end_time)
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+
+def aggregate_rows_to_dicts(rows):
+    return [
+        {
+            "bucket_start": datetime.utcfromtimestamp(int(b)),
+            "count": int(count),
+            "temperature": {"min": t_min, "max": t_max, "avg": t_avg},
+            "humidity": {"min": h_min, "max": h_max, "avg": h_avg},
+        }
+        for b, count, t_min, t_max, t_avg, h_min, h_max, h_avg in rows
+    ]
+
+def rebuild_rollups(db, data_model, rollup_model, start_time, end_time):
+    # 원본 sensor_data 로 [start_time, end_time) 구간 롤업을 다시 계산 (기존 데이터 백필용, 동기 세션)
+    dialect_name = db.get_bind().dialect.name
+    rebuilt = 0
+    for name, size in ROLLUP_SIZES.items():
+        # 구간 양 끝을 롤업 버킷 경계로 넓혀서 버킷이 일부만 다시 계산되지 않게 함
+        start = floor_time(start_time, size)
+        end = floor_time(end_time, size)
+        if to_epoch(end) < to_epoch(end_time):
+            end += timedelta(seconds=size)
+        db.execute(
+            delete(rollup_model)
+            .where(rollup_model.bucket_size == name)
+            .where(rollup_model.bucket_start >= start)
+            .where(rollup_model.bucket_start < end)
+        )
+        bucket = bucket_expr(dialect_name, data_model.created_at, size).label("bucket")
+        rows = db.execute(
+            select(
+                data_model.sensor_id, bucket, func.count(),
+                func.sum(data_model.temperature), func.min(data_model.temperature), func.max(data_model.temperature),
+                func.sum(data_model.humidity), func.min(data_model.humidity), func.max(data_model.humidity),
+            )
+            .where(data_model.created_at >= start)
+            .where(data_model.created_at < end)
+            .group_by(data_model.sensor_id, bucket)
+        ).all()
+        values = [
+            {
+                "bucket_size": name,
+                "sensor_id": sensor_id,
+                "bucket_start": datetime.utcfromtimestamp(int(b)),
+                "count": count,
+                "sum_temperature": t_sum,
+                "min_temperature": t_min,
+                "max_temperature": t_max,
+                "sum_humidity": h_sum,
+                "min_humidity": h_min,
+                "max_humidity": h_max,
+            }
+            for sensor_id, b, count, t_sum, t_min, t_max, h_sum, h_min, h_max in rows
+        ]
+        if values:
+            db.execute(insert(rollup_model), values)
+        rebuilt += len(values)
+    return rebuilt
@@ -1,10 +1,36 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Depends, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime
-from sqlalchemy.orm import declarative_base, sessionmaker
-from datetime import datetime
+from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, Boolean, ForeignKey, Index, UniqueConstraint, insert, select, tuple_, func, cast
+from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.exc import OperationalError
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional, Dict
+import os
+import json
+import asyncio
+import logging
+import math
+from ingest_buffer import WriteBehindBuffer
+import rollups
+import export
+from recent_cache import RecentCache
+from occupancy import OccupancyTracker
+from pubsub import Broker
+from metrics import Metrics
+import binary_ingest
+from partitions import PartitionManager
+import fast_json
+from registry_cache import RegistryCache
+from anomaly import AnomalyDetector
+from replica import ReplicaRouter
+from compression import Compression
+from admission import AdmissionControl, TokenBuckets, parse_limits, retry_after_header, current_group
+
+log = logging.getLogger("server")
 
 #pydantic 모델 추가
 
@@ -30,31 +56,121 @@ class RTSPDetectionIn(BaseModel):
     sensor_id: str
     detections: List[DetectionItem]
 
+# pydantic 입력 모델 - rtsp_detection.py 가 보내는 프레임 단위 객체 ({"data": {"object1": {...}, ...}})
+class ObjectItem(BaseModel):
+    box_data: List[float]  # [x1, y1, x2, y2]
+    label_data: str
+    score: float
+    mid_point: List[float]  # [x, y]
+    grid_index: int  # 주차 칸 번호 (칸 밖이면 9999)
+
+class ObjectFrameIn(BaseModel):
+    sensor_id: str = "rtsp-car"
+    data: Dict[str, ObjectItem]
+
 
 # PostgreSQL 연결 문자열
-DB_URL = "" #DB URL
+DB_URL = os.getenv("DB_URL", "") #DB URL
+
+# 커넥션 풀 크기 (스레드풀 기본 40개보다 작으면 요청이 풀 대기에서 먼저 막힘)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
 
-engine = create_engine(DB_URL)
+def engine_options(url):
+    # SQLite 는 풀 옵션을 받지 않는 버전이 있어 PostgreSQL 등에만 지정
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": True,
+    }
+
+engine = create_engine(DB_URL, **engine_options(DB_URL))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 Base = declarative_base()
 
+# 읽기 복제본 (DB_READ_URL 이 있으면 GET/HEAD 요청은 복제본에서 읽음, 테이블 생성/저장은 항상 primary)
+DB_READ_URL = os.getenv("DB_READ_URL", "")
+DB_READ_MAX_LAG = float(os.getenv("DB_READ_MAX_LAG", "5"))  # 이보다 뒤처지면 primary 에서 읽음 (초, 0 이면 안 봄)
+DB_READ_CHECK_INTERVAL = float(os.getenv("DB_READ_CHECK_INTERVAL", "5"))
+
+read_engine = create_engine(DB_READ_URL, **engine_options(DB_READ_URL)) if DB_READ_URL else None
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False) if read_engine else SessionLocal
+replica_router = ReplicaRouter(read_engine is not None, DB_READ_MAX_LAG, DB_READ_CHECK_INTERVAL)
+
+def route_label(request):
+    route = request.scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+def open_db(request):
+    # 요청 메서드 / 복제본 상태에 따라 세션을 열고 (세션, 엔진, 이유) 반환
+    reason = replica_router.route(request.method)
+    if reason == "replica":
+        db = ReadSessionLocal()
+        try:
+            db.connection()
+            return db, "replica", "ok"
+        except OperationalError as e:
+            db.close()
+            replica_router.mark_down(e)
+            reason = "connect_error"
+    return SessionLocal(), "primary", reason
+
+# 요청마다 세션을 열고, 응답 후 닫아주는 의존성 (GET/HEAD 는 복제본으로 라우팅)
+def get_db(request: Request):
+    db, engine_name, reason = open_db(request)
+    db_session_routes.inc((route_label(request), engine_name, reason))
+    try:
+        yield db
+    except OperationalError as e:
+        # 복제본 연결이 요청 도중 끊긴 경우 - 다음 점검이 성공할 때까지 primary 로
+        if engine_name == "replica":
+            replica_router.mark_down(e)
+        raise
+    finally:
+        db.close()
+
+# 스트리밍 내보내기용 - 응답을 다 보낼 때까지 열어 둘 세션을 만드는 sessionmaker 를 고름
+def read_session_factory(request: Request):
+    reason = replica_router.route(request.method)
+    use_replica = reason == "replica"
+    db_session_routes.inc((route_label(request), "replica" if use_replica else "primary", "ok" if use_replica else reason))
+    return ReadSessionLocal if use_replica else SessionLocal
+
 #메타데이터 저장용 테이블
 class SensorInfo(Base):
     __tablename__ = "sensor_info"
     id = Column(Integer, primary_key=True, index=True)
     sensor_identifier = Column(String(100), unique=True, nullable=False)
     sensor_name = Column(String(100), nullable=False)
-    owner = Column(String(50), nullable=False)
+    owner = Column(String(50), nullable=False, index=True)
     description = Column(String(255))
     data_source_type = Column(String(50))
     internal_delivery_mode = Column(String(50))
     creator_id = Column(String(50))
     data_source_format = Column(String(50))
-    tags = Column(String(255))  # 간단하게 문자열 리스트를 쉼표로 저장
+    tags = Column(String(255))  # 간단하게 문자열 리스트를 쉼표로 저장 (응답용, 검색은 sensor_tags 로)
+
+# 센서 태그 (센서 하나에 태그 여러 행) - 태그로 센서를 찾을 때 (tag, sensor_info_id) 인덱스 사용
+class SensorTag(Base):
+    __tablename__ = "sensor_tags"
+    __table_args__ = (
+        Index("ix_sensor_tags_tag", "tag", "sensor_info_id"),
+    )
+    sensor_info_id = Column(Integer, ForeignKey("sensor_info.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String(100), primary_key=True)
 
 # ORM 모델 정의
 class SensorData(Base):
     __tablename__ = "sensor_data"
+    # 센서별 시간순 조회 / 키셋 페이지네이션용 복합 인덱스 (id 는 같은 시각의 행 구분용)
+    __table_args__ = (
+        Index("ix_sensor_data_sensor_id_created_at", "sensor_id", "created_at", "id"),
+        Index("ix_sensor_data_created_at", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     sensor_id = Column(String(100), nullable=False)
     temperature = Column(Float, nullable=False)
@@ -65,6 +181,18 @@ class SensorData(Base):
 class SensorDataIn(BaseModel):
     data: dict  # 이 안에 "temperature", "humidity"가 들어 있음
     
+# pydantic 모델 (배치 입력용) - 여러 센서의 측정값을 한 번에 전송
+class SensorReadingIn(BaseModel):
+    sensor_id: str
+    data: dict  # "temperature", "humidity"
+    created_at: Optional[datetime] = None  # 보드에서 측정 시각을 보내는 경우
+
+class SensorDataBatchIn(BaseModel):
+    readings: List[SensorReadingIn]
+
+# 한 INSERT 문에 넣을 최대 행 수 (PostgreSQL 파라미터 개수 제한 65535 대비)
+BATCH_INSERT_CHUNK = 1000
+
 # 출력용 Pydantic 모델
 class SensorDataOut(BaseModel):
     sensor_id: str
@@ -78,6 +206,9 @@ class SensorDataOut(BaseModel):
 # RTSP DB 테이블 추가
 class RTSPDetection(Base):
     __tablename__ = "rtsp_detections"
+    __table_args__ = (
+        Index("ix_rtsp_detections_sensor_id_created_at", "sensor_id", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     sensor_id = Column(String(100), nullable=False)
     label = Column(String(50), nullable=False)
@@ -88,205 +219,1149 @@ class RTSPDetection(Base):
     y2 = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
+# 객체 탐지 결과 테이블 (rtsp_detection.py → /rtsp-detections/rtsp-object)
+# bbox / 중심점은 JSON 문자열이 아니라 숫자 컬럼으로 저장해서 칸별 조회가 인덱스로 끝나도록 함
+class ObjectDetection(Base):
+    __tablename__ = "object_detections"
+    __table_args__ = (
+        Index("ix_object_detections_sensor_grid_created_at", "sensor_id", "grid_index", "created_at", "id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    sensor_id = Column(String(100), nullable=False)
+    label = Column(String(50), nullable=False)
+    score = Column(Float, nullable=False)
+    box_x1 = Column(Float, nullable=False)
+    box_y1 = Column(Float, nullable=False)
+    box_x2 = Column(Float, nullable=False)
+    box_y2 = Column(Float, nullable=False)
+    mid_x = Column(Float, nullable=False)
+    mid_y = Column(Float, nullable=False)
+    grid_index = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+# 주차 칸 현재 점유 상태 (입/출차 때만 갱신되는 materialized 테이블)
+class SlotOccupancy(Base):
+    __tablename__ = "slot_occupancy"
+    sensor_id = Column(String(100), primary_key=True)
+    grid_index = Column(Integer, primary_key=True)
+    occupied = Column(Boolean, nullable=False)
+    since = Column(DateTime(timezone=True))  # 현재 상태가 시작된 시각
+
+# 주차 칸 점유 이력 (출차 시 한 행) - 체류 시간 히스토그램용
+class SlotDwell(Base):
+    __tablename__ = "slot_dwell"
+    __table_args__ = (
+        Index("ix_slot_dwell_sensor_grid_left_at", "sensor_id", "grid_index", "left_at"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    sensor_id = Column(String(100), nullable=False)
+    grid_index = Column(Integer, nullable=False)
+    entered_at = Column(DateTime(timezone=True), nullable=False)
+    left_at = Column(DateTime(timezone=True), nullable=False)
+    dwell_seconds = Column(Float, nullable=False)
+
+# 온도/습도 롤업 테이블 (1m / 1h / 1d 버킷별 count, sum, min, max)
+class SensorDataRollup(Base):
+    __tablename__ = "sensor_data_rollup"
+    __table_args__ = (
+        UniqueConstraint("bucket_size", "sensor_id", "bucket_start", name="uq_sensor_data_rollup_bucket"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    bucket_size = Column(String(4), nullable=False)  # "1m", "1h", "1d"
+    sensor_id = Column(String(100), nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    count = Column(Integer, nullable=False)
+    sum_temperature = Column(Float, nullable=False)
+    min_temperature = Column(Float, nullable=False)
+    max_temperature = Column(Float, nullable=False)
+    sum_humidity = Column(Float, nullable=False)
+    min_humidity = Column(Float, nullable=False)
+    max_humidity = Column(Float, nullable=False)
+
+# 측정값 이상 탐지 결과 (anomaly.py) - kind: zscore(EWMA 평균에서 멀어짐) / rate(직전 값 대비 급변)
+class SensorAnomaly(Base):
+    __tablename__ = "sensor_anomalies"
+    __table_args__ = (
+        Index("ix_sensor_anomalies_sensor_id_created_at", "sensor_id", "created_at", "id"),
+        Index("ix_sensor_anomalies_created_at", "created_at", "id"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    sensor_id = Column(String(100), nullable=False)
+    metric = Column(String(20), nullable=False)  # temperature / humidity
+    kind = Column(String(10), nullable=False)
+    value = Column(Float, nullable=False)
+    expected = Column(Float, nullable=False)  # zscore: EWMA 평균, rate: 직전 값
+    score = Column(Float, nullable=False)  # zscore: 표준편차 배수, rate: 분당 변화량
+    created_at = Column(DateTime(timezone=True), nullable=False)  # 측정 시각
+
+# 저장 시 롤업 테이블도 함께 갱신할지 여부
+SENSOR_ROLLUPS = os.getenv("SENSOR_ROLLUPS", "1") == "1"
+
 # FastAPI 인스턴스 생성
 app = FastAPI()
 
+# PostgreSQL 이면 sensor_data / rtsp_detections 를 created_at 범위 파티션 테이블로 (PARTITION_INTERVAL 비우면 사용 안 함)
+PARTITION_INTERVAL = os.getenv("PARTITION_INTERVAL", "")  # day | week
+PARTITION_PREMAKE = int(os.getenv("PARTITION_PREMAKE", "7"))
+PARTITION_RETENTION_DAYS = int(os.getenv("PARTITION_RETENTION_DAYS", "0"))  # 0 이면 삭제 안 함
+PARTITION_CHECK_INTERVAL = float(os.getenv("PARTITION_CHECK_INTERVAL", "3600"))
+
+partition_manager = None
+if PARTITION_INTERVAL and engine.dialect.name == "postgresql":
+    partition_manager = PartitionManager(
+        engine, [SensorData.__table__, RTSPDetection.__table__],
+        interval=PARTITION_INTERVAL, premake=PARTITION_PREMAKE,
+        retention_days=PARTITION_RETENTION_DAYS, check_interval=PARTITION_CHECK_INTERVAL,
+    )
+    # create_all 보다 먼저 - 없는 테이블은 파티션 테이블로 생성
+    partition_manager.setup()
+
 # 이 한 줄이 테이블을 실제 DB에 만듭니다!
 Base.metadata.create_all(bind=engine)
+# 이미 있던 테이블에는 create_all 이 인덱스를 추가하지 않으므로 따로 확인 후 생성
+for table in (SensorInfo.__table__, SensorData.__table__, RTSPDetection.__table__, ObjectDetection.__table__):
+    for index in table.indexes:
+        index.create(bind=engine, checkfirst=True)
 
-# METHOD - POST - 센서 메타데이터 등록
-@app.post("/sensor-info/")
-def register_sensor(info: SensorInfoIn):
+# 키셋(커서) 페이지네이션 - after="<created_at>,<id>" 다음 행부터 limit 개
+PAGE_LIMIT_DEFAULT = 100
+PAGE_LIMIT_MAX = 1000
+
+def parse_cursor(after):
+    try:
+        created_at, row_id = after.rsplit(",", 1)
+        # URL 에서 "+00:00" 의 '+' 가 공백으로 바뀌어 들어오는 경우 복원
+        return datetime.fromisoformat(created_at.strip().replace(" ", "+")), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="after 는 '<created_at>,<id>' 형식이어야 합니다")
+
+def apply_keyset(query, model, after, limit, descending=True):
+    # Query(동기) 와 select()(비동기) 둘 다 filter/order_by/limit 를 지원
+    key = tuple_(model.created_at, model.id)
+    if after:
+        cursor = parse_cursor(after)
+        query = query.filter(key < cursor if descending else key > cursor)
+    if descending:
+        query = query.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at, model.id)
+    # 다음 페이지가 있는지 알기 위해 하나 더 가져옴
+    return query.limit(limit + 1)
+
+def split_page(rows, limit):
+    # (이번 페이지 행, 다음 커서 또는 None)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        return rows, f"{last.created_at.isoformat()},{last.id}"
+    return rows, None
+
+def finish_page(rows, limit, response: Response):
+    rows, cursor = split_page(rows, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+    return rows
+
+# 측정값 목록 응답 - ORM 객체 대신 SensorDataOut 컬럼만 튜플로 읽어 바로 JSON 으로 (fast_json.py)
+# id 는 응답에 넣지 않고 커서 계산용으로 맨 뒤에 붙임
+SENSOR_OUT_COLUMNS = ["sensor_id", "temperature", "humidity", "created_at"]
+
+def sensor_out_stmt():
+    return select(*[getattr(SensorData, c) for c in SENSOR_OUT_COLUMNS], SensorData.id)
+
+def sensor_page_response(rows, limit, layout):
+    # Response 를 직접 돌려주면 response 파라미터에 넣은 헤더는 버려지므로 커서 헤더도 여기서 넣음
+    rows, cursor = split_page(rows, limit)
+    return fast_json.json_response(rows, SENSOR_OUT_COLUMNS, layout, {"X-Next-Cursor": cursor} if cursor else None)
+
+LAYOUT_QUERY = Query("rows", regex="^(rows|columns)$", description="rows: 행 객체 배열 / columns: 컬럼별 배열")
+
+# 센서별 최근 값 캐시 - "recent" 조회를 DB 없이 응답 (RECENT_CACHE_SIZE=0 이면 사용 안 함)
+RECENT_CACHE_SIZE = int(os.getenv("RECENT_CACHE_SIZE", "100"))
+RECENT_CACHE_MAX_SENSORS = int(os.getenv("RECENT_CACHE_MAX_SENSORS", "1000"))
+RECENT_CACHE_WARM_HOURS = float(os.getenv("RECENT_CACHE_WARM_HOURS", "24"))
+
+sensor_cache = RecentCache(RECENT_CACHE_SIZE, RECENT_CACHE_MAX_SENSORS, name="sensor-data")
+rtsp_cache = RecentCache(RECENT_CACHE_SIZE, RECENT_CACHE_MAX_SENSORS, name="rtsp-detections")
+
+# 캐시 / 내보내기에서 쓰는 컬럼 (ORM 객체 대신 튜플로 읽음)
+SENSOR_EXPORT_COLUMNS = ["id", "sensor_id", "temperature", "humidity", "created_at"]
+RTSP_EXPORT_COLUMNS = ["id", "sensor_id", "label", "confidence", "x1", "y1", "x2", "y2", "created_at"]
+
+def recent_stmt(model, columns, sensor_id, limit):
+    return (
+        select(*[getattr(model, c) for c in columns])
+        .where(model.sensor_id == sensor_id)
+        .order_by(model.created_at.desc(), model.id.desc())
+        .limit(limit)
+    )
+
+def recent_fetch_limit(cache, count):
+    # 캐시에 담을 수 있는 크기면 capacity+1 개를 읽어 캐시도 채움 (+1 은 DB 에 더 있는지 확인용)
+    return cache.capacity + 1 if count <= cache.capacity else count
+
+def fill_recent(cache, sensor_id, rows, limit):
+    rows = [dict(r) for r in rows]
+    if limit == cache.capacity + 1:
+        cache.fill(sensor_id, rows, complete=len(rows) < limit)
+    return rows
+
+def warm_recent_caches():
+    # 최근 RECENT_CACHE_WARM_HOURS 시간 안에 데이터가 있는 센서만 미리 채움
+    if RECENT_CACHE_SIZE <= 0:
+        return
+    since = datetime.utcnow() - timedelta(hours=RECENT_CACHE_WARM_HOURS)
     db = SessionLocal()
     try:
-        sensor = SensorInfo(
-            sensor_identifier=info.sensor_identifier,
-            sensor_name=info.sensor_name,
-            owner=info.owner,
-            description=info.description,
-            data_source_type=info.data_source_type,
-            internal_delivery_mode=info.internal_delivery_mode,
-            creator_id=info.creator_id,
-            data_source_format=info.data_source_format,
-            tags=",".join(info.tags)  # List[str] → str
-        )
-        db.add(sensor)
-        db.commit()
-        db.refresh(sensor)
-        return {"message": "Sensor metadata 등록 완료!", "id": sensor.id}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        for model, columns, cache in (
+            (SensorData, SENSOR_EXPORT_COLUMNS, sensor_cache),
+            (RTSPDetection, RTSP_EXPORT_COLUMNS, rtsp_cache),
+        ):
+            sensor_ids = db.execute(
+                select(model.sensor_id).where(model.created_at >= since).distinct().limit(RECENT_CACHE_MAX_SENSORS)
+            ).scalars().all()
+            limit = recent_fetch_limit(cache, cache.capacity)
+            for sensor_id in sensor_ids:
+                rows = db.execute(recent_stmt(model, columns, sensor_id, limit)).mappings().all()
+                fill_recent(cache, sensor_id, rows, limit)
     finally:
         db.close()
 
-from typing import List
+# 센서 메타데이터 조회 캐시 (SENSOR_REGISTRY_CACHE_TTL=0 이면 사용 안 함)
+SENSOR_REGISTRY_CACHE_TTL = float(os.getenv("SENSOR_REGISTRY_CACHE_TTL", "30"))
+registry_cache = RegistryCache(SENSOR_REGISTRY_CACHE_TTL)
 
-# METHOD - POST - 센서 측정 데이터 주기적 저장
-@app.post("/sensor-data/{sensor_id}")
-def create_sensor_data(sensor_id: str, data: SensorDataIn):
+def registry_cache_key(tags, owner):
+    return (tuple(sorted(normalize_tags(tags or []))), owner or None)
+
+def backfill_sensor_tags():
+    # sensor_tags 도입 전에 등록된 센서의 쉼표 문자열 태그를 한 번 옮김
     db = SessionLocal()
     try:
-        sensor_entry = SensorData(
-            sensor_id=sensor_id,
-            temperature=data.data["temperature"],
-            humidity=data.data["humidity"],
-        )
-        db.add(sensor_entry)
-        db.commit()
-        db.refresh(sensor_entry)
-        return {"message": "센서 데이터 저장 완료!", "id": sensor_entry.id}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
+        if db.execute(select(SensorTag.sensor_info_id).limit(1)).first() is not None:
+            return
+        rows = []
+        for sensor_id, tags in db.execute(select(SensorInfo.id, SensorInfo.tags).where(SensorInfo.tags != "")):
+            rows += sensor_tag_rows(sensor_id, (tags or "").split(","))
+        if rows:
+            db.execute(insert(SensorTag), rows)
+            db.commit()
     finally:
         db.close()
 
-# METHOD - GET - 전체 센서 정보 조회
-@app.get("/sensor-info/")
-def get_sensor_info():
+# 새 측정값/탐지 결과 실시간 전달 (WebSocket / SSE 구독자별 큐 크기)
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+STREAM_KEEPALIVE = float(os.getenv("STREAM_KEEPALIVE", "15"))
+broker = Broker(STREAM_QUEUE_SIZE)
+
+def json_default(v):
+    return v.isoformat() if isinstance(v, datetime) else str(v)
+
+def stream_message(item):
+    kind, row = item
+    return json.dumps({"type": kind, "sensor_id": row["sensor_id"], "data": row}, ensure_ascii=False, default=json_default)
+
+# 주차 칸 점유 상태 - 연속 N 프레임 감지/미감지로 입/출차 판정
+OCCUPANCY_ENTER_FRAMES = int(os.getenv("OCCUPANCY_ENTER_FRAMES", "3"))
+OCCUPANCY_LEAVE_FRAMES = int(os.getenv("OCCUPANCY_LEAVE_FRAMES", "5"))
+OCCUPANCY_LABELS = set(os.getenv("OCCUPANCY_LABELS", "car,truck,bus,motorcycle").split(","))
+
+occupancy_tracker = OccupancyTracker(OCCUPANCY_ENTER_FRAMES, OCCUPANCY_LEAVE_FRAMES)
+
+# 측정값 스트리밍 이상 탐지 (ANOMALY_DETECTION=0 이면 사용 안 함)
+ANOMALY_DETECTION = os.getenv("ANOMALY_DETECTION", "1") == "1"
+ANOMALY_RESTORE_ROWS = int(os.getenv("ANOMALY_RESTORE_ROWS", "200"))
+
+anomaly_detector = AnomalyDetector(
+    alpha=float(os.getenv("ANOMALY_ALPHA", "0.05")),
+    z_threshold=float(os.getenv("ANOMALY_Z_THRESHOLD", "4")),
+    warmup=int(os.getenv("ANOMALY_WARMUP", "30")),
+    rate_thresholds={
+        "temperature": float(os.getenv("ANOMALY_TEMPERATURE_RATE", "5")),  # °C / 분
+        "humidity": float(os.getenv("ANOMALY_HUMIDITY_RATE", "20")),  # % / 분
+    },
+)
+
+def detect_anomalies(rows):
+    # 저장된 측정값 → INSERT 할 이상 행 (센서별 통계가 갱신되므로 측정값 커밋이 성공한 뒤에만 부름)
+    return anomaly_detector.process(rows) if ANOMALY_DETECTION and rows else []
+
+def save_anomalies(db, rows):
+    # 측정값 커밋 후 이상 탐지 → 이상 행은 따로 커밋 (실패해도 측정값은 이미 저장됨, 로그만 남김)
+    anomalies = detect_anomalies(rows)
+    if anomalies:
+        try:
+            db.execute(insert(SensorAnomaly), anomalies)
+            db.commit()
+        except Exception:
+            db.rollback()
+            log.exception("이상 탐지 결과 저장 실패")
+            return []
+    return anomalies
+
+def anomaly_stmt(sensor_id=None):
+    stmt = select(SensorAnomaly.id, SensorAnomaly.sensor_id, SensorAnomaly.metric, SensorAnomaly.kind,
+                  SensorAnomaly.value, SensorAnomaly.expected, SensorAnomaly.score, SensorAnomaly.created_at)
+    if sensor_id:
+        stmt = stmt.where(SensorAnomaly.sensor_id == sensor_id)
+    return stmt
+
+def anomaly_state_response(sensor_id):
+    state = anomaly_detector.snapshot(sensor_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="이 센서의 측정값이 아직 없습니다")
+    return dict(state, sensor_id=sensor_id)
+
+def restore_anomaly_state():
+    # 최근 RECENT_CACHE_WARM_HOURS 시간 안에 데이터가 있는 센서마다 최근 ANOMALY_RESTORE_ROWS 행으로 통계 복원
+    if not ANOMALY_DETECTION:
+        return
+    since = datetime.utcnow() - timedelta(hours=RECENT_CACHE_WARM_HOURS)
     db = SessionLocal()
     try:
-        sensors = db.query(SensorInfo).all()
-        result = []
-        for s in sensors:
-            result.append({
-                "sensor_identifier": s.sensor_identifier,
-                "sensor_name": s.sensor_name,
-                "owner": s.owner,
-                "description": s.description,
-                "tags": s.tags.split(",")  # 문자열을 다시 리스트로 변환
-            })
-        return result
+        sensor_ids = db.execute(
+            select(SensorData.sensor_id).where(SensorData.created_at >= since).distinct()
+        ).scalars().all()
+        for sensor_id in sensor_ids:
+            rows = db.execute(recent_stmt(SensorData, SENSOR_EXPORT_COLUMNS, sensor_id, ANOMALY_RESTORE_ROWS)).mappings().all()
+            anomaly_detector.restore(sensor_id, reversed(rows))
     finally:
         db.close()
 
-# METHOD - GET - 전체 센서 측정 값 조회
-@app.get("/sensor-data/", response_model=List[SensorDataOut])
-def read_all_data():
+def to_naive_utc(dt):
+    # DB(timestamptz) 에서 읽은 값과 utcnow 값을 같이 계산할 수 있도록 맞춤
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def load_occupancy_state():
     db = SessionLocal()
     try:
-        return db.query(SensorData).order_by(SensorData.created_at.desc()).all()
+        for row in db.query(SlotOccupancy).all():
+            occupancy_tracker.restore(row.sensor_id, row.grid_index, row.occupied, to_naive_utc(row.since))
     finally:
         db.close()
 
-# METHOD - GET - 특정 센서 측정 값 조회
-@app.get("/sensor-data/{sensor_id}", response_model=List[SensorDataOut])
-def read_sensor_data(sensor_id: str):
+def occupied_slots(frame):
+    return [obj.grid_index for obj in frame.data.values() if obj.label_data in OCCUPANCY_LABELS]
+
+def occupancy_changes(events):
+    # 트래커 이벤트 → DB 에 merge 할 ORM 객체들
+    changes = []
+    for event in events:
+        if event[0] == "enter":
+            _, sensor_id, grid_index, entered_at = event
+            changes.append(SlotOccupancy(sensor_id=sensor_id, grid_index=grid_index, occupied=True, since=entered_at))
+        else:
+            _, sensor_id, grid_index, entered_at, left_at = event
+            changes.append(SlotOccupancy(sensor_id=sensor_id, grid_index=grid_index, occupied=False, since=left_at))
+            if entered_at is not None:
+                changes.append(SlotDwell(
+                    sensor_id=sensor_id,
+                    grid_index=grid_index,
+                    entered_at=entered_at,
+                    left_at=left_at,
+                    dwell_seconds=(left_at - entered_at).total_seconds(),
+                ))
+    return changes
+
+def occupancy_response(sensor_id, grid_index=None):
+    now = datetime.utcnow()
+    slots = occupancy_tracker.snapshot(sensor_id)
+    if grid_index is not None:
+        slots = [s for s in slots if s["grid_index"] == grid_index]
+    for slot in slots:
+        since = slot["since"]
+        slot["duration_seconds"] = (now - since).total_seconds() if since is not None else None
+    return {
+        "sensor_id": sensor_id,
+        "occupied_count": sum(1 for s in slots if s["occupied"]),
+        "slots": slots,
+    }
+
+def dwell_histogram_stmt(sensor_id, grid_index, start_time, end_time, bin_seconds):
+    bucket = (cast(SlotDwell.dwell_seconds, Integer) // bin_seconds).label("bucket")
+    stmt = select(bucket, func.count()).where(SlotDwell.sensor_id == sensor_id)
+    if grid_index is not None:
+        stmt = stmt.where(SlotDwell.grid_index == grid_index)
+    if start_time is not None:
+        stmt = stmt.where(SlotDwell.left_at >= start_time)
+    if end_time is not None:
+        stmt = stmt.where(SlotDwell.left_at < end_time)
+    return stmt.group_by(bucket).order_by(bucket)
+
+def dwell_histogram_response(sensor_id, grid_index, bin_seconds, rows):
+    return {
+        "sensor_id": sensor_id,
+        "grid_index": grid_index,
+        "bin_seconds": bin_seconds,
+        "bins": [
+            {"from_seconds": b * bin_seconds, "to_seconds": (b + 1) * bin_seconds, "count": n}
+            for b, n in rows
+        ],
+    }
+
+# RTSP 탐지 결과 write-behind 버퍼 - POST 는 큐에 넣고 바로 응답, 백그라운드에서 일괄 INSERT
+def flush_rtsp_detections(rows):
+    # POST /rtsp-detections/ 의 INSERT 는 요청이 아니라 여기서 일어나므로 rtsp_ingest 의 DB 지연 예산에 넣어 잼
+    token = current_group.set("rtsp_ingest")
     db = SessionLocal()
     try:
-        return db.query(SensorData)\
-                 .filter(SensorData.sensor_id == sensor_id)\
-                 .order_by(SensorData.created_at.desc())\
-                 .all()
+        ids = []
+        for start in range(0, len(rows), BATCH_INSERT_CHUNK):
+            stmt = insert(RTSPDetection).values(rows[start:start + BATCH_INSERT_CHUNK]).returning(RTSPDetection.id)
+            ids.extend(db.execute(stmt).scalars().all())
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
+        current_group.reset(token)
+    # DB 에 들어간 뒤(id 확정 후) 최근 값 캐시 / 구독자에 반영
+    # 이미 커밋됐으므로 여기서 난 오류는 버퍼로 올리지 않음 (올리면 같은 batch 를 다시 INSERT)
+    try:
+        saved = [dict(row, id=row_id) for row, row_id in zip(rows, ids)]
+        rtsp_cache.add_many(saved)
+        broker.publish_many("rtsp_detections", saved)
+    except Exception:
+        log.exception("RTSP 탐지 결과 캐시/구독 반영 실패")
+
+rtsp_buffer = WriteBehindBuffer(
+    flush_rtsp_detections,
+    max_size=int(os.getenv("RTSP_BUFFER_MAX_SIZE", "20000")),
+    batch_size=int(os.getenv("RTSP_BUFFER_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("RTSP_BUFFER_FLUSH_INTERVAL", "0.5")),
+    name="rtsp-detections",
+    max_retries=int(os.getenv("RTSP_BUFFER_MAX_RETRIES", "8")),
+)
+
+# /metrics - 요청 지연·크기, INSERT 행 수, 커밋 시간, 커넥션 풀 / 버퍼 / 캐시 / 구독 상태
+metrics = Metrics()
+metrics.instrument_engine(engine, "sync")
+if read_engine is not None:
+    metrics.instrument_engine(read_engine, "sync-replica")
+db_session_routes = metrics.add_counter(
+    "db_session_route_total", "DB sessions opened per route, by engine (primary / replica) and routing reason",
+    ("route", "engine", "reason"))
+metrics.add_gauge("db_replica_state", "Read replica health (1 = in use) and last measured lag in seconds", ("state",),
+                  lambda: [(("healthy",), int(replica_router.healthy)), (("lag_seconds",), replica_router.lag or 0)]
+                  if replica_router.enabled else [])
+metrics.add_gauge("ingest_buffer_queue_depth", "Rows waiting in the write-behind buffer", ("buffer",),
+                  lambda: [((rtsp_buffer.name,), rtsp_buffer.depth())])
+metrics.add_gauge("ingest_buffer_rows", "Write-behind buffer row counters", ("buffer", "state"),
+                  lambda: [((rtsp_buffer.name, k), rtsp_buffer.stats()[k])
+                           for k in ("enqueued", "rejected", "flushed_rows", "failed_rows")])
+metrics.add_gauge("recent_cache_lookups", "Recent cache lookups", ("cache", "result"),
+                  lambda: [((name, r), n) for name, c in (("sensor-data", sensor_cache), ("rtsp-detections", rtsp_cache), ("sensor-info", registry_cache))
+                           for r, n in (("hit", c.hits), ("miss", c.misses))])
+metrics.add_gauge("sensor_anomaly_readings", "Readings checked / flagged by the streaming anomaly detector", ("state",),
+                  lambda: [(("processed",), anomaly_detector.processed), (("flagged",), anomaly_detector.flagged)])
+metrics.add_gauge("stream_subscribers", "Connected WebSocket / SSE subscribers", (),
+                  lambda: [((), broker.stats()["subscribers"])])
+
+# 요청 본문 gzip/deflate 해제 + 응답 압축 (metrics 미들웨어 안쪽 - 지표는 전송된 크기 기준)
+compression = Compression(
+    min_size=int(os.getenv("COMPRESS_MIN_SIZE", "1024")),
+    level=int(os.getenv("COMPRESS_LEVEL", "6")),
+    max_request_size=int(os.getenv("REQUEST_MAX_BODY_SIZE", str(64 * 1024 * 1024))),
+)
+compression.bytes_counter = metrics.add_counter(
+    "http_compression_bytes_total", "Body bytes before (identity) and after (compressed) gzip/deflate",
+    ("direction", "encoding", "form"))
+
+# admission control - 라우트 그룹별 동시 처리 수 / DB 지연 예산 초과 시 503, 센서별 전송 빈도 초과 시 429
+# 기존 배포의 동작이 바뀌지 않도록 기본은 모두 꺼짐 (운영자가 환경 변수로 켬)
+admission = AdmissionControl(
+    parse_limits(os.getenv("ADMISSION_LIMITS", "")),
+    latency_budget=float(os.getenv("ADMISSION_DB_LATENCY_BUDGET", "0")),
+)
+admission.db_latency.instrument(engine)
+admission.rejected_counter = metrics.add_counter(
+    "admission_rejected_total", "Requests (or batch rows) rejected by admission control", ("group", "reason"))
+metrics.add_gauge("admission_inflight", "Requests in progress per admission route group", ("group",),
+                  lambda: [((g,), n) for g, n in admission.inflight.items()])
+metrics.add_gauge("db_latency_seconds", "Recent DB statement latency used for the admission latency budget", (),
+                  lambda: [((), round(admission.db_latency.current(), 6))])
+# 센서(TPHM 보드) / 카메라 별 토큰 버킷 - 초당 요청 수, 순간 허용량 (rate 0 이면 제한 없음)
+sensor_rate = TokenBuckets(float(os.getenv("SENSOR_RATE_LIMIT", "0")), int(os.getenv("SENSOR_RATE_BURST", "20")))
+camera_rate = TokenBuckets(float(os.getenv("CAMERA_RATE_LIMIT", "0")), int(os.getenv("CAMERA_RATE_BURST", "60")))
+
+app.add_middleware(compression.middleware)
+app.add_middleware(admission.middleware)
+app.add_middleware(metrics.middleware)
+
+@app.on_event("startup")
+def start_ingest_buffers():
+    backfill_sensor_tags()
+    warm_recent_caches()
+    restore_anomaly_state()
+    load_occupancy_state()
+    rtsp_buffer.start()
+    if partition_manager:
+        partition_manager.start()
+    replica_router.start(read_engine)
+
+@app.on_event("shutdown")
+def stop_ingest_buffers():
+    # 종료 시 큐에 남은 탐지 결과를 모두 저장
+    rtsp_buffer.stop()
+    if partition_manager:
+        partition_manager.stop()
+    replica_router.stop()
 
-# METHOD - GET - 특정 센서 측정 값 조회 (TIME)
+# 동기/비동기 서버가 같이 쓰는 입력 변환 함수들
+def build_sensor_info(info: SensorInfoIn):
+    return SensorInfo(
+        sensor_identifier=info.sensor_identifier,
+        sensor_name=info.sensor_name,
+        owner=info.owner,
+        description=info.description,
+        data_source_type=info.data_source_type,
+        internal_delivery_mode=info.internal_delivery_mode,
+        creator_id=info.creator_id,
+        data_source_format=info.data_source_format,
+        tags=",".join(normalize_tags(info.tags))  # List[str] → str
+    )
+
+def normalize_tags(tags):
+    # 앞뒤 공백 제거, 빈 값 / 중복 제거 (순서 유지)
+    return list(dict.fromkeys(t.strip() for t in tags if t and t.strip()))
+
+def sensor_tag_rows(sensor_info_id, tags):
+    return [{"sensor_info_id": sensor_info_id, "tag": t} for t in normalize_tags(tags)]
+
+def sensor_info_stmt(tags=None, owner=None):
+    # tag 를 여러 개 주면 모두 가진 센서만 (태그 인덱스로 id 를 먼저 좁힘)
+    stmt = select(SensorInfo).order_by(SensorInfo.id)
+    if owner:
+        stmt = stmt.where(SensorInfo.owner == owner)
+    tags = normalize_tags(tags or [])
+    if tags:
+        tagged = (
+            select(SensorTag.sensor_info_id)
+            .where(SensorTag.tag.in_(tags))
+            .group_by(SensorTag.sensor_info_id)
+            .having(func.count() == len(tags))
+        )
+        stmt = stmt.where(SensorInfo.id.in_(tagged))
+    return stmt
+
+def sensor_info_to_dict(s):
+    return {
+        "sensor_identifier": s.sensor_identifier,
+        "sensor_name": s.sensor_name,
+        "owner": s.owner,
+        "description": s.description,
+        "tags": s.tags.split(",")  # 문자열을 다시 리스트로 변환
+    }
+
+def finite_float(value):
+    # 측정값 → float, NaN / ±inf 는 거절 (json.loads 는 NaN 과 1e400(→inf) 을 그대로 받아들임)
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("NaN/inf")
+    return value
+
+def build_sensor_rows(readings):
+    # 검증에 실패한 항목은 results 에 바로 기록, 나머지는 INSERT 할 rows 로
+    results = [None] * len(readings)
+    rows = []
+    row_positions = []
+    now = datetime.utcnow()
+    for i, item in enumerate(readings):
+        try:
+            if not item.sensor_id:
+                raise ValueError("sensor_id 가 비어 있습니다")
+            rows.append({
+                "sensor_id": item.sensor_id,
+                "temperature": finite_float(item.data["temperature"]),
+                "humidity": finite_float(item.data["humidity"]),
+                "created_at": item.created_at or now,
+            })
+            row_positions.append(i)
+        except (KeyError, TypeError, ValueError) as e:
+            results[i] = {"index": i, "status": "error", "detail": f"잘못된 측정값: {e}"}
+    return rows, row_positions, results
+
+# 센서별 전송 빈도 제한 - 넘으면 429 + Retry-After
+def check_rate(buckets, group, sensor_id):
+    wait = buckets.take(sensor_id)
+    if wait:
+        admission.record_rejection(group, "rate")
+        raise HTTPException(
+            status_code=429,
+            detail=f"{sensor_id}: 전송 빈도 한도를 넘었습니다. 잠시 후 다시 시도하세요.",
+            headers={"Retry-After": retry_after_header(wait)},
+        )
+
+def limit_batch_rows(rows, row_positions, results):
+    # 일괄 저장은 요청 하나에 센서마다 토큰 1개 - 한도를 넘은 센서의 항목만 rate_limited 로 빼고 나머지는 저장
+    waits = {}
+    for sensor_id in dict.fromkeys(row["sensor_id"] for row in rows):
+        wait = sensor_rate.take(sensor_id)
+        if wait:
+            waits[sensor_id] = wait
+    if not waits:
+        return rows, row_positions, results
+    kept, kept_positions = [], []
+    for row, i in zip(rows, row_positions):
+        wait = waits.get(row["sensor_id"])
+        if wait:
+            results[i] = {"index": i, "status": "rate_limited", "detail": "전송 빈도 한도 초과", "retry_after": round(wait, 3)}
+        else:
+            kept.append(row)
+            kept_positions.append(i)
+    admission.record_rejection("sensor_ingest", "rate", len(rows) - len(kept))
+    if not kept:
+        raise HTTPException(
+            status_code=429,
+            detail="모든 센서가 전송 빈도 한도를 넘었습니다. 잠시 후 다시 시도하세요.",
+            headers={"Retry-After": retry_after_header(min(waits.values()))},
+        )
+    return kept, kept_positions, results
+
+# 측정값 저장 본문 - JSON 또는 binary_ingest 의 압축 바이너리 포맷 (Content-Type 으로 구분)
+def parse_json_body(model, body):
+    try:
+        return model(**json.loads(body))
+    except ValueError as e:
+        if hasattr(e, "errors"):  # pydantic ValidationError
+            raise RequestValidationError(e.errors())
+        raise HTTPException(status_code=422, detail=f"JSON 파싱 실패: {e}")
+    except TypeError:
+        raise HTTPException(status_code=422, detail="JSON 본문은 객체여야 합니다")
+
+def decode_binary_body(content_type, body, sensor_id=None):
+    try:
+        return binary_ingest.decode(content_type, body, datetime.utcnow(), sensor_id)
+    except binary_ingest.UnsupportedFormat as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def sensor_batch_body(request: Request):
+    # POST /sensor-data/batch - (rows, row_positions, results)
+    content_type = request.headers.get("content-type")
+    body = await request.body()
+    if binary_ingest.is_binary(content_type):
+        return limit_batch_rows(*decode_binary_body(content_type, body))
+    return limit_batch_rows(*build_sensor_rows(parse_json_body(SensorDataBatchIn, body).readings))
+
+async def sensor_reading_body(sensor_id: str, request: Request):
+    # POST /sensor-data/{sensor_id} - INSERT 할 행 하나 (바이너리는 레코드 1개, sensor_id 는 경로 값 사용)
+    check_rate(sensor_rate, "sensor_ingest", sensor_id)  # 본문을 읽기 전에 확인
+    content_type = request.headers.get("content-type")
+    body = await request.body()
+    if binary_ingest.is_binary(content_type):
+        rows, _, results = decode_binary_body(content_type, body, sensor_id)
+        if len(results) != 1:
+            raise HTTPException(status_code=422, detail=f"레코드는 1개여야 합니다 (받은 개수: {len(results)})")
+        if not rows:
+            raise HTTPException(status_code=422, detail=results[0]["detail"])
+        return rows[0]
+    data = parse_json_body(SensorDataIn, body)
+    try:
+        return {
+            "sensor_id": sensor_id,
+            "temperature": finite_float(data.data["temperature"]),
+            "humidity": finite_float(data.data["humidity"]),
+            "created_at": datetime.utcnow(),
+        }
+    except (KeyError, TypeError, ValueError) as e:  # build_sensor_rows 와 같은 검증
+        raise HTTPException(status_code=422, detail=f"잘못된 측정값: {e}")
+
+def sensor_body_openapi(json_example):
+    # 본문을 직접 읽으므로 문서(/docs)에 받을 수 있는 Content-Type 을 따로 적어 줌
+    binary = {"schema": {"type": "string", "format": "binary"}}
+    return {"requestBody": {"required": True, "content": {
+        "application/json": {"schema": {"type": "object"}, "example": json_example},
+        binary_ingest.STRUCT_CONTENT_TYPE: binary,
+        binary_ingest.MSGPACK_CONTENT_TYPES[0]: binary,
+    }}}
+
+def batch_response(results, rows, row_positions, ids):
+    for i, row_id in zip(row_positions, ids):
+        results[i] = {"index": i, "status": "ok", "id": row_id}
+    return {
+        "message": "센서 데이터 일괄 저장 완료!",
+        "inserted": len(ids),
+        "failed": len(results) - len(ids),
+        "results": results,
+    }
+
+def build_rtsp_rows(payload: RTSPDetectionIn):
+    # created_at 은 flush 시점이 아니라 수신 시점으로 기록
+    now = datetime.utcnow()
+    rows = []
+    for det in payload.detections:
+        if len(det.bbox) != 4:
+            raise HTTPException(status_code=422, detail="bbox 는 [x1, y1, x2, y2] 4개 값이어야 합니다")
+        rows.append({
+            "sensor_id": payload.sensor_id,
+            "label": det.label,
+            "confidence": det.confidence,
+            "x1": det.bbox[0],
+            "y1": det.bbox[1],
+            "x2": det.bbox[2],
+            "y2": det.bbox[3],
+            "created_at": now,
+        })
+    return rows
+
+def enqueue_rtsp_rows(rows):
+    if not rtsp_buffer.put_many(rows):
+        raise HTTPException(
+            status_code=429,
+            detail="탐지 결과 저장 큐가 가득 찼습니다. 잠시 후 다시 시도하세요.",
+            headers={"Retry-After": "1"},
+        )
+    return {"message": "YOLO 추론 결과 저장 요청 완료!", "count": len(rows)}
+
+def build_object_rows(frame: ObjectFrameIn, now):
+    # 한 프레임의 객체는 모두 같은 수신 시각으로 기록
+    rows = []
+    for name, obj in frame.data.items():
+        if len(obj.box_data) != 4 or len(obj.mid_point) != 2:
+            raise HTTPException(status_code=422, detail=f"{name}: box_data 는 4개, mid_point 는 2개 값이어야 합니다")
+        rows.append({
+            "sensor_id": frame.sensor_id,
+            "label": obj.label_data,
+            "score": obj.score,
+            "box_x1": obj.box_data[0],
+            "box_y1": obj.box_data[1],
+            "box_x2": obj.box_data[2],
+            "box_y2": obj.box_data[3],
+            "mid_x": obj.mid_point[0],
+            "mid_y": obj.mid_point[1],
+            "grid_index": obj.grid_index,
+            "created_at": now,
+        })
+    return rows
+
+def object_detection_to_dict(r):
+    return {
+        "label": r.label,
+        "score": r.score,
+        "box_data": [r.box_x1, r.box_y1, r.box_x2, r.box_y2],
+        "mid_point": [r.mid_x, r.mid_y],
+        "grid_index": r.grid_index,
+        "timestamp": r.created_at
+    }
+
+def rtsp_detection_to_dict(r):
+    return {
+        "label": r.label,
+        "confidence": r.confidence,
+        "bbox": [r.x1, r.y1, r.x2, r.y2],
+        "timestamp": r.created_at
+    }
+
+# 스트리밍 내보내기용 쿼리
+def export_stmt(model, columns, sensor_id, start_time, end_time):
+    return (
+        select(*[getattr(model, c) for c in columns])
+        .where(model.sensor_id == sensor_id)
+        .where(model.created_at >= start_time)
+        .where(model.created_at <= end_time)
+        .order_by(model.created_at, model.id)
+    )
+
+# METHOD - POST - 센서 메타데이터 등록
+@app.post("/sensor-info/")
+def register_sensor(info: SensorInfoIn, db: Session = Depends(get_db)):
+    try:
+        sensor = build_sensor_info(info)
+        db.add(sensor)
+        db.flush()  # sensor.id 확정
+        tag_rows = sensor_tag_rows(sensor.id, info.tags)
+        if tag_rows:
+            db.execute(insert(SensorTag), tag_rows)
+        db.commit()
+        registry_cache.invalidate()
+        return {"message": "Sensor metadata 등록 완료!", "id": sensor.id}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# METHOD - POST - 센서 측정 데이터 일괄 저장 (여러 센서, 한 트랜잭션)
+# /sensor-data/{sensor_id} 보다 먼저 선언해야 "batch"가 sensor_id로 잡히지 않음
+@app.post("/sensor-data/batch", openapi_extra=sensor_body_openapi(
+    {"readings": [{"sensor_id": "tphm-001", "data": {"temperature": 27.6, "humidity": 52.9}}]}))
+def create_sensor_data_batch(body=Depends(sensor_batch_body), db: Session = Depends(get_db)):
+    rows, row_positions, results = body
+    try:
+        ids = []
+        # 청크마다 multi-row INSERT ... RETURNING 한 번, 커밋은 마지막에 한 번
+        for start in range(0, len(rows), BATCH_INSERT_CHUNK):
+            chunk = rows[start:start + BATCH_INSERT_CHUNK]
+            stmt = insert(SensorData).values(chunk).returning(SensorData.id)
+            ids.extend(db.execute(stmt).scalars().all())
+        if SENSOR_ROLLUPS and rows:
+            for stmt in rollups.rollup_upserts(engine.dialect.name, SensorDataRollup, rows, BATCH_INSERT_CHUNK):
+                db.execute(stmt)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    anomalies = save_anomalies(db, rows)
+    saved = [dict(row, id=row_id) for row, row_id in zip(rows, ids)]
+    sensor_cache.add_many(saved)
+    broker.publish_many("sensor_data", saved)
+    broker.publish_many("sensor_anomalies", anomalies)
+    return batch_response(results, rows, row_positions, ids)
+
+# METHOD - POST - 센서 측정 데이터 주기적 저장
+@app.post("/sensor-data/{sensor_id}", openapi_extra=sensor_body_openapi(
+    {"data": {"temperature": 27.6, "humidity": 52.9}}))
+def create_sensor_data(sensor_id: str, row: dict = Depends(sensor_reading_body), db: Session = Depends(get_db)):
+    try:
+        sensor_entry = SensorData(**row)
+        db.add(sensor_entry)
+        if SENSOR_ROLLUPS:
+            for stmt in rollups.rollup_upserts(engine.dialect.name, SensorDataRollup, [row]):
+                db.execute(stmt)
+        db.commit()
+        db.refresh(sensor_entry)
+        row_id = sensor_entry.id
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    anomalies = save_anomalies(db, [row])
+    saved = dict(row, id=row_id)
+    sensor_cache.add(sensor_id, saved)
+    broker.publish("sensor_data", sensor_id, saved)
+    broker.publish_many("sensor_anomalies", anomalies)
+    return {"message": "센서 데이터 저장 완료!", "id": row_id}
+
+# METHOD - GET - 센서 정보 조회 (태그 / owner 로 거르기, 결과는 등록 전까지 캐시)
+@app.get("/sensor-info/")
+def get_sensor_info(
+    tag: Optional[List[str]] = Query(None, description="이 태그를 모두 가진 센서만 (여러 번 지정 가능)"),
+    owner: Optional[str] = Query(None),
+    db: Session = Depends(get_db)
+):
+    key = registry_cache_key(tag, owner)
+    result = registry_cache.get(key)
+    if result is None:
+        generation = registry_cache.generation()
+        sensors = db.execute(sensor_info_stmt(tag, owner)).scalars().all()
+        result = [sensor_info_to_dict(s) for s in sensors]
+        registry_cache.put(key, result, generation)
+    return result
+
+# METHOD - GET - 전체 센서 측정 값 조회 (최신순, 페이지 단위)
+@app.get("/sensor-data/", response_model=List[SensorDataOut])
+def read_all_data(
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    layout: str = LAYOUT_QUERY,
+    db: Session = Depends(get_db)
+):
+    stmt = apply_keyset(sensor_out_stmt(), SensorData, after, limit)
+    return sensor_page_response(db.execute(stmt).all(), limit, layout)
+
+# METHOD - GET - 특정 센서 측정 값 조회 (최신순, 페이지 단위)
+@app.get("/sensor-data/{sensor_id}", response_model=List[SensorDataOut])
+def read_sensor_data(
+    sensor_id: str,
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    layout: str = LAYOUT_QUERY,
+    db: Session = Depends(get_db)
+):
+    stmt = sensor_out_stmt().where(SensorData.sensor_id == sensor_id)
+    stmt = apply_keyset(stmt, SensorData, after, limit)
+    return sensor_page_response(db.execute(stmt).all(), limit, layout)
+
+# METHOD - GET - 특정 센서 측정 값 조회 (TIME, 시간순, 페이지 단위)
 @app.get("/sensor-data/{sensor_id}/range", response_model=List[SensorDataOut])
 def get_sensor_data_in_range(
     sensor_id: str,
     start_time: datetime = Query(..., description="시작 시간 (예: 2025-07-11T10:00:00)"),
-    end_time: datetime = Query(..., description="끝 시간 (예: 2025-07-11T12:00:00)")
+    end_time: datetime = Query(..., description="끝 시간 (예: 2025-07-11T12:00:00)"),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_MAX, gt=0, le=PAGE_LIMIT_MAX),
+    layout: str = LAYOUT_QUERY,
+    db: Session = Depends(get_db)
+):
+    stmt = sensor_out_stmt()\
+              .where(SensorData.sensor_id == sensor_id)\
+              .where(SensorData.created_at >= start_time)\
+              .where(SensorData.created_at <= end_time)
+    stmt = apply_keyset(stmt, SensorData, after, limit, descending=False)
+    return sensor_page_response(db.execute(stmt).all(), limit, layout)
+
+# METHOD - GET - 특정 센서 측정 값 내보내기 (NDJSON / CSV 스트리밍, 기간 크기와 무관하게 메모리 일정)
+@app.get("/sensor-data/{sensor_id}/export")
+def export_sensor_data(
+    sensor_id: str,
+    start_time: datetime = Query(..., description="시작 시간 (예: 2025-07-11T10:00:00)"),
+    end_time: datetime = Query(..., description="끝 시간 (예: 2025-07-11T12:00:00)"),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    session_factory=Depends(read_session_factory),
+):
+    stmt = export_stmt(SensorData, SENSOR_EXPORT_COLUMNS, sensor_id, start_time, end_time)
+    return StreamingResponse(
+        export.iter_export(session_factory, stmt, SENSOR_EXPORT_COLUMNS, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers=export.content_disposition(f"sensor_data_{sensor_id}", format),
+    )
+
+# METHOD - GET - 특정 센서 시간 버킷 집계 (min/max/avg/count)
+# source=auto 면 버킷 크기로 나누어 떨어지는 롤업(1d/1h/1m)을 사용, 없으면 원본 테이블에서 GROUP BY
+@app.get("/sensor-data/{sensor_id}/aggregate")
+def get_sensor_data_aggregate(
+    sensor_id: str,
+    bucket: str = Query("5m", description="버킷 크기 (예: 30s, 5m, 1h, 1d)"),
+    start_time: datetime = Query(..., alias="from", description="시작 시간 (예: 2025-07-11T00:00:00)"),
+    end_time: datetime = Query(..., alias="to", description="끝 시간, 미포함 (예: 2025-07-18T00:00:00)"),
+    source: str = Query("auto", regex="^(auto|raw|rollup)$"),
+    db: Session = Depends(get_db)
+):
+    bucket_seconds = rollups.parse_bucket(bucket)
+    rollup_name, _ = rollups.pick_rollup(bucket_seconds)
+    if source == "rollup" and rollup_name is None:
+        raise HTTPException(status_code=422, detail="롤업을 쓰려면 bucket 이 1m 의 배수여야 합니다")
+    use_rollup = rollup_name is not None and (source == "rollup" or (source == "auto" and SENSOR_ROLLUPS))
+    if use_rollup:
+        stmt = rollups.rollup_aggregate_query(engine.dialect.name, SensorDataRollup, rollup_name,
+                                              sensor_id, bucket_seconds, start_time, end_time)
+    else:
+        stmt = rollups.raw_aggregate_query(engine.dialect.name, SensorData,
+                                           sensor_id, bucket_seconds, start_time, end_time)
+    return {
+        "sensor_id": sensor_id,
+        "bucket": bucket,
+        "source": f"rollup:{rollup_name}" if use_rollup else "raw",
+        "buckets": rollups.aggregate_rows_to_dicts(db.execute(stmt).all()),
+    }
+
+# METHOD - POST - 롤업 테이블 재계산 (롤업 도입 전 데이터 백필 / 보정용)
+@app.post("/sensor-data/rollups/rebuild")
+def rebuild_sensor_data_rollups(
+    start_time: datetime = Query(..., alias="from"),
+    end_time: datetime = Query(..., alias="to"),
+    db: Session = Depends(get_db)
 ):
-    db = SessionLocal()
     try:
-        result = db.query(SensorData)\
-                   .filter(SensorData.sensor_id == sensor_id)\
-                   .filter(SensorData.created_at >= start_time)\
-                   .filter(SensorData.created_at <= end_time)\
-                   .order_by(SensorData.created_at)\
-                   .all()
-        return result
-    finally:
-        db.close()
+        rebuilt = rollups.rebuild_rollups(db, SensorData, SensorDataRollup, start_time, end_time)
+        db.commit()
+        return {"message": "롤업 재계산 완료!", "buckets": rebuilt}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
 
 # METHOD - GET - 특정 센서 측정 값 조회 (COUNT)
 @app.get("/sensor-data/{sensor_id}/recent", response_model=List[SensorDataOut])
-def get_recent_sensor_data(sensor_id: str, count: int = Query(5, gt=0)):
-    db = SessionLocal()
+def get_recent_sensor_data(sensor_id: str, count: int = Query(5, gt=0), db: Session = Depends(get_db)):
+    data = sensor_cache.get(sensor_id, count)
+    if data is None:
+        limit = recent_fetch_limit(sensor_cache, count)
+        rows = db.execute(recent_stmt(SensorData, SENSOR_EXPORT_COLUMNS, sensor_id, limit)).mappings().all()
+        data = fill_recent(sensor_cache, sensor_id, rows, limit)[:count]
+    return data
+
+# METHOD - GET - 측정값 이상 탐지 결과 (최신순, 페이지 단위, sensor_id 없으면 전체)
+@app.get("/sensor-anomalies/")
+def read_sensor_anomalies(
+    response: Response,
+    sensor_id: Optional[str] = Query(None),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    db: Session = Depends(get_db)
+):
+    stmt = apply_keyset(anomaly_stmt(sensor_id), SensorAnomaly, after, limit)
+    return [r._asdict() for r in finish_page(db.execute(stmt).all(), limit, response)]
+
+# METHOD - GET - 센서의 현재 이상 탐지 통계 (EWMA 평균/표준편차, 직전 값)
+@app.get("/sensor-anomalies/state/{sensor_id}")
+def get_anomaly_state(sensor_id: str):
+    return anomaly_state_response(sensor_id)
+
+# METHOD - GET - 새 측정값/탐지 결과 실시간 구독 (Server-Sent Events)
+# 예: /stream/sse?sensor_id=tphm-001&sensor_id=rtsp-car&kind=sensor_data
+@app.get("/stream/sse")
+async def stream_sse(
+    sensor_id: Optional[List[str]] = Query(None, description="구독할 센서 (없으면 전체)"),
+    kind: Optional[List[str]] = Query(None, description="sensor_data / rtsp_detections / sensor_anomalies (없으면 전체)"),
+):
+    sub = broker.subscribe(sensor_id, kind)
+
+    async def events():
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(sub.get(), timeout=STREAM_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    # 따라오지 못해서 끊긴 구독 - 클라이언트가 다시 연결
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                yield f"event: {item[0]}\ndata: {stream_message(item)}\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# WEBSOCKET - 새 측정값/탐지 결과 실시간 구독
+@app.websocket("/stream/ws")
+async def stream_ws(
+    websocket: WebSocket,
+    sensor_id: Optional[List[str]] = Query(None),
+    kind: Optional[List[str]] = Query(None),
+):
+    await websocket.accept()
+    sub = broker.subscribe(sensor_id, kind)
     try:
-        data = (
-            db.query(SensorData)
-            .filter(SensorData.sensor_id == sensor_id)
-            .order_by(SensorData.created_at.desc())
-            .limit(count)
-            .all()
-        )
-        return data
+        while True:
+            item = await sub.get()
+            if item is None:
+                await websocket.close(code=1013, reason="slow consumer")
+                return
+            await websocket.send_text(stream_message(item))
+    except WebSocketDisconnect:
+        pass
     finally:
-        db.close()
-        
+        broker.unsubscribe(sub)
+
+# METHOD - GET - 실시간 구독 현황
+@app.get("/stream/stats")
+def get_stream_stats():
+    return broker.stats()
+
+# METHOD - GET - 파티션 목록 / 생성·삭제 이력 (PostgreSQL + PARTITION_INTERVAL 설정 시)
+@app.get("/partitions/stats")
+def get_partition_stats():
+    if partition_manager is None:
+        return {"enabled": False}
+    return dict(partition_manager.stats(), enabled=True)
+
+# METHOD - GET - admission control 상태 (그룹별 처리 중 요청 수, DB 지연, 거절 횟수, 센서별 토큰 버킷)
+@app.get("/admission/stats")
+def get_admission_stats():
+    return dict(admission.stats(), sensor_rate=sensor_rate.stats(), camera_rate=camera_rate.stats())
+
+# METHOD - GET - 읽기 복제본 상태 (사용 여부, 복제 지연, 마지막 오류)
+@app.get("/db/replica/stats")
+def get_replica_stats():
+    return replica_router.stats()
+
+# METHOD - GET - Prometheus 수집용 지표 (text exposition format)
+@app.get("/metrics")
+def get_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# METHOD - GET - 최근 값 캐시 적중률 / 크기
+@app.get("/recent-cache/stats")
+def get_recent_cache_stats():
+    return {"sensor_data": sensor_cache.stats(), "rtsp_detections": rtsp_cache.stats(), "sensor_info": registry_cache.stats()}
+
 # METHOD - POST 엔드포인트 추가
-@app.post("/rtsp-detections/")
+@app.post("/rtsp-detections/", status_code=202)
 def receive_rtsp_detections(payload: RTSPDetectionIn):
-    db = SessionLocal()
-    try:
-        for det in payload.detections:
-            entry = RTSPDetection(
-                sensor_id=payload.sensor_id,
-                label=det.label,
-                confidence=det.confidence,
-                x1=det.bbox[0],
-                y1=det.bbox[1],
-                x2=det.bbox[2],
-                y2=det.bbox[3],
-            )
-            db.add(entry)
-        db.commit()
-        return {"message": "YOLO 추론 결과 저장 완료!", "count": len(payload.detections)}
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        db.close()
+    check_rate(camera_rate, "rtsp_ingest", payload.sensor_id)
+    return enqueue_rtsp_rows(build_rtsp_rows(payload))
+
+# METHOD - GET - write-behind 버퍼 상태 (큐 길이, flush 지연 등)
+@app.get("/ingest-buffer/stats")
+def get_ingest_buffer_stats():
+    return {"rtsp_detections": rtsp_buffer.stats()}
 
-# METHOD - POST
+# METHOD - POST - 프레임 단위 객체 탐지 결과 저장 (한 프레임의 객체를 INSERT 한 번으로)
 @app.post("/rtsp-detections/rtsp-object")
-def post_object(data: dict):
-    db = SessionLocal()
+def post_object(frame: ObjectFrameIn, db: Session = Depends(get_db)):
+    check_rate(camera_rate, "rtsp_ingest", frame.sensor_id)
+    now = datetime.utcnow()
+    rows = build_object_rows(frame, now)
+    # 상태 머신은 복사본에서 계산만 하고, 커밋이 성공한 뒤에 반영 (실패한 프레임이 메모리 상태를 바꾸지 않게)
+    events, update = occupancy_tracker.process_frame(frame.sensor_id, occupied_slots(frame), now)
     try:
-        for k, v in data['data'].items():
-            entry = ObjectDetection(
-                sensor_id="rtsp-car",
-                label=v['label_data'],
-                score=v['score'],
-                box_data=json.dumps(v['box_data']),
-                mid_point=json.dumps(v['mid_point']),
-                grid_index=v['grid_index']
-            )
-            db.add(entry)
+        if rows:
+            db.execute(insert(ObjectDetection).values(rows))
+        for change in occupancy_changes(events):
+            db.merge(change)
         db.commit()
-        return {"message": "객체 데이터 저장 완료!"}
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        db.close()
+    occupancy_tracker.apply(update)
+    return {"message": "객체 데이터 저장 완료!", "count": len(rows)}
+
+# METHOD - GET - 주차 칸별 객체 탐지 이력 (최신순, 페이지 단위)
+@app.get("/rtsp-objects/{sensor_id}/slots/{grid_index}")
+def get_slot_history(
+    sensor_id: str,
+    grid_index: int,
+    response: Response,
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    db: Session = Depends(get_db)
+):
+    query = db.query(ObjectDetection)\
+              .filter(ObjectDetection.sensor_id == sensor_id)\
+              .filter(ObjectDetection.grid_index == grid_index)
+    query = apply_keyset(query, ObjectDetection, after, limit)
+    result = finish_page(query.all(), limit, response)
+    return [object_detection_to_dict(r) for r in result]
+
+# METHOD - GET - 주차 칸 현재 점유 상태 (메모리 상태에서 바로 응답, O(칸 수))
+@app.get("/parking/{sensor_id}/occupancy")
+def get_parking_occupancy(sensor_id: str, grid_index: Optional[int] = None):
+    return occupancy_response(sensor_id, grid_index)
 
-# METHOD - GET 최근 탐지 결과
+# METHOD - GET - 주차 칸 체류 시간 히스토그램 (출차 완료된 점유 기준)
+@app.get("/parking/{sensor_id}/dwell-histogram")
+def get_parking_dwell_histogram(
+    sensor_id: str,
+    grid_index: Optional[int] = None,
+    start_time: Optional[datetime] = Query(None, description="출차 시각 기준 시작 (예: 2025-07-11T00:00:00)"),
+    end_time: Optional[datetime] = Query(None, description="출차 시각 기준 끝 (미포함)"),
+    bin_minutes: int = Query(15, gt=0),
+    db: Session = Depends(get_db)
+):
+    bin_seconds = bin_minutes * 60
+    rows = db.execute(dwell_histogram_stmt(sensor_id, grid_index, start_time, end_time, bin_seconds)).all()
+    return dwell_histogram_response(sensor_id, grid_index, bin_seconds, rows)
+
+# METHOD - GET - 탐지 결과 내보내기 (NDJSON / CSV 스트리밍)
+@app.get("/rtsp-detections/{sensor_id}/export")
+def export_rtsp_detections(
+    sensor_id: str,
+    start_time: datetime = Query(..., description="시작 시간 (예: 2025-07-11T10:00:00)"),
+    end_time: datetime = Query(..., description="끝 시간 (예: 2025-07-11T12:00:00)"),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    session_factory=Depends(read_session_factory),
+):
+    stmt = export_stmt(RTSPDetection, RTSP_EXPORT_COLUMNS, sensor_id, start_time, end_time)
+    return StreamingResponse(
+        export.iter_export(session_factory, stmt, RTSP_EXPORT_COLUMNS, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers=export.content_disposition(f"rtsp_detections_{sensor_id}", format),
+    )
+
+# METHOD - GET 최근 탐지 결과 (최신순, after 로 이전 페이지 이어서 조회)
 @app.get("/rtsp-detections/{sensor_id}")
-def get_rtsp_detections(sensor_id: str, count: int = Query(10, gt=0)):
-    db = SessionLocal()
-    try:
-        result = (
-            db.query(RTSPDetection)
-            .filter(RTSPDetection.sensor_id == sensor_id)
-            .order_by(RTSPDetection.created_at.desc())
-            .limit(count)
-            .all()
-        )
-        return [
-            {
-                "label": r.label,
-                "confidence": r.confidence,
-                "bbox": [r.x1, r.y1, r.x2, r.y2],
-                "timestamp": r.created_at
-            }
-            for r in result
-        ]
-    finally:
-        db.close()
+def get_rtsp_detections(
+    sensor_id: str,
+    response: Response,
+    count: int = Query(10, gt=0, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    db: Session = Depends(get_db)
+):
+    # 첫 페이지는 캐시에서 (다음 페이지 유무 확인용으로 하나 더), miss 면 DB 에서 읽으면서 캐시도 채움
+    result = rtsp_cache.get(sensor_id, count + 1) if after is None else None
+    if result is None and after is None and count + 1 <= rtsp_cache.capacity:
+        limit = recent_fetch_limit(rtsp_cache, count + 1)
+        rows = db.execute(recent_stmt(RTSPDetection, RTSP_EXPORT_COLUMNS, sensor_id, limit)).mappings().all()
+        result = [SimpleNamespace(**r) for r in fill_recent(rtsp_cache, sensor_id, rows, limit)[:count + 1]]
+    if result is None:
+        query = db.query(RTSPDetection).filter(RTSPDetection.sensor_id == sensor_id)
+        result = apply_keyset(query, RTSPDetection, after, count).all()
+    result = finish_page(result, count, response)
+    return [rtsp_detection_to_dict(r) for r in result]
 
 # RTSP 차량 객체 저장용 (Post)
 @app.post("/rtsp-detections/rtsp-car")
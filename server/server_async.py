@@ -0,0 +1,503 @@
+# server_async.py
+# server.py 와 같은 API 를 비동기 SQLAlchemy 엔진(asyncpg / aiosqlite)으로 제공하는 비동기 모드
+#
+# 실행: uvicorn server_async:app --host 0.0.0.0 --port 8000
+# - DB 모델 / pydantic 모델 / 입력 변환 함수 / RTSP write-behind 버퍼는 server.py 것을 그대로 사용
+# - ASYNC_DB_URL 이 없으면 DB_URL 의 드라이버만 비동기용으로 바꿔서 사용 (읽기 복제본 ASYNC_DB_READ_URL / DB_READ_URL 도 같음)
+
+import asyncio
+import os
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List, Optional
+
+from fastapi import FastAPI, HTTPException, Query, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from server import (
+    DB_URL, DB_READ_URL, BATCH_INSERT_CHUNK, PAGE_LIMIT_DEFAULT, PAGE_LIMIT_MAX, engine_options,
+    apply_keyset, finish_page, sensor_out_stmt, sensor_page_response, LAYOUT_QUERY,
+    SensorInfo, SensorData, RTSPDetection,
+    SensorInfoIn, SensorDataOut, RTSPDetectionIn,
+    ObjectDetection, ObjectFrameIn, build_object_rows, object_detection_to_dict,
+    occupancy_tracker, load_occupancy_state, occupied_slots, occupancy_changes, occupancy_response,
+    dwell_histogram_stmt, dwell_histogram_response,
+    broker, stream_sse, stream_ws,
+    build_sensor_info, sensor_info_to_dict, batch_response,
+    SensorTag, sensor_tag_rows, sensor_info_stmt, registry_cache, registry_cache_key, backfill_sensor_tags,
+    sensor_batch_body, sensor_reading_body, sensor_body_openapi,
+    build_rtsp_rows, enqueue_rtsp_rows, rtsp_detection_to_dict,
+    rtsp_buffer, SensorDataRollup, SENSOR_ROLLUPS,
+    SENSOR_EXPORT_COLUMNS, RTSP_EXPORT_COLUMNS, export_stmt,
+    sensor_cache, rtsp_cache, recent_stmt, recent_fetch_limit, fill_recent, warm_recent_caches,
+    metrics, compression, admission, sensor_rate, camera_rate, check_rate, partition_manager, replica_router, route_label, db_session_routes,
+    SensorAnomaly, detect_anomalies, restore_anomaly_state, anomaly_stmt, anomaly_state_response, log,
+)
+import rollups
+import export
+
+def to_async_url(url):
+    # postgresql://... → postgresql+asyncpg://..., sqlite:///... → sqlite+aiosqlite:///...
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL") or to_async_url(DB_URL)
+
+async_engine = create_async_engine(ASYNC_DB_URL, **engine_options(ASYNC_DB_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
+# 읽기 복제본 - 라우팅 상태(replica_router) 는 server.py 것을 쓰고, 점검만 비동기 엔진으로
+ASYNC_DB_READ_URL = os.getenv("ASYNC_DB_READ_URL") or to_async_url(DB_READ_URL)
+async_read_engine = create_async_engine(ASYNC_DB_READ_URL, **engine_options(ASYNC_DB_READ_URL)) if ASYNC_DB_READ_URL else None
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, expire_on_commit=False, autoflush=False) if async_read_engine else AsyncSessionLocal
+replica_router.enabled = replica_router.healthy = async_read_engine is not None
+
+async def open_async_db(request):
+    # 요청 메서드 / 복제본 상태에 따라 세션을 열고 (세션, 엔진, 이유) 반환
+    reason = replica_router.route(request.method)
+    if reason == "replica":
+        db = AsyncReadSessionLocal()
+        try:
+            await db.connection()
+            return db, "replica", "ok"
+        except OperationalError as e:
+            await db.close()
+            replica_router.mark_down(e)
+            reason = "connect_error"
+    return AsyncSessionLocal(), "primary", reason
+
+# 요청마다 비동기 세션을 열고, 응답 후 닫아주는 의존성 (GET/HEAD 는 복제본으로 라우팅)
+async def get_async_db(request: Request):
+    db, engine_name, reason = await open_async_db(request)
+    db_session_routes.inc((route_label(request), engine_name, reason))
+    try:
+        yield db
+    except OperationalError as e:
+        if engine_name == "replica":
+            replica_router.mark_down(e)
+        raise
+    finally:
+        await db.close()
+
+# 스트리밍 내보내기용 sessionmaker 선택
+def read_session_factory(request: Request):
+    reason = replica_router.route(request.method)
+    use_replica = reason == "replica"
+    db_session_routes.inc((route_label(request), "replica" if use_replica else "primary", "ok" if use_replica else reason))
+    return AsyncReadSessionLocal if use_replica else AsyncSessionLocal
+
+# FastAPI 인스턴스 생성 (테이블 생성은 server.py import 시 동기 엔진으로 처리됨)
+app = FastAPI()
+# 지표 레지스트리는 server.py 와 공유 (버퍼 flush 는 동기 엔진, 요청 처리는 비동기 엔진)
+metrics.instrument_engine(async_engine.sync_engine, "async")
+if async_read_engine is not None:
+    metrics.instrument_engine(async_read_engine.sync_engine, "async-replica")
+replica_check_task = None
+admission.db_latency.instrument(async_engine.sync_engine)
+app.add_middleware(compression.middleware)
+app.add_middleware(admission.middleware)
+app.add_middleware(metrics.middleware)
+
+@app.on_event("startup")
+async def start_ingest_buffers():
+    backfill_sensor_tags()
+    warm_recent_caches()
+    restore_anomaly_state()
+    load_occupancy_state()
+    rtsp_buffer.start()
+    if partition_manager:
+        partition_manager.start()
+    global replica_check_task
+    if async_read_engine is not None:
+        replica_check_task = asyncio.create_task(replica_router.arun(async_read_engine))
+
+@app.on_event("shutdown")
+async def stop_ingest_buffers():
+    # 종료 시 큐에 남은 탐지 결과를 모두 저장하고 커넥션 풀 정리
+    rtsp_buffer.stop()
+    if partition_manager:
+        partition_manager.stop()
+    if replica_check_task is not None:
+        replica_check_task.cancel()
+    await async_engine.dispose()
+    if async_read_engine is not None:
+        await async_read_engine.dispose()
+
+# METHOD - POST - 센서 메타데이터 등록
+@app.post("/sensor-info/")
+async def register_sensor(info: SensorInfoIn, db: AsyncSession = Depends(get_async_db)):
+    try:
+        sensor = build_sensor_info(info)
+        db.add(sensor)
+        await db.flush()  # sensor.id 확정
+        tag_rows = sensor_tag_rows(sensor.id, info.tags)
+        if tag_rows:
+            await db.execute(insert(SensorTag), tag_rows)
+        await db.commit()
+        registry_cache.invalidate()
+        return {"message": "Sensor metadata 등록 완료!", "id": sensor.id}
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def save_anomalies(db, rows):
+    # server.save_anomalies 의 비동기 버전 - 측정값 커밋 후 이상 탐지, 이상 행은 따로 커밋
+    anomalies = detect_anomalies(rows)
+    if anomalies:
+        try:
+            await db.execute(insert(SensorAnomaly), anomalies)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            log.exception("이상 탐지 결과 저장 실패")
+            return []
+    return anomalies
+
+# METHOD - POST - 센서 측정 데이터 일괄 저장 (여러 센서, 한 트랜잭션)
+@app.post("/sensor-data/batch", openapi_extra=sensor_body_openapi(
+    {"readings": [{"sensor_id": "tphm-001", "data": {"temperature": 27.6, "humidity": 52.9}}]}))
+async def create_sensor_data_batch(body=Depends(sensor_batch_body), db: AsyncSession = Depends(get_async_db)):
+    rows, row_positions, results = body
+    try:
+        ids = []
+        for start in range(0, len(rows), BATCH_INSERT_CHUNK):
+            chunk = rows[start:start + BATCH_INSERT_CHUNK]
+            stmt = insert(SensorData).values(chunk).returning(SensorData.id)
+            ids.extend((await db.execute(stmt)).scalars().all())
+        if SENSOR_ROLLUPS and rows:
+            for stmt in rollups.rollup_upserts(async_engine.dialect.name, SensorDataRollup, rows, BATCH_INSERT_CHUNK):
+                await db.execute(stmt)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    anomalies = await save_anomalies(db, rows)
+    saved = [dict(row, id=row_id) for row, row_id in zip(rows, ids)]
+    sensor_cache.add_many(saved)
+    broker.publish_many("sensor_data", saved)
+    broker.publish_many("sensor_anomalies", anomalies)
+    return batch_response(results, rows, row_positions, ids)
+
+# METHOD - POST - 센서 측정 데이터 주기적 저장
+@app.post("/sensor-data/{sensor_id}", openapi_extra=sensor_body_openapi(
+    {"data": {"temperature": 27.6, "humidity": 52.9}}))
+async def create_sensor_data(sensor_id: str, row: dict = Depends(sensor_reading_body), db: AsyncSession = Depends(get_async_db)):
+    try:
+        sensor_entry = SensorData(**row)
+        db.add(sensor_entry)
+        if SENSOR_ROLLUPS:
+            for stmt in rollups.rollup_upserts(async_engine.dialect.name, SensorDataRollup, [row]):
+                await db.execute(stmt)
+        await db.commit()
+        row_id = sensor_entry.id
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    anomalies = await save_anomalies(db, [row])
+    saved = dict(row, id=row_id)
+    sensor_cache.add(sensor_id, saved)
+    broker.publish("sensor_data", sensor_id, saved)
+    broker.publish_many("sensor_anomalies", anomalies)
+    return {"message": "센서 데이터 저장 완료!", "id": row_id}
+
+# METHOD - GET - 센서 정보 조회 (태그 / owner 로 거르기, 결과는 등록 전까지 캐시)
+@app.get("/sensor-info/")
+async def get_sensor_info(
+    tag: Optional[List[str]] = Query(None, description="이 태그를 모두 가진 센서만 (여러 번 지정 가능)"),
+    owner: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    key = registry_cache_key(tag, owner)
+    result = registry_cache.get(key)
+    if result is None:
+        generation = registry_cache.generation()
+        sensors = (await db.execute(sensor_info_stmt(tag, owner))).scalars().all()
+        result = [sensor_info_to_dict(s) for s in sensors]
+        registry_cache.put(key, result, generation)
+    return result
+
+# METHOD - GET - 전체 센서 측정 값 조회 (최신순, 페이지 단위)
+@app.get("/sensor-data/", response_model=List[SensorDataOut])
+async def read_all_data(
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    layout: str = LAYOUT_QUERY,
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = apply_keyset(sensor_out_stmt(), SensorData, after, limit)
+    return sensor_page_response((await db.execute(stmt)).all(), limit, layout)
+
+# METHOD - GET - 특정 센서 측정 값 조회 (최신순, 페이지 단위)
+@app.get("/sensor-data/{sensor_id}", response_model=List[SensorDataOut])
+async def read_sensor_data(
+    sensor_id: str,
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    layout: str = LAYOUT_QUERY,
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = sensor_out_stmt().where(SensorData.sensor_id == sensor_id)
+    stmt = apply_keyset(stmt, SensorData, after, limit)
+    return sensor_page_response((await db.execute(stmt)).all(), limit, layout)
+
+# METHOD - GET - 특정 센서 측정 값 조회 (TIME, 시간순, 페이지 단위)
+@app.get("/sensor-data/{sensor_id}/range", response_model=List[SensorDataOut])
+async def get_sensor_data_in_range(
+    sensor_id: str,
+    start_time: datetime = Query(..., description="시작 시간 (예: 2025-07-11T10:00:00)"),
+    end_time: datetime = Query(..., description="끝 시간 (예: 2025-07-11T12:00:00)"),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_MAX, gt=0, le=PAGE_LIMIT_MAX),
+    layout: str = LAYOUT_QUERY,
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = (
+        sensor_out_stmt()
+        .where(SensorData.sensor_id == sensor_id)
+        .where(SensorData.created_at >= start_time)
+        .where(SensorData.created_at <= end_time)
+    )
+    stmt = apply_keyset(stmt, SensorData, after, limit, descending=False)
+    return sensor_page_response((await db.execute(stmt)).all(), limit, layout)
+
+# METHOD - GET - 특정 센서 측정 값 내보내기 (NDJSON / CSV 스트리밍)
+@app.get("/sensor-data/{sensor_id}/export")
+async def export_sensor_data(
+    sensor_id: str,
+    start_time: datetime = Query(..., description="시작 시간 (예: 2025-07-11T10:00:00)"),
+    end_time: datetime = Query(..., description="끝 시간 (예: 2025-07-11T12:00:00)"),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    session_factory=Depends(read_session_factory),
+):
+    stmt = export_stmt(SensorData, SENSOR_EXPORT_COLUMNS, sensor_id, start_time, end_time)
+    return StreamingResponse(
+        export.aiter_export(session_factory, stmt, SENSOR_EXPORT_COLUMNS, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers=export.content_disposition(f"sensor_data_{sensor_id}", format),
+    )
+
+# METHOD - GET - 특정 센서 시간 버킷 집계 (min/max/avg/count)
+@app.get("/sensor-data/{sensor_id}/aggregate")
+async def get_sensor_data_aggregate(
+    sensor_id: str,
+    bucket: str = Query("5m", description="버킷 크기 (예: 30s, 5m, 1h, 1d)"),
+    start_time: datetime = Query(..., alias="from", description="시작 시간 (예: 2025-07-11T00:00:00)"),
+    end_time: datetime = Query(..., alias="to", description="끝 시간, 미포함 (예: 2025-07-18T00:00:00)"),
+    source: str = Query("auto", regex="^(auto|raw|rollup)$"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    bucket_seconds = rollups.parse_bucket(bucket)
+    rollup_name, _ = rollups.pick_rollup(bucket_seconds)
+    if source == "rollup" and rollup_name is None:
+        raise HTTPException(status_code=422, detail="롤업을 쓰려면 bucket 이 1m 의 배수여야 합니다")
+    use_rollup = rollup_name is not None and (source == "rollup" or (source == "auto" and SENSOR_ROLLUPS))
+    if use_rollup:
+        stmt = rollups.rollup_aggregate_query(async_engine.dialect.name, SensorDataRollup, rollup_name,
+                                              sensor_id, bucket_seconds, start_time, end_time)
+    else:
+        stmt = rollups.raw_aggregate_query(async_engine.dialect.name, SensorData,
+                                           sensor_id, bucket_seconds, start_time, end_time)
+    return {
+        "sensor_id": sensor_id,
+        "bucket": bucket,
+        "source": f"rollup:{rollup_name}" if use_rollup else "raw",
+        "buckets": rollups.aggregate_rows_to_dicts((await db.execute(stmt)).all()),
+    }
+
+# METHOD - POST - 롤업 테이블 재계산 (롤업 도입 전 데이터 백필 / 보정용)
+@app.post("/sensor-data/rollups/rebuild")
+async def rebuild_sensor_data_rollups(
+    start_time: datetime = Query(..., alias="from"),
+    end_time: datetime = Query(..., alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        rebuilt = await db.run_sync(rollups.rebuild_rollups, SensorData, SensorDataRollup, start_time, end_time)
+        await db.commit()
+        return {"message": "롤업 재계산 완료!", "buckets": rebuilt}
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+# METHOD - GET - 특정 센서 측정 값 조회 (COUNT)
+@app.get("/sensor-data/{sensor_id}/recent", response_model=List[SensorDataOut])
+async def get_recent_sensor_data(sensor_id: str, count: int = Query(5, gt=0), db: AsyncSession = Depends(get_async_db)):
+    data = sensor_cache.get(sensor_id, count)
+    if data is None:
+        limit = recent_fetch_limit(sensor_cache, count)
+        rows = (await db.execute(recent_stmt(SensorData, SENSOR_EXPORT_COLUMNS, sensor_id, limit))).mappings().all()
+        data = fill_recent(sensor_cache, sensor_id, rows, limit)[:count]
+    return data
+
+# METHOD - GET - 측정값 이상 탐지 결과 (최신순, 페이지 단위, sensor_id 없으면 전체)
+@app.get("/sensor-anomalies/")
+async def read_sensor_anomalies(
+    response: Response,
+    sensor_id: Optional[str] = Query(None),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = apply_keyset(anomaly_stmt(sensor_id), SensorAnomaly, after, limit)
+    return [r._asdict() for r in finish_page((await db.execute(stmt)).all(), limit, response)]
+
+# METHOD - GET - 센서의 현재 이상 탐지 통계 (EWMA 평균/표준편차, 직전 값)
+@app.get("/sensor-anomalies/state/{sensor_id}")
+async def get_anomaly_state(sensor_id: str):
+    return anomaly_state_response(sensor_id)
+
+# 실시간 구독 (SSE / WebSocket) - DB 를 쓰지 않으므로 server.py 의 핸들러를 그대로 등록
+app.get("/stream/sse")(stream_sse)
+app.websocket("/stream/ws")(stream_ws)
+
+@app.get("/stream/stats")
+async def get_stream_stats():
+    return broker.stats()
+
+# METHOD - GET - 파티션 목록 / 생성·삭제 이력 (PostgreSQL + PARTITION_INTERVAL 설정 시)
+@app.get("/partitions/stats")
+def get_partition_stats():
+    # 동기 엔진으로 카탈로그를 읽으므로 스레드풀에서 실행
+    if partition_manager is None:
+        return {"enabled": False}
+    return dict(partition_manager.stats(), enabled=True)
+
+# METHOD - GET - admission control 상태 (그룹별 처리 중 요청 수, DB 지연, 거절 횟수, 센서별 토큰 버킷)
+@app.get("/admission/stats")
+async def get_admission_stats():
+    return dict(admission.stats(), sensor_rate=sensor_rate.stats(), camera_rate=camera_rate.stats())
+
+# METHOD - GET - 읽기 복제본 상태 (사용 여부, 복제 지연, 마지막 오류)
+@app.get("/db/replica/stats")
+async def get_replica_stats():
+    return replica_router.stats()
+
+# METHOD - GET - Prometheus 수집용 지표 (text exposition format)
+@app.get("/metrics")
+async def get_metrics():
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# METHOD - GET - 최근 값 캐시 적중률 / 크기
+@app.get("/recent-cache/stats")
+async def get_recent_cache_stats():
+    return {"sensor_data": sensor_cache.stats(), "rtsp_detections": rtsp_cache.stats(), "sensor_info": registry_cache.stats()}
+
+# METHOD - POST - RTSP 탐지 결과 (write-behind 버퍼에 넣고 바로 응답)
+@app.post("/rtsp-detections/", status_code=202)
+async def receive_rtsp_detections(payload: RTSPDetectionIn):
+    check_rate(camera_rate, "rtsp_ingest", payload.sensor_id)
+    return enqueue_rtsp_rows(build_rtsp_rows(payload))
+
+# METHOD - GET - write-behind 버퍼 상태
+@app.get("/ingest-buffer/stats")
+async def get_ingest_buffer_stats():
+    return {"rtsp_detections": rtsp_buffer.stats()}
+
+# METHOD - POST - 프레임 단위 객체 탐지 결과 저장 (한 프레임의 객체를 INSERT 한 번으로)
+@app.post("/rtsp-detections/rtsp-object")
+async def post_object(frame: ObjectFrameIn, db: AsyncSession = Depends(get_async_db)):
+    check_rate(camera_rate, "rtsp_ingest", frame.sensor_id)
+    now = datetime.utcnow()
+    rows = build_object_rows(frame, now)
+    # 상태 머신은 복사본에서 계산만 하고, 커밋이 성공한 뒤에 반영 (실패한 프레임이 메모리 상태를 바꾸지 않게)
+    events, update = occupancy_tracker.process_frame(frame.sensor_id, occupied_slots(frame), now)
+    try:
+        if rows:
+            await db.execute(insert(ObjectDetection).values(rows))
+        for change in occupancy_changes(events):
+            await db.merge(change)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+    occupancy_tracker.apply(update)
+    return {"message": "객체 데이터 저장 완료!", "count": len(rows)}
+
+# METHOD - GET - 주차 칸별 객체 탐지 이력 (최신순, 페이지 단위)
+@app.get("/rtsp-objects/{sensor_id}/slots/{grid_index}")
+async def get_slot_history(
+    sensor_id: str,
+    grid_index: int,
+    response: Response,
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    limit: int = Query(PAGE_LIMIT_DEFAULT, gt=0, le=PAGE_LIMIT_MAX),
+    db: AsyncSession = Depends(get_async_db)
+):
+    stmt = (
+        select(ObjectDetection)
+        .where(ObjectDetection.sensor_id == sensor_id)
+        .where(ObjectDetection.grid_index == grid_index)
+    )
+    stmt = apply_keyset(stmt, ObjectDetection, after, limit)
+    result = finish_page((await db.execute(stmt)).scalars().all(), limit, response)
+    return [object_detection_to_dict(r) for r in result]
+
+# METHOD - GET - 주차 칸 현재 점유 상태 (메모리 상태에서 바로 응답, O(칸 수))
+@app.get("/parking/{sensor_id}/occupancy")
+async def get_parking_occupancy(sensor_id: str, grid_index: Optional[int] = None):
+    return occupancy_response(sensor_id, grid_index)
+
+# METHOD - GET - 주차 칸 체류 시간 히스토그램 (출차 완료된 점유 기준)
+@app.get("/parking/{sensor_id}/dwell-histogram")
+async def get_parking_dwell_histogram(
+    sensor_id: str,
+    grid_index: Optional[int] = None,
+    start_time: Optional[datetime] = Query(None, description="출차 시각 기준 시작 (예: 2025-07-11T00:00:00)"),
+    end_time: Optional[datetime] = Query(None, description="출차 시각 기준 끝 (미포함)"),
+    bin_minutes: int = Query(15, gt=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    bin_seconds = bin_minutes * 60
+    rows = (await db.execute(dwell_histogram_stmt(sensor_id, grid_index, start_time, end_time, bin_seconds))).all()
+    return dwell_histogram_response(sensor_id, grid_index, bin_seconds, rows)
+
+# METHOD - GET - 탐지 결과 내보내기 (NDJSON / CSV 스트리밍)
+@app.get("/rtsp-detections/{sensor_id}/export")
+async def export_rtsp_detections(
+    sensor_id: str,
+    start_time: datetime = Query(..., description="시작 시간 (예: 2025-07-11T10:00:00)"),
+    end_time: datetime = Query(..., description="끝 시간 (예: 2025-07-11T12:00:00)"),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    session_factory=Depends(read_session_factory),
+):
+    stmt = export_stmt(RTSPDetection, RTSP_EXPORT_COLUMNS, sensor_id, start_time, end_time)
+    return StreamingResponse(
+        export.aiter_export(session_factory, stmt, RTSP_EXPORT_COLUMNS, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers=export.content_disposition(f"rtsp_detections_{sensor_id}", format),
+    )
+
+# METHOD - GET 최근 탐지 결과 (최신순, after 로 이전 페이지 이어서 조회)
+@app.get("/rtsp-detections/{sensor_id}")
+async def get_rtsp_detections(
+    sensor_id: str,
+    response: Response,
+    count: int = Query(10, gt=0, le=PAGE_LIMIT_MAX),
+    after: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 값"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # 첫 페이지는 캐시에서 (다음 페이지 유무 확인용으로 하나 더), miss 면 DB 에서 읽으면서 캐시도 채움
+    result = rtsp_cache.get(sensor_id, count + 1) if after is None else None
+    if result is None and after is None and count + 1 <= rtsp_cache.capacity:
+        limit = recent_fetch_limit(rtsp_cache, count + 1)
+        rows = (await db.execute(recent_stmt(RTSPDetection, RTSP_EXPORT_COLUMNS, sensor_id, limit))).mappings().all()
+        result = [SimpleNamespace(**r) for r in fill_recent(rtsp_cache, sensor_id, rows, limit)[:count + 1]]
+    if result is None:
+        stmt = select(RTSPDetection).where(RTSPDetection.sensor_id == sensor_id)
+        stmt = apply_keyset(stmt, RTSPDetection, after, count)
+        result = (await db.execute(stmt)).scalars().all()
+    result = finish_page(result, count, response)
+    return [rtsp_detection_to_dict(r) for r in result]
+
+# RTSP 차량 객체 저장용 (Post)
+@app.post("/rtsp-detections/rtsp-car")
+async def save_rtsp_car_data(data: dict):
+    print("[RTSP POST] 받은 데이터:")
+    print(data)
+    return {"message": "RTSP 차량 객체 POST 성공!"}
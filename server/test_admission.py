@@ -0,0 +1,104 @@
+# test_admission.py
+# admission.py - 라우트 그룹 / 제외 경로, 동시 처리 한도, DB 지연 예산(저장 그룹 쿼리만), 토큰 버킷
+#
+#   cd server && python -m pytest -q
+
+import time
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from admission import AdmissionControl, DbLatency, TokenBuckets, current_group, parse_limits, retry_after_header
+
+def test_parse_limits():
+    assert parse_limits("") == {}
+    assert parse_limits("sensor_ingest=16, rtsp_ingest=8,read=") == {"sensor_ingest": 16, "rtsp_ingest": 8}
+
+@pytest.mark.parametrize("seconds, expected", [(0, "1"), (0.2, "1"), (2.1, "3"), (600, "60")])
+def test_retry_after_header_is_clamped(seconds, expected):
+    assert retry_after_header(seconds) == expected
+
+@pytest.mark.parametrize("method, path, group", [
+    ("POST", "/sensor-data/tphm-001", "sensor_ingest"),
+    ("POST", "/sensor-data/batch", "sensor_ingest"),
+    ("POST", "/rtsp-detections/", "rtsp_ingest"),
+    ("POST", "/rtsp-detections/rtsp-object", "rtsp_ingest"),
+    ("GET", "/sensor-data/tphm-001", "read"),
+    ("GET", "/metrics", None),
+    ("GET", "/stream/sse", None),
+    ("GET", "/sensor-data/tphm-001/export", None),
+    ("GET", "/rtsp-detections/cam/export", None),
+    ("DELETE", "/sensor-data/tphm-001", None),
+])
+def test_group_for(method, path, group):
+    assert AdmissionControl({}).group_for(method, path) == group
+
+def test_concurrency_limit():
+    admission = AdmissionControl({"sensor_ingest": 2})
+    admission.inflight["sensor_ingest"] = 1
+    assert admission.check("sensor_ingest") is None
+    admission.inflight["sensor_ingest"] = 2
+    assert admission.check("sensor_ingest") == (503, "concurrency", 1)
+    # 한도가 없는 그룹은 통과
+    admission.inflight["read"] = 1000
+    assert admission.check("read") is None
+
+def test_latency_budget_only_for_db_groups_with_probe():
+    admission = AdmissionControl({}, latency_budget=0.5, probe_interval=60)
+    admission.db_latency.ewma = 2.0
+    assert admission.check("read") is None
+    assert admission.check("sensor_ingest") is None  # probe 한 건은 통과
+    status, reason, retry_after = admission.check("sensor_ingest")
+    assert (status, reason) == (503, "db_latency") and retry_after == pytest.approx(2.0)
+    admission.db_latency.ewma = 0.1
+    assert admission.check("sensor_ingest") is None
+
+def test_zero_budget_disables_latency_check():
+    admission = AdmissionControl({})
+    admission.db_latency.ewma = 100.0
+    assert admission.check("sensor_ingest") is None
+
+def test_db_latency_counts_only_ingest_group_queries():
+    engine = create_engine("sqlite://")
+    latency = DbLatency(alpha=1.0)
+    latency.instrument(engine)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        assert latency.ewma == 0.0
+        token = current_group.set("read")
+        try:
+            conn.execute(text("SELECT 1"))
+        finally:
+            current_group.reset(token)
+        assert latency.ewma == 0.0
+        token = current_group.set("rtsp_ingest")
+        try:
+            conn.execute(text("SELECT 1"))
+        finally:
+            current_group.reset(token)
+        assert latency.ewma > 0.0
+    assert latency._inflight == {}
+
+def test_db_latency_sees_stuck_query():
+    latency = DbLatency()
+    latency._inflight[1] = time.perf_counter() - 5.0
+    assert latency.current() >= 5.0
+
+def test_token_buckets():
+    buckets = TokenBuckets(rate=1.0, burst=2)
+    assert buckets.take("a") == 0.0
+    assert buckets.take("a") == 0.0
+    wait = buckets.take("a")
+    assert 0.0 < wait <= 1.0
+    assert buckets.take("b") == 0.0  # 센서마다 따로
+    assert buckets.limited == 1
+
+def test_token_buckets_zero_rate_is_unlimited():
+    buckets = TokenBuckets(rate=0, burst=1)
+    assert all(buckets.take("a") == 0.0 for _ in range(100))
+
+def test_token_buckets_max_keys():
+    buckets = TokenBuckets(rate=1.0, burst=1, max_keys=2)
+    for key in ("a", "b", "c"):
+        buckets.take(key)
+    assert buckets.stats()["keys"] == 2
@@ -0,0 +1,69 @@
+# test_anomaly.py
+# AnomalyDetector 경계 조건 - 워밍업, zscore / 변화율 판정, NaN/inf 무시, restore
+#
+#   cd server && python -m pytest -q
+
+import math
+from datetime import datetime, timedelta
+
+from anomaly import AnomalyDetector
+
+T0 = datetime(2024, 1, 1)
+
+def reading(i, temperature, humidity=50.0, sensor_id="s1", step=60):
+    return {"sensor_id": sensor_id, "temperature": temperature, "humidity": humidity,
+            "created_at": T0 + timedelta(seconds=i * step)}
+
+def warm(det, n, sensor_id="s1"):
+    for i in range(n):
+        assert det.process([reading(i, 20.0 + (i % 2) * 0.2, sensor_id=sensor_id)]) == []
+
+def test_no_zscore_before_warmup():
+    det = AnomalyDetector(warmup=10)
+    warm(det, 9)
+    assert det.process([reading(9, 100.0)]) == []
+
+def test_zscore_after_warmup():
+    det = AnomalyDetector(warmup=10)
+    warm(det, 10)
+    events = det.process([reading(10, 100.0)])
+    assert [(e["metric"], e["kind"]) for e in events] == [("temperature", "zscore")]
+    assert events[0]["value"] == 100.0
+    assert det.flagged == 1
+
+def test_rate_threshold_per_minute():
+    det = AnomalyDetector(warmup=1000, rate_thresholds={"temperature": 5.0})
+    det.process([reading(0, 20.0)])
+    # 1분에 4도 → 통과, 그다음 1분에 6도 → rate 이상
+    assert det.process([reading(1, 24.0)]) == []
+    events = det.process([reading(2, 30.0)])
+    assert [(e["metric"], e["kind"]) for e in events] == [("temperature", "rate")]
+
+def test_same_timestamp_skips_rate():
+    det = AnomalyDetector(warmup=1000, rate_thresholds={"temperature": 1.0})
+    det.process([reading(0, 20.0)])
+    assert det.process([reading(0, 90.0)]) == []
+
+def test_non_finite_values_do_not_poison_stats():
+    det = AnomalyDetector(warmup=5)
+    warm(det, 5)
+    for i, bad in enumerate((float("nan"), float("inf"), float("-inf")), start=5):
+        assert det.process([reading(i, bad)]) == []
+    metrics = det.snapshot("s1")["metrics"]
+    assert all(math.isfinite(v) for m in metrics.values() for v in m.values())
+    # 이후 정상 값도 계속 판정됨
+    assert det.process([reading(9, 100.0)])[0]["kind"] == "zscore"
+
+def test_batch_is_processed_in_time_order():
+    det = AnomalyDetector(warmup=1000, rate_thresholds={"temperature": 5.0})
+    rows = [reading(2, 21.0), reading(0, 20.0), reading(1, 20.5)]
+    assert det.process(rows) == []
+    assert det.snapshot("s1")["metrics"]["temperature"]["last"] == 21.0
+
+def test_restore_rebuilds_state_without_flagging():
+    det = AnomalyDetector(warmup=3)
+    det.restore("s1", [reading(i, 20.0) for i in range(3)] + [reading(3, 90.0)])
+    assert det.flagged == 0
+    snap = det.snapshot("s1")
+    assert snap["count"] == 4 and snap["warmed_up"]
+    assert det.snapshot("unknown") is None
@@ -0,0 +1,82 @@
+# test_binary_ingest.py
+# binary_ingest.decode - struct / msgpack 포맷, 항목 단위 오류(NaN/inf, 빈 sensor_id), ts 범위 검증
+#
+#   cd server && python -m pytest -q
+
+import struct
+from datetime import datetime, timedelta
+
+import pytest
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+import binary_ingest
+from binary_ingest import STRUCT_CONTENT_TYPE, UnsupportedFormat, decode, encode_struct
+
+NOW = datetime(2024, 1, 1, 12, 0, 0)
+TS = 1700000000
+
+def test_struct_roundtrip_and_zero_ts_uses_now():
+    body = encode_struct([("tphm-001", TS, 21.5, 40.0), ("tphm-002", 0, 22.0, 41.0)])
+    rows, positions, results = decode(STRUCT_CONTENT_TYPE + "; charset=binary", body, NOW)
+    assert positions == [0, 1] and results == [None, None]
+    assert rows[0]["sensor_id"] == "tphm-001"
+    assert rows[0]["created_at"] == datetime(1970, 1, 1) + timedelta(seconds=TS)
+    assert rows[0]["temperature"] == 21.5
+    assert rows[1]["created_at"] == NOW
+
+def test_struct_bad_length():
+    with pytest.raises(ValueError):
+        decode(STRUCT_CONTENT_TYPE, b"\0" * (binary_ingest.RECORD.size + 1), NOW)
+
+def test_struct_nan_and_empty_id_are_item_errors():
+    body = encode_struct([("a", 0, float("nan"), 1.0), ("", 0, 1.0, 1.0), ("b", 0, 1.0, float("inf"))])
+    rows, positions, results = decode(STRUCT_CONTENT_TYPE, body, NOW)
+    assert rows == [] and positions == []
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["status"] == "error" for r in results)
+
+def test_sensor_id_override():
+    rows, _, _ = decode(STRUCT_CONTENT_TYPE, encode_struct([("a", 0, 1.0, 1.0)]), NOW, sensor_id="path-id")
+    assert rows[0]["sensor_id"] == "path-id"
+
+def test_unsupported_content_type():
+    with pytest.raises(UnsupportedFormat):
+        decode("application/json", b"{}", NOW)
+
+needs_msgpack = pytest.mark.skipif(msgpack is None, reason="msgpack 미설치")
+
+@needs_msgpack
+@pytest.mark.parametrize("ts", [1e300, float("nan"), float("inf"), -5])
+def test_msgpack_out_of_range_ts_is_value_error(ts):
+    with pytest.raises(ValueError):
+        decode("application/msgpack", msgpack.packb([["a", ts, 20.0, 40.0]]), NOW)
+
+@needs_msgpack
+def test_msgpack_nil_ts_and_values():
+    rows, positions, results = decode("application/x-msgpack", msgpack.packb([["a", None, 20, 40.5]]), NOW)
+    assert rows == [{"sensor_id": "a", "temperature": 20.0, "humidity": 40.5, "created_at": NOW}]
+
+@needs_msgpack
+@pytest.mark.parametrize("obj", [{"a": 1}, [["a", 0, "x", 1]], [["a", 0]]])
+def test_msgpack_malformed(obj):
+    with pytest.raises(ValueError):
+        decode("application/msgpack", msgpack.packb(obj), NOW)
+
+@needs_msgpack
+def test_msgpack_undecodable():
+    with pytest.raises(ValueError):
+        decode("application/msgpack", b"\xc1", NOW)
+
+@needs_msgpack
+def test_msgpack_nan_reading_is_item_error():
+    rows, positions, results = decode("application/msgpack", msgpack.packb([["a", 0, float("nan"), 1.0], ["a", 0, 1.0, 1.0]]), NOW)
+    assert positions == [1]
+    assert results[0]["status"] == "error" and results[1] is None
+
+def test_struct_record_layout():
+    # 펌웨어와 맞춰야 하는 레코드 크기 (char[16] + uint32 + float32 * 2)
+    assert binary_ingest.RECORD.size == 28 == struct.calcsize("<16sIff")
@@ -0,0 +1,65 @@
+# test_ingest_buffer.py
+# WriteBehindBuffer - 큐 한도, flush 실패 시 재시도(순서 유지) 후 저장, max_retries 초과 시 버림, stop 때 남은 항목 flush
+#
+#   cd server && python -m pytest -q
+
+import time
+
+from ingest_buffer import WriteBehindBuffer
+
+def wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "시간 초과"
+        time.sleep(0.01)
+
+def test_put_many_rejects_when_full():
+    buffer = WriteBehindBuffer(lambda rows: None, max_size=3)
+    assert buffer.put_many([1, 2])
+    assert not buffer.put_many([3, 4])  # 전부 거절 (쪼개지 않음)
+    assert buffer.depth() == 2 and buffer.rejected == 2
+
+def test_stop_flushes_remaining():
+    saved = []
+    buffer = WriteBehindBuffer(saved.extend, batch_size=100, flush_interval=10)
+    buffer.start()
+    buffer.put_many([1, 2, 3])
+    buffer.stop()
+    assert saved == [1, 2, 3]
+
+def test_failed_batch_is_retried_before_new_rows():
+    saved = []
+    calls = {"n": 0}
+
+    def flaky(rows):
+        calls["n"] += 1
+        if calls["n"] <= 2:
+            raise RuntimeError("db down")
+        saved.extend(rows)
+
+    buffer = WriteBehindBuffer(flaky, batch_size=2, flush_interval=0.01, retry_backoff=0.01)
+    buffer.start()
+    buffer.put_many([1, 2])
+    wait_for(lambda: buffer.flush_errors == 2)
+    buffer.put_many([3, 4])
+    wait_for(lambda: len(saved) == 4)
+    buffer.stop()
+    assert saved == [1, 2, 3, 4]
+    assert buffer.failed_rows == 0 and buffer.retried_batches == 2
+
+def test_retry_batch_counts_toward_max_size():
+    buffer = WriteBehindBuffer(lambda rows: None, max_size=3)
+    buffer._retry = ([1, 2], 1)
+    assert not buffer.put_many([3, 4])
+    assert buffer.stats()["queue_depth"] == 2
+
+def test_drops_after_max_retries():
+    def broken(rows):
+        raise RuntimeError("db down")
+
+    buffer = WriteBehindBuffer(broken, batch_size=1, flush_interval=0.01, max_retries=2, retry_backoff=0.01)
+    buffer.start()
+    buffer.put_many([1])
+    wait_for(lambda: buffer.failed_rows == 1)
+    buffer.stop()
+    assert buffer.flush_errors == 3 and buffer.depth() == 0
@@ -0,0 +1,72 @@
+# test_occupancy.py
+# OccupancyTracker 상태 머신 - 입/출차 연속 프레임 경계, 오탐 무시, process_frame 은 apply 전까지 상태를 바꾸지 않음
+#
+#   cd server && python -m pytest -q
+
+from datetime import datetime, timedelta
+
+from occupancy import NO_SLOT, OccupancyTracker
+
+T0 = datetime(2024, 1, 1)
+
+def frame(tracker, i, slots, sensor_id="cam"):
+    events, update = tracker.process_frame(sensor_id, slots, T0 + timedelta(seconds=i))
+    tracker.apply(update)
+    return events
+
+def state(tracker, grid_index, sensor_id="cam"):
+    return next(s for s in tracker.snapshot(sensor_id) if s["grid_index"] == grid_index)
+
+def test_enter_after_enter_frames_with_first_seen_time():
+    tracker = OccupancyTracker(enter_frames=3, leave_frames=2)
+    assert frame(tracker, 0, [7]) == []
+    assert frame(tracker, 1, [7]) == []
+    assert frame(tracker, 2, [7]) == [("enter", "cam", 7, T0)]
+    assert state(tracker, 7)["occupied"] is True
+
+def test_single_frame_gap_does_not_leave():
+    tracker = OccupancyTracker(enter_frames=1, leave_frames=2)
+    frame(tracker, 0, [7])
+    assert frame(tracker, 1, []) == []
+    assert frame(tracker, 2, [7]) == []
+    assert state(tracker, 7)["occupied"] is True
+
+def test_leave_after_leave_frames_with_first_absent_time():
+    tracker = OccupancyTracker(enter_frames=1, leave_frames=2)
+    frame(tracker, 0, [7])
+    frame(tracker, 1, [])
+    events = frame(tracker, 2, [])
+    assert events == [("leave", "cam", 7, T0, T0 + timedelta(seconds=1))]
+    assert state(tracker, 7)["occupied"] is False
+
+def test_interrupted_enter_streak_restarts():
+    tracker = OccupancyTracker(enter_frames=2, leave_frames=5)
+    frame(tracker, 0, [7])
+    frame(tracker, 1, [])
+    assert frame(tracker, 2, [7]) == []
+    assert frame(tracker, 3, [7]) == [("enter", "cam", 7, T0 + timedelta(seconds=2))]
+
+def test_no_slot_and_duplicates_are_ignored():
+    tracker = OccupancyTracker(enter_frames=1)
+    assert frame(tracker, 0, [NO_SLOT, 3, 3]) == [("enter", "cam", 3, T0)]
+    assert [s["grid_index"] for s in tracker.snapshot("cam")] == [3]
+
+def test_process_frame_without_apply_keeps_state():
+    # 커밋 실패로 apply 하지 않은 프레임은 연속 횟수에도 들어가지 않음
+    tracker = OccupancyTracker(enter_frames=2)
+    frame(tracker, 0, [7])
+    events, _ = tracker.process_frame("cam", [7], T0 + timedelta(seconds=1))
+    assert events == [("enter", "cam", 7, T0)]
+    assert state(tracker, 7)["occupied"] is False
+    # 다시 보낸 같은 프레임이 입차로 판정됨 (실패한 프레임이 두 번 세어지지 않음)
+    assert frame(tracker, 1, [7]) == [("enter", "cam", 7, T0)]
+
+def test_restore_then_leave():
+    tracker = OccupancyTracker(enter_frames=1, leave_frames=1)
+    tracker.restore("cam", 4, True, T0)
+    assert frame(tracker, 10, []) == [("leave", "cam", 4, T0, T0 + timedelta(seconds=10))]
+
+def test_cameras_are_independent():
+    tracker = OccupancyTracker(enter_frames=1)
+    frame(tracker, 0, [1], sensor_id="a")
+    assert tracker.snapshot("b") == []
@@ -0,0 +1,86 @@
+# test_recent_cache.py
+# RecentCache - 항목은 fill 로만 생김, miss 후 fill 전에 저장된 행 합치기, capacity / complete 경계
+#
+#   cd server && python -m pytest -q
+
+from datetime import datetime, timedelta
+
+from recent_cache import RecentCache
+
+T0 = datetime(2024, 1, 1)
+
+def row(i, minutes=None):
+    return {"id": i, "created_at": T0 + timedelta(minutes=i if minutes is None else minutes), "value": i}
+
+def ids(rows):
+    return [r.id for r in rows]
+
+def test_add_without_entry_does_not_create_one():
+    cache = RecentCache(capacity=5)
+    cache.add("s1", row(1))
+    assert cache.get("s1", 1) is None
+    assert cache.stats()["sensors"] == 0
+
+def test_fill_then_add_serves_newest_first():
+    cache = RecentCache(capacity=5)
+    cache.fill("s1", [row(2), row(1)], complete=True)
+    cache.add("s1", row(3))
+    assert ids(cache.get("s1", 3)) == [3, 2, 1]
+    # DB 행이 전부 캐시에 있으므로 더 많이 요청해도 적중
+    assert ids(cache.get("s1", 5)) == [3, 2, 1]
+
+def test_incomplete_entry_misses_when_short():
+    cache = RecentCache(capacity=5)
+    cache.fill("s1", [row(3), row(2)], complete=False)
+    assert ids(cache.get("s1", 2)) == [3, 2]
+    assert cache.get("s1", 3) is None
+
+def test_count_over_capacity_misses():
+    cache = RecentCache(capacity=2)
+    cache.fill("s1", [row(1)], complete=True)
+    assert cache.get("s1", 3) is None
+
+def test_capacity_drops_oldest_and_clears_complete():
+    cache = RecentCache(capacity=2)
+    cache.fill("s1", [row(1)], complete=True)
+    cache.add("s1", row(2))
+    cache.add("s1", row(3))
+    assert ids(cache.get("s1", 2)) == [3, 2]
+    assert cache.get("s1", 3) is None
+
+def test_old_row_outside_incomplete_range_is_ignored():
+    cache = RecentCache(capacity=5)
+    cache.fill("s1", [row(10), row(9)], complete=False)
+    cache.add("s1", row(1))  # 보드 시계가 늦은 과거 행 - 그 사이 DB 행을 모름
+    assert ids(cache.get("s1", 2)) == [10, 9]
+    assert cache.get("s1", 3) is None
+
+def test_rows_saved_between_miss_and_fill_are_merged():
+    cache = RecentCache(capacity=5)
+    assert cache.get("s1", 2) is None  # miss → pending 등록
+    cache.add("s1", row(3))            # DB 조회 중 저장
+    cache.fill("s1", [row(3), row(2), row(1)], complete=True)  # 조회 결과에 이미 들어 있을 수도 있음
+    cache.add("s1", row(4))
+    assert ids(cache.get("s1", 5)) == [4, 3, 2, 1]
+
+def test_pending_row_missing_from_fill_is_kept():
+    cache = RecentCache(capacity=5)
+    assert cache.get("s1", 1) is None
+    cache.add("s1", row(3))
+    cache.fill("s1", [row(2), row(1)], complete=True)
+    assert ids(cache.get("s1", 3)) == [3, 2, 1]
+
+def test_max_keys_evicts_least_recently_used():
+    cache = RecentCache(capacity=2, max_keys=2)
+    cache.fill("a", [row(1)], complete=True)
+    cache.fill("b", [row(1)], complete=True)
+    cache.get("a", 1)
+    cache.fill("c", [row(1)], complete=True)
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None
+    assert cache.stats()["evictions"] == 1
+
+def test_capacity_zero_disables_cache():
+    cache = RecentCache(capacity=0)
+    cache.fill("s1", [row(1)], complete=True)
+    assert cache.get("s1", 1) is None
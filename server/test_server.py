@@ -0,0 +1,115 @@
+# test_server.py
+# server.py / server_async.py 엔드포인트 검증 - 임시 SQLite DB 에서 두 앱을 같은 요청으로 확인
+# - 측정값 NaN/inf: 단건 422, 일괄은 항목 단위 오류
+# - 바이너리 본문의 ts 범위 밖 → 422
+# - recent 캐시 miss 후 DB 에서 채움
+# - 객체 프레임 저장이 실패하면 점유 상태가 바뀌지 않음
+#
+#   cd server && python -m pytest -q
+
+import atexit
+import os
+import shutil
+import tempfile
+
+# server 를 import 하기 전에 - 실제 DB / 운영 설정을 건드리지 않도록
+_db_dir = tempfile.mkdtemp(prefix="server-test-")
+atexit.register(shutil.rmtree, _db_dir, True)
+os.environ["DB_URL"] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ["PARTITION_INTERVAL"] = ""
+os.environ["OCCUPANCY_ENTER_FRAMES"] = "2"
+for name in ("ADMISSION_LIMITS", "ADMISSION_DB_LATENCY_BUDGET", "SENSOR_RATE_LIMIT", "CAMERA_RATE_LIMIT"):
+    os.environ.pop(name, None)
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+import server_async
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from binary_ingest import STRUCT_CONTENT_TYPE, encode_struct
+
+JSON = {"content-type": "application/json"}
+
+@pytest.fixture(scope="module", params=["server", "server_async"])
+def app_module(request):
+    return server if request.param == "server" else server_async
+
+@pytest.fixture(scope="module")
+def client(app_module):
+    with TestClient(app_module.app) as c:
+        yield c
+
+def sensor_id(request, suffix=""):
+    # 두 앱이 같은 DB 를 쓰므로 테스트마다 다른 센서 id
+    return f"{request.node.name}{suffix}"[:90]
+
+@pytest.mark.parametrize("value", ["NaN", "Infinity", "-Infinity", "1e400"])
+def test_single_reading_rejects_non_finite(client, value):
+    r = client.post("/sensor-data/s", content='{"data":{"temperature":%s,"humidity":1}}' % value, headers=JSON)
+    assert r.status_code == 422
+
+def test_single_reading_accepts_numeric_string(client, request):
+    sid = sensor_id(request)
+    r = client.post(f"/sensor-data/{sid}", json={"data": {"temperature": "21.5", "humidity": 40}})
+    assert r.status_code == 200
+    assert client.get(f"/sensor-data/{sid}/recent", params={"count": 1}).json()[0]["temperature"] == 21.5
+
+def test_batch_non_finite_are_item_errors(client, request):
+    sid = sensor_id(request)
+    body = ('{"readings":[{"sensor_id":"%s","data":{"temperature":NaN,"humidity":1}},'
+            '{"sensor_id":"%s","data":{"temperature":1e400,"humidity":1}},'
+            '{"sensor_id":"","data":{"temperature":1,"humidity":1}},'
+            '{"sensor_id":"%s","data":{"temperature":20,"humidity":1}}]}') % (sid, sid, sid)
+    r = client.post("/sensor-data/batch", content=body, headers=JSON)
+    assert r.status_code == 200
+    result = r.json()
+    assert (result["inserted"], result["failed"]) == (1, 3)
+    assert [item["status"] for item in result["results"]] == ["error", "error", "error", "ok"]
+
+def test_binary_struct_single(client, request):
+    sid = sensor_id(request)[:16]
+    r = client.post(f"/sensor-data/{sid}", content=encode_struct([(sid, 1700000000, 21.5, 40.0)]),
+                    headers={"content-type": STRUCT_CONTENT_TYPE})
+    assert r.status_code == 200
+
+@pytest.mark.skipif(msgpack is None, reason="msgpack 미설치")
+@pytest.mark.parametrize("path", ["/sensor-data/m", "/sensor-data/batch"])
+@pytest.mark.parametrize("ts", [1e300, float("nan"), -5])
+def test_binary_ts_out_of_range_is_422(client, path, ts):
+    body = msgpack.packb([["m", ts, 20.0, 40.0], ["m", 1700000001, 20.0, 40.0]])
+    r = client.post(path, content=body, headers={"content-type": "application/msgpack"})
+    assert r.status_code == 422
+
+def test_recent_miss_fills_cache(client, app_module, request):
+    sid = sensor_id(request)
+    for t in (20, 21, 22):
+        assert client.post(f"/sensor-data/{sid}", json={"data": {"temperature": t, "humidity": 40}}).status_code == 200
+    # 저장 경로는 캐시 항목을 만들지 않음 → 첫 조회는 miss 후 DB 에서 채움
+    assert server.sensor_cache.get(sid, 1) is None
+    assert [r["temperature"] for r in client.get(f"/sensor-data/{sid}/recent", params={"count": 2}).json()] == [22, 21]
+    hits = server.sensor_cache.hits
+    assert [r["temperature"] for r in client.get(f"/sensor-data/{sid}/recent", params={"count": 3}).json()] == [22, 21, 20]
+    assert server.sensor_cache.hits == hits + 1
+
+def test_object_frame_failure_keeps_occupancy(client, app_module, monkeypatch, request):
+    sid = sensor_id(request)
+    frame = {"sensor_id": sid, "data": {"0": {
+        "box_data": [0, 0, 10, 10], "label_data": "car", "score": 0.9, "mid_point": [5, 5], "grid_index": 3}}}
+    assert client.post("/rtsp-detections/rtsp-object", json=frame).status_code == 200
+
+    def fail(events):
+        raise RuntimeError("db down")
+
+    with monkeypatch.context() as m:
+        m.setattr(app_module, "occupancy_changes", fail)
+        assert client.post("/rtsp-detections/rtsp-object", json=frame).status_code == 500
+    assert client.get(f"/parking/{sid}/occupancy").json()["occupied_count"] == 0
+    # 실패한 프레임은 세지 않으므로 다음 프레임이 두 번째 연속 프레임 → 입차
+    assert client.post("/rtsp-detections/rtsp-object", json=frame).status_code == 200
+    assert client.get(f"/parking/{sid}/occupancy").json()["occupied_count"] == 1